@@ -1,100 +1,284 @@
 from langgraph.graph import StateGraph, MessagesState, START, END
-from langgraph.prebuilt import ToolNode, tools_condition
-from langgraph.checkpoint.memory import MemorySaver
-from langchain_core.messages import SystemMessage
+from langgraph.prebuilt import tools_condition
+from langchain_core.messages import SystemMessage, HumanMessage, AIMessage
+from langchain_core.runnables import RunnableLambda
 from dotenv import load_dotenv
 import os
 from Tools.Calculator_And_currency_tool import CurrencyCalculator
 from Tools.Place_search_tool import PlaceSearchTool
 from Tools.weather_tool import WeatherTool
 from Tools.itenary_planner_tool import ItineraryPlannerTool
+from Agent.tool_node import ParallelToolNode
+from Agent.context_manager import ContextManager, SUMMARY_TAG, count_tokens
+from Agent.tool_selector import ToolSelector
+from Agent.budget import RunBudget
 from Prompt.system_prompt import SYSTEM_PROMPT
 from utils.llm_loader import load_llm
+from utils.checkpointer import load_checkpointer
+from utils.answer_cache import AnswerCache, load_answer_cache_embeddings
+from configuration.config import ANSWER_CACHE_ENABLED
+from utils.logger import get_logger
+from utils.metrics import MetricsCallbackHandler, observe_prompt
+from utils.tracing import model_name, record_cache_lookup, record_llm_response, tracer
+import asyncio
+
+logger = get_logger(__name__)
 
 load_dotenv()
 
+class AgentState(MessagesState):
+    """Conversation state: messages plus a running summary of the turns folded out of the prompt"""
+    summary: str
+    summarized_count: int
+    # Budget counters of the current invocation (reset through AgentGraph.run_input, see Agent/budget.py)
+    run_steps: int
+    run_tool_calls: int
+    run_tokens: int
+    run_deadline: float
+
 class AgentGraph:
-    def __init__(self):
-        
-        self.llm = load_llm()
+    def __init__(self, llm=None, tools=None, checkpointer=None, budget=None):
         
-        self.currency_convertor = CurrencyCalculator()
-        self.place_search = PlaceSearchTool()
-        self.weather_forcast = WeatherTool()
-        self.itenary_planner = ItineraryPlannerTool()
+        # llm/tools/checkpointer can be injected (e.g. stubs for benchmarks); defaults load the configured backends
+        self.llm = llm or load_llm()
         
-        # Flatten the tools list properly
-        self.tools = []
-        self.tools.extend(self.currency_convertor.currency_calculator_tools_list)
-        self.tools.extend(self.place_search.place_search_tool_list)
-        self.tools.extend(self.weather_forcast.weather_tool_list)
-        self.tools.extend(self.itenary_planner.itinerary_tool_list)
+        if tools is None:
+            self.currency_convertor = CurrencyCalculator()
+            self.place_search = PlaceSearchTool()
+            self.weather_forcast = WeatherTool()
+            self.itenary_planner = ItineraryPlannerTool(geocoder=self.place_search.google_places_search.geocode)
+            
+            # Flatten the tools list properly
+            tools = []
+            tools.extend(self.currency_convertor.currency_calculator_tools_list)
+            tools.extend(self.place_search.place_search_tool_list)
+            tools.extend(self.weather_forcast.weather_tool_list)
+            tools.extend(self.itenary_planner.itinerary_tool_list)
+        self.tools = list(tools)
         
         # System prompt
         self.system_prompt = SYSTEM_PROMPT
-        self.llm_with_tools = self.llm.bind_tools(tools=self.tools)
+        # One tool subset bound per agent step; the system prompt + schemas prefix stays stable for prompt caching
+        self.tool_selector = ToolSelector(self.llm, self.tools, self.system_prompt)
+        
+        # Caps LLM steps, tool calls, tokens and time per request; a spent budget forces the final answer
+        self.budget = budget or RunBudget()
+        
+        # Keeps every prompt within the token budget (trims stale tool output, summarizes old turns)
+        self.context_manager = ContextManager(self.llm)
+        
+        # Checkpointer for conversation persistence (bounded SQLite by default, see utils/checkpointer.py)
+        self.memory = checkpointer or load_checkpointer()
         
-        # Initialize memory saver for conversation persistence
-        self.memory = MemorySaver()
+        # Opt-in cache of complete first-turn answers (skips the LLM and tools entirely on a hit)
+        self.answer_cache = AnswerCache(embeddings=load_answer_cache_embeddings()) if ANSWER_CACHE_ENABLED else None
         
         # Build the graph on initialization
         self.graph = self.build_graph()
     
-    def agent_function(self, state: MessagesState):
+    def _select_llm(self, input_question):
+        """LLM bound to the current step's tools; records the prompt's prefix/message token split"""
+        step, llm_with_tools = self.tool_selector.select(input_question)
+        prefix_tokens = self.tool_selector.prefix_tokens[step]
+        message_tokens = count_tokens(input_question) - count_tokens([self.system_prompt])
+        observe_prompt(step, prefix_tokens, message_tokens)
+        attributes = {
+            "gen_ai.request.model": model_name(self.llm),
+            "llm.step": step,
+            "llm.prompt.prefix_tokens": prefix_tokens,
+            "llm.prompt.message_tokens": message_tokens,
+        }
+        return llm_with_tools, attributes
+    
+    def _plan_step(self, state, input_question):
+        """(LLM, prompt, span attributes) for this agent step: tools bound, or none once the budget is spent"""
+        exhausted = self.budget.exhausted(state)
+        if exhausted is None:
+            llm_with_tools, attributes = self._select_llm(input_question)
+            return llm_with_tools, input_question, attributes
+        self.budget.record_exhausted(exhausted, state)
+        attributes = {"gen_ai.request.model": model_name(self.llm), "llm.step": "answer", "llm.budget_exhausted": exhausted}
+        return self.llm, self.budget.final_prompt(input_question), attributes
+    
+    def agent_function(self, state: AgentState):
         """Main agent function"""
-        user_question = state["messages"]
-        # SYSTEM_PROMPT is already a SystemMessage object
-        input_question = [self.system_prompt] + user_question
-        response = self.llm_with_tools.invoke(input_question)
-        return {"messages": [response]}
+        # SYSTEM_PROMPT is already a SystemMessage object; the context manager prepends it
+        input_question, summary_update = self.context_manager.prepare(self.system_prompt, state)
+        llm, prompt, attributes = self._plan_step(state, input_question)
+        with tracer.start_as_current_span("llm.agent", attributes=attributes) as span:
+            response = llm.invoke(prompt)
+            record_llm_response(span, response)
+        response, budget_update = self.budget.charge(state, prompt, response)
+        return {"messages": [response], **budget_update, **(summary_update or {})}
+    
+    async def aagent_function(self, state: AgentState):
+        """Async variant of agent_function used by ainvoke/astream"""
+        input_question, summary_update = await self.context_manager.aprepare(self.system_prompt, state)
+        llm, prompt, attributes = self._plan_step(state, input_question)
+        with tracer.start_as_current_span("llm.agent", attributes=attributes) as span:
+            response = await llm.ainvoke(prompt)
+            record_llm_response(span, response)
+        response, budget_update = self.budget.charge(state, prompt, response)
+        return {"messages": [response], **budget_update, **(summary_update or {})}
     
     def build_graph(self):
         """Build the LangGraph workflow"""
-        builder = StateGraph(MessagesState)
+        builder = StateGraph(AgentState)
         
         # Note: tools_condition expects a node named 'tools' (lowercase)
-        builder.add_node("agent", self.agent_function)
-        builder.add_node("tools", ToolNode(self.tools))
+        # Sync and async implementations, so both invoke() and ainvoke() work without blocking the event loop
+        builder.add_node("agent", RunnableLambda(self.agent_function, afunc=self.aagent_function))
+        # Independent tool calls from one agent step run concurrently (capped, with per-tool timeouts)
+        tool_node = ParallelToolNode(self.tools)
+        builder.add_node("tools", RunnableLambda(tool_node.invoke, afunc=tool_node.ainvoke))
         
         builder.add_edge(START, "agent")
         builder.add_conditional_edges("agent", tools_condition)
         builder.add_edge("tools","agent")
         
-        # Compile with memory saver for conversation persistence
+        # Compile with the checkpointer for conversation persistence
         graph = builder.compile(checkpointer=self.memory)
         return graph
     
+    def _cacheable_question(self, messages, history):
+        """Question text if this is a first-turn, history-free query the answer cache may serve"""
+        inputs = messages.get("messages", [])
+        if history or len(inputs) != 1 or not isinstance(inputs[0], HumanMessage):
+            return None
+        return inputs[0].content if isinstance(inputs[0].content, str) else None
+    
+    def _final_answer(self, output):
+        """Content of the final AI message, if the run ended with a complete answer"""
+        last = output["messages"][-1] if isinstance(output, dict) and output.get("messages") else None
+        if isinstance(last, AIMessage) and not last.tool_calls and isinstance(last.content, str) and last.content:
+            return last.content
+        return None
+    
+    def _serve_cached_answer(self, messages, config):
+        """Answer-cache lookup; returns (cacheable question, cached turn), either of which may be None"""
+        if self.answer_cache is None:
+            return None, None
+        question = self._cacheable_question(messages, self.graph.get_state(config).values.get("messages", []))
+        answer = self.answer_cache.lookup(question) if question else None
+        record_cache_lookup("answer_cache", answer is not None)
+        if answer is None:
+            return question, None
+        # Record the cached turn so follow-up questions and PDF export see it
+        turn = [HumanMessage(content=question), AIMessage(content=answer)]
+        self.graph.update_state(config, {"messages": turn}, as_node="agent")
+        return question, turn
+    
+    async def _aserve_cached_answer(self, messages, config):
+        """Async variant of _serve_cached_answer"""
+        if self.answer_cache is None:
+            return None, None
+        state = await self.graph.aget_state(config)
+        question = self._cacheable_question(messages, state.values.get("messages", []))
+        # Lookups may call an embeddings API, so keep them off the event loop
+        answer = await asyncio.to_thread(self.answer_cache.lookup, question) if question else None
+        record_cache_lookup("answer_cache", answer is not None)
+        if answer is None:
+            return question, None
+        turn = [HumanMessage(content=question), AIMessage(content=answer)]
+        await self.graph.aupdate_state(config, {"messages": turn}, as_node="agent")
+        return question, turn
+    
+    def _run_config(self, session_id):
+        """Session config plus a fresh metrics callback (LLM latency/tokens, graph steps) for this run"""
+        config = {"configurable": {"thread_id": session_id}, "callbacks": [MetricsCallbackHandler(summary_tag=SUMMARY_TAG)]}
+        recursion_limit = self.budget.recursion_limit()
+        if recursion_limit:
+            # Backstop only: the budget ends the loop with an answer well before this
+            config["recursion_limit"] = recursion_limit + 4
+        return config
+    
+    def run_input(self, messages):
+        """Graph input for a new invocation: the new messages plus a fresh per-request budget"""
+        return {**messages, **self.budget.start()}
+    
     def invoke_with_config(self, messages, session_id):
         """Invoke the graph with session-specific configuration"""
-        config = {"configurable": {"thread_id": session_id}}
-        return self.graph.invoke(messages, config=config)
+        config = self._run_config(session_id)
+        question, cached_turn = self._serve_cached_answer(messages, config)
+        if cached_turn:
+            return {"messages": cached_turn}
+        
+        output = self.graph.invoke(self.run_input(messages), config=config)
+        answer = self._final_answer(output)
+        if question and answer:
+            self.answer_cache.store(question, answer)
+        return output
+    
+    async def ainvoke_with_config(self, messages, session_id):
+        """Async invoke: LLM calls are awaited and blocking tools run in the default thread pool"""
+        config = self._run_config(session_id)
+        question, cached_turn = await self._aserve_cached_answer(messages, config)
+        if cached_turn:
+            return {"messages": cached_turn}
+        
+        output = await self.graph.ainvoke(self.run_input(messages), config=config)
+        answer = self._final_answer(output)
+        if question and answer:
+            await asyncio.to_thread(self.answer_cache.store, question, answer)
+        return output
     
-    def get_session_history(self, session_id):
+    async def astream_with_config(self, messages, session_id):
+        """Stream LLM tokens and tool progress for a session as plain event dicts.
+
+        Yields {"type": "token" | "tool_start" | "tool_end" | "done", ...}; the final
+        "done" event carries the complete answer read back from the session state.
+        messages=None resumes the session's interrupted run from its last checkpoint
+        (keeping that run's budget).
+        """
+        config = self._run_config(session_id)
+        question, cached_turn = await self._aserve_cached_answer(messages, config) if messages is not None else (None, None)
+        if cached_turn:
+            yield {"type": "done", "answer": cached_turn[-1].content, "cached": True}
+            return
+        
+        run_input = self.run_input(messages) if messages is not None else None
+        async for event in self.graph.astream_events(run_input, config=config, version="v2"):
+            kind = event["event"]
+            if (kind == "on_chat_model_stream" and event.get("metadata", {}).get("langgraph_node") == "agent"
+                    and SUMMARY_TAG not in event.get("tags", [])):
+                content = event["data"]["chunk"].content
+                if isinstance(content, str) and content:
+                    yield {"type": "token", "content": content}
+            elif kind == "on_tool_start":
+                yield {"type": "tool_start", "name": event["name"], "run_id": event["run_id"]}
+            elif kind == "on_tool_end":
+                yield {"type": "tool_end", "name": event["name"], "run_id": event["run_id"]}
+        
+        history = (await self.graph.aget_state(config)).values.get("messages", [])
+        answer = history[-1].content if history else ""
+        if question and self._final_answer({"messages": history}):
+            await asyncio.to_thread(self.answer_cache.store, question, answer)
+        yield {"type": "done", "answer": answer}
+    
+    async def aget_run_state(self, session_id):
+        """(history, interrupted) for a session; interrupted when its last run stopped before finishing"""
+        state = await self.graph.aget_state({"configurable": {"thread_id": session_id}})
+        return state.values.get("messages", []) if state.values else [], bool(state.next)
+    
+    async def aget_session_history(self, session_id):
         """Get conversation history for a specific session"""
         try:
             config = {"configurable": {"thread_id": session_id}}
             # Get the current state for this session
-            state = self.graph.get_state(config)
+            state = await self.graph.aget_state(config)
             return state.values.get("messages", []) if state.values else []
         except Exception as e:
-            print(f"Error retrieving session history: {e}")
+            logger.exception("Error retrieving session history", extra={"session_id": session_id})
             return []
     
-    def clear_session(self, session_id):
+    async def aclear_session(self, session_id):
         """Clear conversation history for a specific session"""
         try:
-            config = {"configurable": {"thread_id": session_id}}
-            # Use the correct method to clear session state
-            # Get current state first
-            current_state = self.graph.get_state(config)
-            if current_state and current_state.values:
-                # Clear by setting empty messages
-                empty_state = {"messages": []}
-                # Use update_state to clear the session
-                self.graph.update_state(config, empty_state, as_node="agent")
+            # Drop every checkpoint of the thread (appending an empty update would keep the history)
+            await self.memory.adelete_thread(session_id)
             return True
         except Exception as e:
-            print(f"Error clearing session: {e}")
+            logger.exception("Error clearing session", extra={"session_id": session_id})
             return False
 
     def __call__(self):
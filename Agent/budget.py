@@ -0,0 +1,100 @@
+import time
+from typing import List, Optional
+
+from langchain_core.messages import AIMessage, BaseMessage, SystemMessage
+
+from configuration.config import AGENT_DEADLINE_SECONDS, AGENT_MAX_STEPS, AGENT_MAX_TOKENS, AGENT_MAX_TOOL_CALLS
+from Agent.context_manager import count_tokens
+from utils.logger import get_logger
+from utils.metrics import BUDGET_EXHAUSTED
+
+logger = get_logger(__name__)
+
+# Appended to the prompt (never stored in the conversation) once the budget is spent
+FINAL_ANSWER_PROMPT = SystemMessage(content=(
+    "The research budget for this request is used up and no more tools can be called. "
+    "Write the final answer now from the information gathered above. Where something could "
+    "not be looked up, say so briefly and give a reasonable estimate or suggestion instead."
+))
+
+
+class RunBudget:
+    """Per-request bound on the agent <-> tools loop.
+
+    Each invocation starts with fresh counters (`start()`, merged into the graph input)
+    and every agent step charges its LLM call, the tool calls it asks for and the tokens
+    it used. Once a limit is reached (or the deadline has passed) the next agent step
+    answers with the tools unbound and FINAL_ANSWER_PROMPT, so the run ends with an
+    answer built from what was gathered so far rather than an error. Tool calls beyond
+    the remaining allowance are dropped from the step that asks for them. A limit of 0
+    disables that limit; max_steps counts the answer step, so it is at least 2.
+    """
+
+    def __init__(self, max_steps: int = AGENT_MAX_STEPS, max_tool_calls: int = AGENT_MAX_TOOL_CALLS,
+                 max_tokens: int = AGENT_MAX_TOKENS, deadline_seconds: float = AGENT_DEADLINE_SECONDS):
+        # One step for tools and one for the answer; 1 would answer before any tool could run
+        self.max_steps = max(2, max_steps) if max_steps > 0 else 0
+        self.max_tool_calls = max_tool_calls
+        self.max_tokens = max_tokens
+        self.deadline_seconds = deadline_seconds
+
+    def start(self) -> dict:
+        """State values that reset the budget for a new invocation"""
+        # Wall-clock time, so the deadline means the same in whichever worker resumes the checkpoint
+        deadline = time.time() + self.deadline_seconds if self.deadline_seconds > 0 else 0.0
+        return {"run_steps": 0, "run_tool_calls": 0, "run_tokens": 0, "run_deadline": deadline}
+
+    def recursion_limit(self) -> Optional[int]:
+        """Graph supersteps needed for max_steps agent steps, the tool steps between them and the forced answer"""
+        return 2 * self.max_steps + 1 if self.max_steps > 0 else None
+
+    def exhausted(self, state) -> Optional[str]:
+        """Name of the first limit reached ("steps", "tool_calls", "tokens", "deadline"), or None"""
+        if self.max_steps > 0 and state.get("run_steps", 0) >= self.max_steps - 1:
+            # The last step is kept for the answer
+            return "steps"
+        if self.max_tool_calls > 0 and state.get("run_tool_calls", 0) >= self.max_tool_calls:
+            return "tool_calls"
+        if self.max_tokens > 0 and state.get("run_tokens", 0) >= self.max_tokens:
+            return "tokens"
+        deadline = state.get("run_deadline") or 0.0
+        if deadline and time.time() >= deadline:
+            return "deadline"
+        return None
+
+    def record_exhausted(self, reason: str, state):
+        BUDGET_EXHAUSTED.labels(reason).inc()
+        logger.warning("Agent budget exhausted, forcing final answer", extra={
+            "limit": reason,
+            **{key: state.get(key, 0) for key in ("run_steps", "run_tool_calls", "run_tokens")},
+        })
+
+    def final_prompt(self, messages: List[BaseMessage]) -> List[BaseMessage]:
+        return [*messages, FINAL_ANSWER_PROMPT]
+
+    def charge(self, state, prompt: List[BaseMessage], response: AIMessage):
+        """(response with tool calls capped to the remaining allowance, state update with the new counters)"""
+        tool_calls = list(getattr(response, "tool_calls", None) or [])
+        if self.max_tool_calls > 0:
+            remaining = max(0, self.max_tool_calls - state.get("run_tool_calls", 0))
+            if len(tool_calls) > remaining:
+                # The run is counted as exhausted at the forced answer that follows
+                logger.warning("Agent step asked for more tool calls than the budget allows", extra={
+                    "requested": len(tool_calls), "allowed": remaining,
+                })
+                tool_calls = tool_calls[:remaining]
+                # Raw provider tool calls would otherwise be sent back in place of an emptied list
+                additional_kwargs = {key: value for key, value in response.additional_kwargs.items() if key != "tool_calls"}
+                response = response.model_copy(update={
+                    "tool_calls": tool_calls, "invalid_tool_calls": [], "additional_kwargs": additional_kwargs,
+                })
+
+        usage = getattr(response, "usage_metadata", None) or {}
+        # Providers that report no usage are charged an estimate
+        tokens = usage.get("total_tokens") or count_tokens(prompt) + count_tokens([response])
+        update = {
+            "run_steps": state.get("run_steps", 0) + 1,
+            "run_tool_calls": state.get("run_tool_calls", 0) + len(tool_calls),
+            "run_tokens": state.get("run_tokens", 0) + tokens,
+        }
+        return response, update
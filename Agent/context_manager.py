@@ -0,0 +1,140 @@
+from typing import List, Optional, Tuple
+
+from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage, ToolMessage
+from langchain_core.messages.utils import count_tokens_approximately
+
+from configuration.config import (
+    CONTEXT_MAX_TOOL_RESULT_CHARS,
+    CONTEXT_STALE_TOOL_RESULT_CHARS,
+    CONTEXT_TOKEN_BUDGET,
+)
+from utils.logger import get_logger
+from utils.tracing import model_name, record_llm_response, tracer
+
+logger = get_logger(__name__)
+
+# Tag on summarization LLM calls so token streams can leave them out and metrics label them separately
+SUMMARY_TAG = "context_summary"
+
+SUMMARY_PROMPT = (
+    "Summarize the earlier part of this travel-planning conversation for your own future reference. "
+    "Keep destinations, dates, traveler count, budget, preferences, decisions already made and key facts "
+    "from tool results (prices, places, weather). Be compact: bullet points, no pleasantries."
+)
+
+
+def count_tokens(messages: List[BaseMessage]) -> int:
+    return count_tokens_approximately(messages)
+
+
+def _truncate(message: ToolMessage, max_chars: int) -> ToolMessage:
+    content = message.content if isinstance(message.content, str) else str(message.content)
+    if len(content) <= max_chars:
+        return message
+    return message.model_copy(update={"content": content[:max_chars] + " …[truncated]"})
+
+
+class ContextManager:
+    """Keeps each LLM prompt within a token budget.
+
+    Applied before every agent call, in this order:
+      1. tool results from earlier turns are cut to a short excerpt, and current-turn
+         results to `max_tool_result_chars`;
+      2. if still over budget, whole older turns are folded into a running summary
+         (kept in the graph state so it is computed once);
+      3. if the current turn alone is over budget, its tool results share what is left.
+    Turns are only ever split at HumanMessage boundaries, so an AI tool_call is never
+    separated from its ToolMessage results.
+    """
+
+    def __init__(self, llm, token_budget: int = CONTEXT_TOKEN_BUDGET,
+                 max_tool_result_chars: int = CONTEXT_MAX_TOOL_RESULT_CHARS,
+                 stale_tool_result_chars: int = CONTEXT_STALE_TOOL_RESULT_CHARS):
+        self.llm = llm
+        self.token_budget = token_budget
+        self.max_tool_result_chars = max_tool_result_chars
+        self.stale_tool_result_chars = stale_tool_result_chars
+
+    def _turn_starts(self, messages: List[BaseMessage]) -> List[int]:
+        return [index for index, message in enumerate(messages) if isinstance(message, HumanMessage)]
+
+    def _trim_tool_results(self, messages: List[BaseMessage]) -> List[BaseMessage]:
+        starts = self._turn_starts(messages)
+        current_turn = starts[-1] if starts else 0
+        trimmed = []
+        for index, message in enumerate(messages):
+            if isinstance(message, ToolMessage):
+                limit = self.stale_tool_result_chars if index < current_turn else self.max_tool_result_chars
+                message = _truncate(message, limit)
+            trimmed.append(message)
+        return trimmed
+
+    def _prompt(self, system_prompt: SystemMessage, summary: str, messages: List[BaseMessage]) -> List[BaseMessage]:
+        prefix = [system_prompt]
+        if summary:
+            prefix.append(SystemMessage(content=f"Summary of the earlier conversation:\n{summary}"))
+        return prefix + messages
+
+    def _plan(self, system_prompt: SystemMessage, state: dict) -> Tuple[List[BaseMessage], List[BaseMessage], int]:
+        """Returns (messages kept verbatim, older messages to fold into the summary, new summarized_count)"""
+        covered = state.get("summarized_count", 0)
+        messages = self._trim_tool_results(state["messages"][covered:])
+        summary = state.get("summary", "")
+        if count_tokens(self._prompt(system_prompt, summary, messages)) <= self.token_budget:
+            return messages, [], covered
+
+        # Fold the oldest turns into the summary until the rest fits; always keep the current turn
+        starts = self._turn_starts(messages)
+        split = starts[-1] if starts else 0
+        for start in starts:
+            if start > 0 and count_tokens(self._prompt(system_prompt, summary, messages[start:])) <= self.token_budget:
+                split = start
+                break
+        return messages[split:], messages[:split], covered + split
+
+    def _fit_current_turn(self, prompt: List[BaseMessage]) -> List[BaseMessage]:
+        """Share the remaining budget between tool results when the current turn alone is too large"""
+        tool_indexes = [index for index, message in enumerate(prompt) if isinstance(message, ToolMessage)]
+        total = count_tokens(prompt)
+        if total <= self.token_budget or not tool_indexes:
+            return prompt
+        fixed = count_tokens([message for message in prompt if not isinstance(message, ToolMessage)])
+        # ~4 chars per token, minus headroom for the truncation marker and per-message overhead
+        per_tool_chars = max(self.stale_tool_result_chars, (self.token_budget - fixed) * 4 // len(tool_indexes) - 64)
+        return [_truncate(message, per_tool_chars) if isinstance(message, ToolMessage) else message for message in prompt]
+
+    def _summary_request(self, summary: str, older: List[BaseMessage]) -> List[BaseMessage]:
+        previous = f"Existing summary:\n{summary}\n\n" if summary else ""
+        transcript = "\n".join(f"{message.type}: {message.content}" for message in older if message.content)
+        return [SystemMessage(content=SUMMARY_PROMPT), HumanMessage(content=f"{previous}Conversation:\n{transcript}")]
+
+    def _finish(self, system_prompt, state, kept, summary, summarized_count) -> Tuple[List[BaseMessage], Optional[dict]]:
+        prompt = self._fit_current_turn(self._prompt(system_prompt, summary, kept))
+        raw_tokens = count_tokens([system_prompt] + list(state["messages"]))
+        logger.debug("Prompt prepared", extra={"raw_tokens": raw_tokens, "prompt_tokens": count_tokens(prompt), "token_budget": self.token_budget})
+        update = None
+        if summarized_count != state.get("summarized_count", 0):
+            update = {"summary": summary, "summarized_count": summarized_count}
+        return prompt, update
+
+    def prepare(self, system_prompt: SystemMessage, state: dict) -> Tuple[List[BaseMessage], Optional[dict]]:
+        """Build the prompt for this step; also returns a state update when the summary changed"""
+        kept, older, summarized_count = self._plan(system_prompt, state)
+        summary = state.get("summary", "")
+        if older:
+            with tracer.start_as_current_span("llm.summary", attributes={"gen_ai.request.model": model_name(self.llm)}) as span:
+                response = self.llm.invoke(self._summary_request(summary, older), config={"tags": [SUMMARY_TAG]})
+                record_llm_response(span, response)
+            summary = response.content
+        return self._finish(system_prompt, state, kept, summary, summarized_count)
+
+    async def aprepare(self, system_prompt: SystemMessage, state: dict) -> Tuple[List[BaseMessage], Optional[dict]]:
+        """Async variant of prepare"""
+        kept, older, summarized_count = self._plan(system_prompt, state)
+        summary = state.get("summary", "")
+        if older:
+            with tracer.start_as_current_span("llm.summary", attributes={"gen_ai.request.model": model_name(self.llm)}) as span:
+                response = await self.llm.ainvoke(self._summary_request(summary, older), config={"tags": [SUMMARY_TAG]})
+                record_llm_response(span, response)
+            summary = response.content
+        return self._finish(system_prompt, state, kept, summary, summarized_count)
@@ -0,0 +1,121 @@
+import asyncio
+import contextvars
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import List
+
+from langchain_core.messages import ToolMessage
+from langgraph.graph import MessagesState
+
+from configuration.config import TOOL_MAX_CONCURRENCY, TOOL_TIMEOUT_SECONDS
+from utils.metrics import observe_tool
+from utils.tracing import tracer
+
+
+class ParallelToolNode:
+    """Executes the tool calls of the last AI message concurrently.
+
+    At most `max_concurrency` tools run at once and each one gets `timeout` seconds
+    once it has started. Results are returned in the original tool_call order; a
+    failed or timed-out call becomes an error ToolMessage so the model can react.
+    """
+
+    def __init__(self, tools: List, max_concurrency: int = TOOL_MAX_CONCURRENCY, timeout: float = TOOL_TIMEOUT_SECONDS):
+        self.tools_by_name = {tool.name: tool for tool in tools}
+        self.max_concurrency = max(1, max_concurrency)
+        self.timeout = timeout
+
+    def _tool_calls(self, state: MessagesState) -> List[dict]:
+        return list(getattr(state["messages"][-1], "tool_calls", None) or [])
+
+    def _error_message(self, call: dict, error: str) -> ToolMessage:
+        return ToolMessage(content=f"Error: {error}", name=call["name"], tool_call_id=call["id"], status="error")
+
+    def _unknown_tool_message(self, call: dict) -> ToolMessage:
+        return self._error_message(call, f"{call['name']} is not a valid tool, try one of [{', '.join(self.tools_by_name)}]")
+
+    def _status(self, message: ToolMessage) -> str:
+        return "error" if getattr(message, "status", "success") == "error" else "ok"
+
+    def _run_one(self, call: dict, config, started: dict, abandoned: set, slot: int) -> ToolMessage:
+        started[slot] = time.monotonic()
+        with tracer.start_as_current_span(f"tool {call['name']}", attributes={"tool.name": call["name"]}) as span:
+            try:
+                result = self.tools_by_name[call["name"]].invoke({**call, "type": "tool_call"}, config)
+            except Exception as e:
+                result = self._error_message(call, repr(e))
+            # A call abandoned on timeout still finishes here, after its step has moved on
+            span.set_attribute("tool.status", "timeout" if slot in abandoned else self._status(result))
+        # Calls abandoned on timeout are recorded by invoke(); this late result is discarded
+        if slot not in abandoned:
+            observe_tool(call["name"], self._status(result), time.monotonic() - started[slot])
+        return result
+
+    async def _arun_one(self, call: dict, config, semaphore: asyncio.Semaphore) -> ToolMessage:
+        if call["name"] not in self.tools_by_name:
+            return self._unknown_tool_message(call)
+        async with semaphore:
+            start = time.monotonic()
+            with tracer.start_as_current_span(f"tool {call['name']}", attributes={"tool.name": call["name"]}) as span:
+                try:
+                    tool = self.tools_by_name[call["name"]]
+                    result = await asyncio.wait_for(tool.ainvoke({**call, "type": "tool_call"}, config), timeout=self.timeout)
+                    status = self._status(result)
+                except asyncio.TimeoutError:
+                    result, status = self._error_message(call, f"{call['name']} timed out after {self.timeout}s"), "timeout"
+                except Exception as e:
+                    result, status = self._error_message(call, repr(e)), "error"
+                span.set_attribute("tool.status", status)
+            observe_tool(call["name"], status, time.monotonic() - start)
+            return result
+
+    def invoke(self, state: MessagesState, config=None):
+        """Run tool calls in a bounded thread pool, abandoning any that exceed the timeout"""
+        calls = self._tool_calls(state)
+        if not calls:
+            return {"messages": []}
+
+        results = [None if call["name"] in self.tools_by_name else self._unknown_tool_message(call) for call in calls]
+        runnable = [index for index, result in enumerate(results) if result is None]
+
+        step_start = time.monotonic()
+        started, abandoned = {}, set()
+        executor = ThreadPoolExecutor(max_workers=min(self.max_concurrency, max(1, len(runnable))), thread_name_prefix="tool-call")
+        futures = {
+            index: executor.submit(contextvars.copy_context().run, self._run_one, calls[index], config, started, abandoned, slot)
+            for slot, index in enumerate(runnable)
+        }
+        slots = {index: slot for slot, index in enumerate(runnable)}
+
+        def deadline(index: int) -> float:
+            # Queued calls have not started yet; bound them by the slot they will run in
+            slot = slots[index]
+            if slot in started:
+                return started[slot] + self.timeout
+            return step_start + (slot // self.max_concurrency + 1) * self.timeout
+
+        pending = set(runnable)
+        while pending:
+            now = time.monotonic()
+            for index in [i for i in pending if futures[i].done()]:
+                results[index] = futures[index].result()
+                pending.discard(index)
+            for index in [i for i in pending if deadline(i) <= now]:
+                futures[index].cancel()
+                results[index] = self._error_message(calls[index], f"{calls[index]['name']} timed out after {self.timeout}s")
+                abandoned.add(slots[index])
+                observe_tool(calls[index]["name"], "timeout", now - started.get(slots[index], now))
+                pending.discard(index)
+            if pending:
+                wait([futures[i] for i in pending], timeout=max(0.0, min(deadline(i) for i in pending) - now), return_when=FIRST_COMPLETED)
+
+        # Don't block the step on abandoned (timed-out) calls
+        executor.shutdown(wait=False, cancel_futures=True)
+        return {"messages": results}
+
+    async def ainvoke(self, state: MessagesState, config=None):
+        """Run tool calls as concurrent tasks capped by a semaphore; gather keeps the call order"""
+        calls = self._tool_calls(state)
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        results = await asyncio.gather(*(self._arun_one(call, config, semaphore) for call in calls))
+        return {"messages": list(results)}
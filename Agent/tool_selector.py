@@ -0,0 +1,45 @@
+from typing import Dict, List, Sequence, Tuple
+
+from langchain_core.messages import BaseMessage, SystemMessage
+from langchain_core.messages.utils import count_tokens_approximately
+
+from configuration.config import AGENT_STEP_TOOLS, TOOL_SUBSETS_ENABLED
+from utils.llm_router import STEPS, classify_step
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class ToolSelector:
+    """Offers the agent LLM only the tools its current step needs.
+
+    Steps follow `classify_step` (the same split the LLM router routes on). Each step's
+    subset is bound once, in registration order, so its tool schemas plus the system
+    prompt form a byte-identical prefix on every call and session: what provider prompt
+    caching matches on. The tool node still runs every tool; the subsets only decide
+    which schemas are sent.
+    """
+
+    def __init__(self, llm, tools: Sequence, system_prompt: SystemMessage,
+                 step_tools: Dict[str, str] = AGENT_STEP_TOOLS, enabled: bool = TOOL_SUBSETS_ENABLED):
+        self.tools = list(tools)
+        self.subsets = {step: self._subset(step_tools.get(step, "")) if enabled else self.tools for step in STEPS}
+        self.bound = {step: llm.bind_tools(tools=subset) for step, subset in self.subsets.items()}
+        # Estimated the way the context manager counts messages (~4 characters per token)
+        self.prefix_tokens = {
+            step: count_tokens_approximately([system_prompt], tools=subset) for step, subset in self.subsets.items()
+        }
+        logger.info("Tool subsets bound", extra={
+            step: {"tools": len(self.subsets[step]), "prefix_tokens": self.prefix_tokens[step]} for step in STEPS
+        })
+
+    def _subset(self, spec: str) -> List:
+        names = {name.strip() for name in spec.split(",") if name.strip()}
+        subset = [tool for tool in self.tools if tool.name in names]
+        # Unknown or empty configuration (e.g. injected replay tools) falls back to every tool
+        return subset or self.tools
+
+    def select(self, messages: List[BaseMessage]) -> Tuple[str, object]:
+        """(step, LLM bound to that step's tools) for this prompt"""
+        step = classify_step(messages)
+        return step, self.bound[step]
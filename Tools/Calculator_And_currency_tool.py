@@ -1,10 +1,17 @@
 #currency convertor Tool
 
-from langchain_community.utilities.alpha_vantage import AlphaVantageAPIWrapper
 from langchain.tools import tool
 from dotenv import load_dotenv
 from typing import List
-import os
+from utils.budget_engine import budget_engine, format_scenarios, parse_codes, parse_int_list
+from utils.fx_rates import fx_rates
+from utils.logger import get_logger
+import re
+
+logger = get_logger(__name__)
+
+# One batch item: optional code, amount (plain or with "," thousands separators), optional code
+AMOUNT_PATTERN = re.compile(r"([A-Za-z]{3})?\s*([-+]?(?:\d{1,3}(?:,\d{3})+|\d+)(?:\.\d+)?)\s*([A-Za-z]{3})?")
 
 class BasicCalculator:
     """Basic calculator for expense calculations"""
@@ -30,7 +37,7 @@ class CurrencyCalculator:
         @tool
         def currency_convertor(from_currency:str ,to_currency:str , value: float):
             """
-            Convert currency from one type to another using Alpha Vantage API.
+            Convert currency from one type to another using the local FX rate table.
             
             Args:
                 from_currency (str): The source currency code (e.g., 'USD', 'EUR')
@@ -41,15 +48,78 @@ class CurrencyCalculator:
                 float: The converted currency value
             """
             try:
-                convertor = AlphaVantageAPIWrapper(alphavantage_api_key=os.getenv("ALPHAVANTAGE_API_KEY"))
-                response = convertor._get_exchange_rate(from_currency, to_currency)
-                
-                exchange_rate = response['Realtime Currency Exchange Rate']['5. Exchange Rate']
-                
-                return float(value) * float(exchange_rate)
+                return round(fx_rates.convert(value, from_currency, to_currency), 2)
+            except Exception as e:
+                logger.warning("Currency conversion failed", extra={"from_currency": from_currency, "to_currency": to_currency, "error": str(e)})
+                return f"Error: could not convert {from_currency} to {to_currency}: {e}"
+
+        @tool
+        def convert_currency_batch(amounts: str, to_currency: str, from_currency: str = "") -> str:
+            """
+            Convert many amounts in one call, e.g. every price in a plan.
+            
+            Args:
+                amounts (str): Amounts separated by ";" or new lines, each optionally followed by its currency
+                    code, e.g. "1,200 INR; 45.5 EUR; 30" (amounts without a code use from_currency)
+                to_currency (str): The target currency code (e.g., 'USD')
+                from_currency (str): Default source currency code for amounts given without one
+            
+            Returns:
+                str: One line per amount with the converted value, plus the total
+            """
+            try:
+                values, sources = [], []
+                # "," stays inside amounts as a thousands separator ("1,200"), so items are split on ";" or new lines
+                for item in filter(None, (part.strip() for part in re.split(r"[;\n]", amounts))):
+                    match = AMOUNT_PATTERN.fullmatch(item)
+                    code = match and (match.group(1) or match.group(3) or from_currency)
+                    if not code:
+                        return (f"Error: cannot read '{item}'; separate amounts with ';' and write each as "
+                                f"'<amount> <CODE>' (or set from_currency).")
+                    values.append(float(match.group(2).replace(",", "")))
+                    sources.append(code)
+                if not values:
+                    return "Error: no amounts given."
+
+                target = to_currency.strip().upper()
+                converted = fx_rates.convert_many(values, sources, [target] * len(values))
+                lines = [f"{value:,.2f} {source.upper()} = {result:,.2f} {target}" for value, source, result in zip(values, sources, converted)]
+                lines.append(f"Total: {converted.sum():,.2f} {target} ({fx_rates.describe()})")
+                return "\n".join(lines)
+            except Exception as e:
+                return f"Error converting amounts: {str(e)}"
+
+        @tool
+        def compare_budget_scenarios(destination: str, traveler_counts: str = "1,2,4", day_counts: str = "3,5,7",
+                                     season: str = "regular", currencies: str = "USD") -> str:
+            """Estimate trip budgets for every combination of traveler count, trip length, budget tier
+            (low/medium/high) and currency in one call, with accommodation/food/transport/activities unit costs.
+            Use this instead of chaining separate calculator and conversion calls.
+            Args:
+                destination: Travel destination (city and/or country)
+                traveler_counts: Comma-separated traveler counts to compare, e.g. "1,2,4"
+                day_counts: Comma-separated trip lengths in days to compare, e.g. "3,5,7"
+                season: Travel season: off, regular or peak
+                currencies: Comma-separated currency codes for the totals, e.g. "USD,INR"
+            """
+            try:
+                travelers, days = parse_int_list(traveler_counts), parse_int_list(day_counts)
+                if not travelers or not days:
+                    return "Error: traveler_counts and day_counts need at least one positive number each."
+                rates, unavailable = {}, []
+                for code in parse_codes(currencies):
+                    try:
+                        rates[code] = fx_rates.rate(budget_engine.base_currency, code)
+                    except ValueError:
+                        unavailable.append(code)
+                result = format_scenarios(budget_engine, budget_engine.scenarios(destination, travelers, days, season, rates))
+                if set(rates) - {budget_engine.base_currency}:
+                    result += f"\n\nExchange {fx_rates.describe()}."
+                if unavailable:
+                    result += f"\n\nNo exchange rate available for: {', '.join(unavailable)} (amounts shown in {budget_engine.base_currency})."
+                return result
             except Exception as e:
-                print(f"Currency conversion error: {e}")
-                return float(value)  # Return original value if conversion fails
+                return f"Error comparing budget scenarios: {str(e)}"
 
         @tool
         def estimate_total_hotel_cost(price_per_night: float, total_days: float) -> float:
@@ -66,5 +136,5 @@ class CurrencyCalculator:
             """Calculate daily expense"""
             return self.calculator.calculate_daily_budget(total_cost, days)
         
-        return [currency_convertor,estimate_total_hotel_cost, calculate_total_expense, calculate_daily_expense_budget]
+        return [currency_convertor, convert_currency_batch, compare_budget_scenarios, estimate_total_hotel_cost, calculate_total_expense, calculate_daily_expense_budget]
         
\ No newline at end of file
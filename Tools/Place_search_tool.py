@@ -1,8 +1,24 @@
 import os
-from utils.place_info import GooglePlaceSearchTool, TavilyPlaceSearchTool
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import contextvars
+from configuration.config import PLACES_BRIEF_MAX_TOP_N, PLACES_BRIEF_TOP_N
+from utils.place_info import (
+    PLACE_QUERIES,
+    GooglePlaceSearchTool,
+    TavilyPlaceSearchTool,
+    _has_places,
+    _has_web_results,
+    build_destination_brief,
+    format_destination_brief,
+)
 from typing import List
 from langchain.tools import tool
 from dotenv import load_dotenv
+from utils.singleflight import coalesce
+from utils.provider_router import ProviderUnavailable, places_router
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
 
 class PlaceSearchTool:
     def __init__(self):
@@ -12,50 +28,83 @@ class PlaceSearchTool:
         self.tavily_search = TavilyPlaceSearchTool()
         self.place_search_tool_list = self._setup_tools()
 
+    def _provider_calls(self, google_search, category: str, place: str) -> dict:
+        """Google first; Tavily as hedge/fallback when it is configured"""
+        calls = {"google_places": lambda: google_search(category, place)}
+        if self.tavily_search.has_tavily:
+            calls["tavily"] = lambda: self.tavily_search.tavily_search(category, place)
+        return calls
+
+    def _search(self, category: str, place: str, subject: str) -> str:
+        """Routed text search for one category; `subject` reads e.g. 'the attractions of Goa'"""
+        try:
+            provider, result = places_router.call(
+                self._provider_calls(self.google_places_search.google_search, category, place),
+                validators={"google_places": _has_places, "tavily": _has_web_results},
+            )
+        except ProviderUnavailable as e:
+            return f"Could not find {subject}: {e}"
+        if provider == "google_places":
+            return f"Following are {subject} as suggested by google: {result}"
+        return f"Google could not answer in time or found nothing. \nFollowing are {subject}: {result}"  ## Tavily hedge/fallback result
+
     def _setup_tools(self) -> List:
         """Setup all tools for the place search tool"""
         @tool
+        @coalesce("search_attractions")
         def search_attractions(place:str) -> str:
             """Search attractions of a place"""
-            try:
-                attraction_result = self.google_places_search.google_search_attractions(place)
-                if attraction_result:
-                    return f"Following are the attractions of {place} as suggested by google: {attraction_result}"
-            except Exception as e:
-                tavily_result = self.tavily_search.tavily_search_attractions(place)
-                return f"Google cannot find the details due to {e}. \nFollowing are the attractions of {place}: {tavily_result}"  ## Fallback search using tavily in case google places fail
+            return self._search("attractions", place, f"the attractions of {place}")
         
         @tool
+        @coalesce("search_restaurants")
         def search_restaurants(place:str) -> str:
             """Search restaurants of a place"""
-            try:
-                restaurants_result = self.google_places_search.google_search_restaurants(place)
-                if restaurants_result:
-                    return f"Following are the restaurants of {place} as suggested by google: {restaurants_result}"
-            except Exception as e:
-                tavily_result = self.tavily_search.tavily_search_restaurants(place)
-                return f"Google cannot find the details due to {e}. \nFollowing are the restaurants of {place}: {tavily_result}"  ## Fallback search using tavily in case google places fail
+            return self._search("restaurants", place, f"the restaurants of {place}")
         
         @tool
+        @coalesce("search_activities")
         def search_activities(place:str) -> str:
             """Search activities of a place"""
-            try:
-                activities_result = self.google_places_search.google_search_activity(place)
-                if activities_result:
-                    return f"Following are the activities in and around {place} as suggested by google: {activities_result}"
-            except Exception as e:
-                tavily_result = self.tavily_search.tavily_search_activity(place)
-                return f"Google cannot find the details due to {e}. \nFollowing are the activities of {place}: {tavily_result}"  ## Fallback search using tavily in case google places fail
+            return self._search("activities", place, f"the activities in and around {place}")
         
         @tool
+        @coalesce("search_transportation")
         def search_transportation(place:str) -> str:
             """Search transportation of a place"""
-            try:
-                transportation_result = self.google_places_search.google_search_transportation(place)
-                if transportation_result:
-                    return f"Following are the modes of transportation available in {place} as suggested by google: {transportation_result}"
-            except Exception as e:
-                tavily_result = self.tavily_search.tavily_search_transportation(place)
-                return f"Google cannot find the details due to {e}. \nFollowing are the modes of transportation available in {place}: {tavily_result}"  ## Fallback search using tavily in case google places fail
+            return self._search("transportation", place, f"the modes of transportation available in {place}")
         
-        return [search_attractions, search_restaurants, search_activities, search_transportation]
\ No newline at end of file
+        @tool
+        @coalesce("get_destination_brief")
+        def get_destination_brief(place: str, top_n: int = PLACES_BRIEF_TOP_N) -> str:
+            """Get attractions, restaurants, activities and transportation for a place in ONE call:
+            top places per category with rating, price level and coordinates, duplicates removed.
+            Prefer this over calling the four separate search tools."""
+            top_n = max(1, min(int(top_n), PLACES_BRIEF_MAX_TOP_N))
+            context = contextvars.copy_context()
+
+            def search(category):
+                return places_router.call(
+                    self._provider_calls(self.google_places_search.google_search_places, category, place),
+                    validators={"google_places": bool, "tavily": _has_web_results},
+                )
+
+            results, fallbacks = {}, {}
+            # All categories at once; Google is a single text-search request per category (or a cache hit)
+            with ThreadPoolExecutor(max_workers=len(PLACE_QUERIES)) as executor:
+                futures = {executor.submit(context.copy().run, search, category): category for category in PLACE_QUERIES}
+                for future in as_completed(futures):
+                    category = futures[future]
+                    try:
+                        provider, result = future.result()
+                    except ProviderUnavailable as e:
+                        logger.warning("No provider answered the place search", extra={"category": category, "place": place, "error": str(e)})
+                        provider, result = "google_places", []
+                    if provider == "google_places":
+                        results[category] = result
+                    else:
+                        fallbacks[category] = result
+
+            return format_destination_brief(place, build_destination_brief(results, top_n), fallbacks)
+
+        return [get_destination_brief, search_attractions, search_restaurants, search_activities, search_transportation]
\ No newline at end of file
@@ -1,13 +1,19 @@
 import os
 import json
 from datetime import datetime, timedelta
-from typing import List, Dict, Any
+from typing import Any, Callable, Dict, List, Optional
 from langchain.tools import tool
 from dotenv import load_dotenv
+from configuration.config import ITINERARY_DAY_MINUTES, ITINERARY_VISIT_MINUTES
+from utils.budget_engine import TIERS, budget_engine, format_breakdown
+from utils.fx_rates import fx_rates
+from utils.itinerary_engine import ItineraryEngine, format_itinerary, locate_attractions
 
 class ItineraryPlannerTool:
-    def __init__(self):
+    def __init__(self, geocoder: Optional[Callable[[str], Optional[list]]] = None):
         load_dotenv()
+        # Resolves "attraction, city" to [lat, lon] for attractions passed without coordinates
+        self.geocoder = geocoder
         self.itinerary_tool_list = self._setup_tools()
     
     def _setup_tools(self) -> List:
@@ -89,124 +95,52 @@ class ItineraryPlannerTool:
                 return f"Error creating itinerary: {str(e)}"
         
         @tool
-        def optimize_itinerary_by_location(attractions: str, city: str) -> str:
-            """Optimize itinerary by grouping attractions by location/area in the city.
+        def optimize_itinerary_by_location(attractions: str, city: str, days: int = 0, daily_hours: float = 0,
+                                           visit_hours: float = 0) -> str:
+            """Group attractions into days by location and order each day's route to minimize travel.
             Args:
-                attractions: Comma-separated list of attractions to visit
-                city: The city name for location optimization
+                attractions: Comma-separated list of attractions to visit; add coordinates when known, e.g. "Fort Aguada (15.4920, 73.7737)"
+                city: The city name, used to locate attractions given without coordinates
+                days: Number of days to spread the attractions over (0 = as many as needed to fit them all)
+                daily_hours: Sightseeing hours available per day (0 = default)
+                visit_hours: Average hours spent at each attraction (0 = default)
             """
             try:
-                attraction_list = [attraction.strip() for attraction in attractions.split(',')]
-                
-                # Create location-based grouping (simplified example)
-                optimized_plan = f"""
-## 📍 Location-Optimized Itinerary for {city}
-
-### Attractions to Visit:
-{', '.join(attraction_list)}
-
-### Optimized Route Suggestions:
-
-**Zone 1 - City Center/Downtown:**
-- Group nearby attractions in the city center
-- Recommended duration: Half day
-- Transportation: Walking or public transport
+                names, coords, unlocated = locate_attractions(attractions, city, self.geocoder)
+                if not names:
+                    return f"Could not locate any of these attractions in {city}: {attractions}"
 
-**Zone 2 - Cultural District:**
-- Museums, galleries, and cultural sites
-- Recommended duration: Full day
-- Transportation: Public transport or taxi
+                engine = ItineraryEngine(
+                    day_minutes=daily_hours * 60 if daily_hours > 0 else ITINERARY_DAY_MINUTES,
+                    visit_minutes=visit_hours * 60 if visit_hours > 0 else ITINERARY_VISIT_MINUTES,
+                )
+                plan = engine.plan(names, coords, days=days if days > 0 else None)
+                return format_itinerary(plan, city, unlocated)
 
-**Zone 3 - Recreational Areas:**
-- Parks, outdoor activities, and scenic spots
-- Recommended duration: Half to full day
-- Transportation: May require private transport
-
-### Travel Tips:
-- Start early to maximize time at each location
-- Book tickets in advance for popular attractions
-- Check opening hours and days
-- Consider purchasing city tourist passes for discounts
-
-### Estimated Timeline:
-- Allow 2-3 hours per major attraction
-- Include travel time between zones (30-60 minutes)
-- Factor in meal breaks and rest periods
-"""
-                
-                return optimized_plan
-                
             except Exception as e:
                 return f"Error optimizing itinerary: {str(e)}"
         
         @tool
-        def create_budget_breakdown(destination: str, duration_days: int, traveler_count: int, budget_category: str = "medium") -> str:
+        def create_budget_breakdown(destination: str, duration_days: int, traveler_count: int, budget_category: str = "medium",
+                                    season: str = "regular", currency: str = "USD") -> str:
             """Create a detailed budget breakdown for the trip.
             Args:
                 destination: Travel destination
                 duration_days: Number of days
                 traveler_count: Number of travelers
                 budget_category: Budget category (low, medium, high)
+                season: Travel season (off, regular, peak)
+                currency: Currency code for the amounts (e.g. USD, INR, EUR)
             """
             try:
-                # Budget multipliers based on category
-                multipliers = {
-                    "low": {"accommodation": 50, "food": 30, "transport": 20, "activities": 25},
-                    "medium": {"accommodation": 100, "food": 60, "transport": 40, "activities": 50},
-                    "high": {"accommodation": 200, "food": 120, "transport": 80, "activities": 100}
-                }
-                
-                base_costs = multipliers.get(budget_category, multipliers["medium"])
-                
-                # Calculate costs
-                accommodation_total = base_costs["accommodation"] * duration_days
-                food_total = base_costs["food"] * duration_days * traveler_count
-                transport_total = base_costs["transport"] * traveler_count
-                activities_total = base_costs["activities"] * duration_days * traveler_count
-                
-                total_budget = accommodation_total + food_total + transport_total + activities_total
-                per_person_budget = total_budget / traveler_count if traveler_count > 0 else total_budget
-                
-                budget_breakdown = f"""
-## 💰 Budget Breakdown for {destination}
+                if duration_days <= 0 or traveler_count <= 0:
+                    return "Error creating budget breakdown: duration_days and traveler_count must be positive."
+                tier = budget_category.lower() if budget_category.lower() in TIERS else "medium"
+                code = currency.strip().upper() or budget_engine.base_currency
+                rates = fx_rates.rates_from(budget_engine.base_currency, [code])
+                scenarios = budget_engine.scenarios(destination, [traveler_count], [duration_days], season, rates)
+                return format_breakdown(budget_engine, scenarios, tier, code)
 
-**Trip Details:**
-- Destination: {destination}
-- Duration: {duration_days} days
-- Travelers: {traveler_count} person(s)
-- Budget Category: {budget_category.title()}
-
-### Cost Breakdown:
-
-🏨 **Accommodation:**
-- ${base_costs['accommodation']}/night × {duration_days} nights = ${accommodation_total}
-
-🍽️ **Food & Dining:**
-- ${base_costs['food']}/person/day × {traveler_count} travelers × {duration_days} days = ${food_total}
-
-🚗 **Transportation:**
-- ${base_costs['transport']}/person = ${transport_total}
-
-🎯 **Activities & Attractions:**
-- ${base_costs['activities']}/person/day × {traveler_count} travelers × {duration_days} days = ${activities_total}
-
-### Summary:
-- **Total Budget:** ${total_budget}
-- **Per Person:** ${per_person_budget:.2f}
-- **Daily Average:** ${total_budget/duration_days:.2f}
-
-### Budget Tips:
-- Book accommodations in advance for better rates
-- Look for local restaurants for authentic and affordable meals
-- Consider city tourist passes for activity discounts
-- Use public transportation when possible
-- Set aside 10-15% extra for unexpected expenses
-
-*Note: Prices are estimates and may vary based on season, availability, and specific choices.*
-"""
-                
-                return budget_breakdown
-                
             except Exception as e:
                 return f"Error creating budget breakdown: {str(e)}"
         
@@ -306,5 +240,5 @@ class ItineraryPlannerTool:
                 return f"Error creating travel checklist: {str(e)}"
         
         # Return all the tools
-        return [create_daily_itinerary, create_travel_checklist]
+        return [create_daily_itinerary, optimize_itinerary_by_location, create_budget_breakdown, create_travel_checklist]
 
@@ -4,7 +4,9 @@ from pathlib import Path
 from langchain.tools import tool
 from typing import List
 from dotenv import load_dotenv
-from utils.weather_info import WeatherForecastTool as WeatherService
+from datetime import date
+from utils.weather_info import WeatherForecastTool as WeatherService, daily_forecast
+from utils.singleflight import coalesce
 
 class WeatherTool:
     def __init__(self):
@@ -16,6 +18,7 @@ class WeatherTool:
     def setup_tools(self) -> List:
         """Setup all tools for the weather forecast tool"""
         @tool
+        @coalesce("get_current_weather")
         def get_current_weather(city: str) -> str:
             """Get current weather for a city"""
             weather_data = self.weather_service.get_current_weather(city)
@@ -26,18 +29,42 @@ class WeatherTool:
             return f"Could not fetch weather for {city}"
         
         @tool
-        def get_weather_forecast(city: str) -> str:
-            """Get weather forecast for a city"""
+        @coalesce("get_weather_forecast")
+        def get_weather_forecast(city: str, start_date: str = "", end_date: str = "") -> str:
+            """Get the daily weather forecast for a city (up to 5 days ahead), optionally limited to the travel dates.
+            Args:
+                city: City name
+                start_date: First travel date as YYYY-MM-DD (optional)
+                end_date: Last travel date as YYYY-MM-DD (optional)
+            """
+            try:
+                start = date.fromisoformat(start_date) if start_date else None
+                end = date.fromisoformat(end_date) if end_date else None
+            except ValueError:
+                return "Error: start_date and end_date must be in YYYY-MM-DD format."
+
             forecast_data = self.weather_service.get_forecast_weather(city)
-            if forecast_data and 'list' in forecast_data:
-                forecast_summary = []
-                for i in range(len(forecast_data['list'])):
-                    item = forecast_data['list'][i]
-                    date = item['dt_txt'].split(' ')[0]
-                    temp = item['main']['temp']
-                    desc = item['weather'][0]['description']
-                    forecast_summary.append(f"{date}: {temp} degree celcius , {desc}")
-                return f"Weather forecast for {city}:\n" + "\n".join(forecast_summary)
-            return f"Could not fetch forecast for {city}"
+            if not forecast_data or 'list' not in forecast_data:
+                return f"Could not fetch forecast for {city}"
+
+            all_days = daily_forecast(forecast_data)
+            if not all_days:
+                return f"Could not fetch forecast for {city}"
+            first, last = all_days[0]["date"], all_days[-1]["date"]
+            days = [day for day in all_days if (not start or day["date"] >= start) and (not end or day["date"] <= end)]
+            if not days:
+                requested = " to ".join(filter(None, [start_date, end_date])) if start and end else (f"from {start_date}" if start else f"until {end_date}")
+                return (f"No forecast available for {city} ({requested}): the forecast only covers {first} to {last}. "
+                        f"Use typical seasonal weather instead.")
+
+            lines = [f"Daily forecast for {city} (°C, precipitation mm / max chance):", "| Date | Min/Max | Precip | Conditions |", "|---|---|---|---|"]
+            for day in days:
+                lines.append(f"| {day['date']:%a %d %b} | {day['min']:.0f}/{day['max']:.0f} | "
+                             f"{day['precip_mm']:g} mm / {day['precip_chance']:.0%} | {day['condition']} |")
+            if (start and start < first) or (end and end > last):
+                lines.append(f"Note: the forecast only covers {first} to {last}; use typical seasonal weather for the other dates.")
+            elif days[-1]["slots"] < 8 and days[-1]["date"] == last:
+                lines.append(f"Note: {last} is only partly covered by the forecast.")
+            return "\n".join(lines)
     
         return [get_current_weather, get_weather_forecast]
\ No newline at end of file
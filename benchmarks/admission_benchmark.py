@@ -0,0 +1,129 @@
+"""Admission control benchmark: open-loop overload against a quota-limited LLM.
+
+Queries arrive as a Poisson stream at multiples of the capacity of a stubbed LLM
+provider that serves `--llm-capacity` calls at once (slowing down as it fills up) and
+answers 429 beyond that, like an exhausted Groq quota. Each query runs the real
+AgentGraph (LLM, 5 stub tools, LLM). Compared with and without the admission layer
+(concurrency cap = provider capacity, bounded FIFO queue, queue timeout); clients
+give up after --client-timeout seconds.
+
+    python -m benchmarks.admission_benchmark --load 0.5 1 2 4 --duration 20
+"""
+import argparse
+import asyncio
+import random
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+
+import numpy as np
+from langchain_core.messages import HumanMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langgraph.checkpoint.memory import MemorySaver
+
+from Agent.agent import AgentGraph
+from benchmarks.stubs import StubChatModel, make_stub_tools
+from utils.admission import AdmissionController, AdmissionRejected, TokenBucketLimiter
+
+
+class UpstreamRateLimited(Exception):
+    status_code = 429
+
+
+class QuotaChatModel(StubChatModel):
+    """Stub LLM sharing one provider quota: `capacity` concurrent calls, 429 beyond, slower when busy"""
+
+    capacity: int = 8
+    load: Any = None
+
+    def model_post_init(self, _):
+        self.load = {"in_flight": 0}
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        if self.load["in_flight"] >= self.capacity:
+            await asyncio.sleep(0.02)  # the 429 round trip
+            raise UpstreamRateLimited("429 Too Many Requests")
+        self.load["in_flight"] += 1
+        try:
+            await asyncio.sleep(self.latency * (1 + 0.5 * self.load["in_flight"] / self.capacity))
+            return ChatResult(generations=[ChatGeneration(message=self._next_message(messages))])
+        finally:
+            self.load["in_flight"] -= 1
+
+
+async def run_level(graph: AgentGraph, admission, rate: float, args) -> dict:
+    """Poisson arrivals at `rate` queries/s for args.duration seconds; outcome counts and latencies"""
+    rng = random.Random(args.seed)
+    outcomes = {"ok": 0, "upstream_error": 0, "rejected": 0, "client_timeout": 0}
+    ok_latencies, reject_latencies = [], []
+
+    async def query():
+        start = time.perf_counter()
+        messages = {"messages": [HumanMessage(content="Plan a trip to Goa for 5 days")]}
+        try:
+            if admission is None:
+                await asyncio.wait_for(graph.ainvoke_with_config(messages, str(uuid.uuid4())), args.client_timeout)
+            else:
+                async def admitted():
+                    with await admission.acquire():
+                        return await graph.ainvoke_with_config(messages, str(uuid.uuid4()))
+                await asyncio.wait_for(admitted(), args.client_timeout)
+            outcomes["ok"] += 1
+            ok_latencies.append(time.perf_counter() - start)
+        except AdmissionRejected:
+            outcomes["rejected"] += 1
+            reject_latencies.append(time.perf_counter() - start)
+        except asyncio.TimeoutError:
+            outcomes["client_timeout"] += 1
+        except UpstreamRateLimited:
+            outcomes["upstream_error"] += 1
+
+    tasks = []
+    start = time.perf_counter()
+    while time.perf_counter() - start < args.duration:
+        tasks.append(asyncio.create_task(query()))
+        await asyncio.sleep(rng.expovariate(rate))
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - start
+    p50, p95, p99 = np.percentile(np.array(ok_latencies) * 1000, [50, 95, 99]) if ok_latencies else (float("nan"),) * 3
+    reject_p99 = np.percentile(np.array(reject_latencies) * 1000, 99) if reject_latencies else float("nan")
+    return {**outcomes, "total": len(tasks), "goodput": outcomes["ok"] / elapsed,
+            "p50": p50, "p95": p95, "p99": p99, "reject_p99": reject_p99}
+
+
+async def main(args):
+    asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=args.threads))
+    service_seconds = 2 * args.llm_latency * 1.5 + args.tool_latency
+    capacity_qps = args.llm_capacity / service_seconds
+    print(f"LLM capacity {args.llm_capacity} concurrent calls, ~{capacity_qps:.1f} queries/s sustainable; "
+          f"queue {args.queue}, queue timeout {args.queue_timeout}s, client timeout {args.client_timeout}s")
+    print(f"{'load':>5} | {'admission':>9} | {'offered':>7} | {'ok':>5} | {'429 up':>6} | {'rejected':>8} | {'timeout':>7} | "
+          f"{'ok/s':>6} | {'p50 ms':>8} | {'p95 ms':>8} | {'p99 ms':>8} | {'reject p99 ms':>13}")
+    for load in args.load:
+        for enabled in (False, True):
+            llm = QuotaChatModel(latency=args.llm_latency, capacity=args.llm_capacity)
+            graph = AgentGraph(llm=llm, tools=make_stub_tools(args.tool_latency), checkpointer=MemorySaver())
+            admission = AdmissionController(
+                max_concurrent=args.llm_capacity, max_queue=args.queue, queue_timeout=args.queue_timeout,
+                session_limiter=TokenBucketLimiter(0, 1), ip_limiter=TokenBucketLimiter(0, 1),
+            ) if enabled else None
+            r = await run_level(graph, admission, load * capacity_qps, args)
+            print(f"{load:>4.1f}x | {'on' if enabled else 'off':>9} | {r['total']:>7} | {r['ok']:>5} | {r['upstream_error']:>6} | "
+                  f"{r['rejected']:>8} | {r['client_timeout']:>7} | {r['goodput']:>6.1f} | {r['p50']:>8.0f} | {r['p95']:>8.0f} | "
+                  f"{r['p99']:>8.0f} | {r['reject_p99']:>13.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--load", type=float, nargs="+", default=[0.5, 1, 2, 4], help="offered load as a multiple of capacity")
+    parser.add_argument("--duration", type=float, default=20.0, help="seconds of arrivals per run")
+    parser.add_argument("--llm-capacity", type=int, default=8, help="concurrent calls the provider accepts")
+    parser.add_argument("--llm-latency", type=float, default=0.4, help="seconds per LLM call when the provider is idle")
+    parser.add_argument("--tool-latency", type=float, default=0.1, help="seconds per stub tool call")
+    parser.add_argument("--queue", type=int, default=32, help="admission queue length")
+    parser.add_argument("--queue-timeout", type=float, default=5.0)
+    parser.add_argument("--client-timeout", type=float, default=30.0)
+    parser.add_argument("--threads", type=int, default=64, help="default executor size for blocking tools")
+    parser.add_argument("--seed", type=int, default=0)
+    asyncio.run(main(parser.parse_args()))
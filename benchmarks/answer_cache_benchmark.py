@@ -0,0 +1,109 @@
+"""Answer cache check: paraphrases are served from the cache, changed trip parameters are not.
+
+Uses a deterministic bag-of-words embedder under which questions that differ only in
+a number (days, travelers, budget), a month or the destination are near-identical
+(cosine well above ANSWER_CACHE_SIMILARITY), as they are with real embedding models.
+Fails with an AssertionError if a question is served the answer for a different trip.
+Then times lookups that miss against a full index of `--entries` random vectors.
+
+    python -m benchmarks.answer_cache_benchmark [--entries 512] [--dimensions 1536]
+"""
+import argparse
+import math
+import random
+import re
+import time
+import zlib
+
+from utils.answer_cache import AnswerCache
+
+STORED = {
+    "Plan a trip to Goa for 5 days": "goa-5-days",
+    "Plan a 3 day trip to Paris for 2 people with a budget of $2000": "paris-3-days-2-people",
+    "Weekend in Jaipur in March": "jaipur-march",
+    "Plan 3 relaxed days in Porto in May with food, wine and river tours": "porto-3-days-may",
+}
+# question -> answer it must get (None: must miss)
+PROBES = {
+    "plan a trip to goa for 5 days please": "goa-5-days",
+    "Plan me a trip to Goa for 5 days": "goa-5-days",
+    "Plan a trip to Goa for 7 days": None,
+    "Plan a trip to Goa for five days": None,
+    "Plan a 3 day trip to Paris for 4 people with a budget of $2000": None,
+    "Plan a 3 day trip to Paris for 2 people with a budget of $3000": None,
+    "Plan a 3 day trip to Paris for 2 people with a budget of €2000": None,
+    "Please plan a 3 day trip to Paris for 2 people with a budget of $2000": "paris-3-days-2-people",
+    "Weekend in Jaipur in April": None,
+    "A weekend in Jaipur in March": "jaipur-march",
+    "Plan 3 relaxed days in Lisbon in May with food, wine and river tours": None,
+    "plan 3 relaxed days in lisbon in may with food, wine and river tours": None,
+    "Plan 3 relaxed days in Porto and Lisbon in May with food, wine and river tours": None,
+    "Please plan 3 relaxed days in Porto in May with food, wine and river tours": "porto-3-days-may",
+}
+
+
+class BagOfWordsEmbeddings:
+    """Hashed word counts; one differing word out of ten leaves cosine around 0.9-0.97"""
+
+    def __init__(self, dimensions: int = 512):
+        self.dimensions = dimensions
+
+    def embed_query(self, text: str):
+        vector = [0.0] * self.dimensions
+        for word in re.findall(r"\w+|[$€£₹]", text.lower()):
+            # Numbers weigh little, like in learned embeddings
+            vector[zlib.crc32(word.encode()) % self.dimensions] += 0.2 if word.isdigit() else 1.0
+        return vector
+
+
+class RandomEmbeddings:
+    """Random vectors, for timing the index rather than matching"""
+
+    def __init__(self, dimensions: int):
+        self.dimensions = dimensions
+        self.random = random.Random(0)
+
+    def embed_query(self, text: str):
+        return [self.random.gauss(0, 1) for _ in range(self.dimensions)]
+
+
+def cosine(a, b) -> float:
+    return sum(x * y for x, y in zip(a, b)) / (math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b)))
+
+
+def main(args):
+    embeddings = BagOfWordsEmbeddings()
+    cache = AnswerCache(similarity_threshold=args.threshold, embeddings=embeddings)
+    for question, answer in STORED.items():
+        cache.store(question, answer)
+    wrong = 0
+    print(f"{'probe':<80} | {'best cosine':>11} | {'expected':>22} | {'served':>22}")
+    for probe, expected in PROBES.items():
+        best = max(cosine(embeddings.embed_query(probe), embeddings.embed_query(question)) for question in STORED)
+        served = cache.lookup(probe)
+        wrong += served != expected
+        print(f"{probe:<80} | {best:>11.3f} | {str(expected):>22} | {str(served):>22}{'  <- WRONG' if served != expected else ''}")
+    print(cache.stats())
+    assert wrong == 0, f"{wrong} probes got the wrong answer"
+
+    embeddings = RandomEmbeddings(args.dimensions)
+    cache = AnswerCache(max_entries=args.entries, embeddings=embeddings)
+    for i in range(args.entries):
+        cache.store(f"question {i}", f"answer {i}")
+    # Embedding is excluded: only the search over the index is timed
+    vector = embeddings.embed_query("")
+    embeddings.embed_query = lambda text: vector
+    start = time.perf_counter()
+    for i in range(args.lookups):
+        cache.lookup(f"unseen question {i}")
+    elapsed = time.perf_counter() - start
+    print(f"{args.lookups} lookups over {args.entries} x {args.dimensions}: {elapsed / args.lookups * 1000:.3f} ms each")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threshold", type=float, default=0.9, help="cosine similarity needed for a semantic hit")
+    parser.add_argument("--entries", type=int, default=512, help="index size for the lookup timing")
+    parser.add_argument("--dimensions", type=int, default=1536, help="embedding size for the lookup timing")
+    parser.add_argument("--lookups", type=int, default=200, help="lookups to time")
+    main(parser.parse_args())
@@ -0,0 +1,104 @@
+"""Agent budget benchmark: a model that never stops calling tools, with and without the per-request budget.
+
+The stub LLM asks for every stub tool again after each round of results (a runaway
+tool loop) until it is called without tools. Without a budget nothing ends the run
+short of LangGraph's recursion limit (10,000 supersteps by default in current
+releases), so here the client gives up after --client-timeout seconds with no
+answer; with the budget the agent is forced to answer once a limit is reached.
+Reports LLM calls, tool calls, tokens and latency per query. First checks the step
+limit at its small values: every run answers, max steps 1 behaves as 2, and a limit
+of N allows N - 1 tool rounds plus the answer.
+
+    python -m benchmarks.budget_benchmark --queries 20 --max-steps 6 --max-tool-calls 15
+"""
+import argparse
+import asyncio
+import time
+import uuid
+
+import numpy as np
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+from langgraph.checkpoint.memory import MemorySaver
+
+from Agent.agent import AgentGraph
+from Agent.budget import RunBudget
+from benchmarks.stubs import StubChatModel, make_stub_tools
+
+TOKENS_PER_CALL = 1500
+
+
+class RunawayChatModel(StubChatModel):
+    """Requests every stub tool on every call; answers only when prompted without tools (final-answer prompt)"""
+
+    def _next_message(self, messages):
+        usage = {"input_tokens": TOKENS_PER_CALL - 100, "output_tokens": 100, "total_tokens": TOKENS_PER_CALL}
+        if isinstance(messages[-1], SystemMessage):
+            return AIMessage(content=f"Here is your stub travel plan for {self.place}.", usage_metadata=usage)
+        tool_calls = [
+            {"name": name, "args": {"place": self.place}, "id": f"call_{uuid.uuid4().hex[:12]}"} for name in self.tool_names
+        ]
+        return AIMessage(content="", tool_calls=tool_calls, usage_metadata=usage)
+
+
+async def run(graph: AgentGraph, queries: int, client_timeout: float) -> dict:
+    answered, llm_calls, tool_calls, tokens, latencies = 0, [], [], [], []
+    for _ in range(queries):
+        session_id = str(uuid.uuid4())
+        start = time.perf_counter()
+        try:
+            messages = {"messages": [HumanMessage(content="Plan a trip to Goa")]}
+            await asyncio.wait_for(graph.ainvoke_with_config(messages, session_id), client_timeout)
+            answered += 1
+        except asyncio.TimeoutError:
+            pass
+        latencies.append(time.perf_counter() - start)
+        # Whatever the run got through before it answered or was abandoned
+        ai = [message for message in await graph.aget_session_history(session_id) if isinstance(message, AIMessage)]
+        llm_calls.append(len(ai))
+        tool_calls.append(sum(len(message.tool_calls) for message in ai))
+        tokens.append(sum((message.usage_metadata or {}).get("total_tokens", 0) for message in ai))
+    return {"answered": answered, "llm_calls": np.mean(llm_calls), "tool_calls": np.mean(tool_calls),
+            "tokens": np.mean(tokens), "p50": np.percentile(latencies, 50) * 1000}
+
+
+async def check_step_limits():
+    for max_steps, expected_llm_calls in ((1, 2), (2, 2), (3, 3)):
+        budget = RunBudget(max_steps=max_steps, max_tool_calls=0, max_tokens=0, deadline_seconds=0)
+        graph = AgentGraph(llm=RunawayChatModel(latency=0), tools=make_stub_tools(0), checkpointer=MemorySaver(),
+                           budget=budget)
+        r = await run(graph, 1, client_timeout=10)
+        assert r["answered"] == 1, f"max_steps={max_steps}: no answer"
+        assert r["llm_calls"] == expected_llm_calls, f"max_steps={max_steps}: {r['llm_calls']} LLM calls"
+    print("step limits 1, 2, 3: ok")
+
+
+async def main(args):
+    await check_step_limits()
+    print(f"{args.queries} queries; LLM {args.llm_latency * 1000:.0f} ms, tools {args.tool_latency * 1000:.0f} ms per call; "
+          f"client timeout {args.client_timeout}s")
+    print(f"{'budget':>6} | {'answered':>8} | {'LLM calls':>9} | {'tool calls':>10} | {'tokens':>7} | {'p50 ms':>8}")
+    budgets = {
+        # Limits of 0 disable the budget
+        "off": RunBudget(max_steps=0, max_tool_calls=0, max_tokens=0, deadline_seconds=0),
+        "on": RunBudget(max_steps=args.max_steps, max_tool_calls=args.max_tool_calls,
+                        max_tokens=args.max_tokens, deadline_seconds=args.deadline),
+    }
+    for name, budget in budgets.items():
+        graph = AgentGraph(llm=RunawayChatModel(latency=args.llm_latency), tools=make_stub_tools(args.tool_latency),
+                           checkpointer=MemorySaver(), budget=budget)
+        r = await run(graph, args.queries, args.client_timeout)
+        print(f"{name:>6} | {r['answered']:>4}/{args.queries:<3} | {r['llm_calls']:>9.1f} | {r['tool_calls']:>10.1f} | "
+              f"{r['tokens']:>7.0f} | {r['p50']:>8.0f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--queries", type=int, default=20)
+    parser.add_argument("--llm-latency", type=float, default=0.05)
+    parser.add_argument("--tool-latency", type=float, default=0.02)
+    parser.add_argument("--max-steps", type=int, default=6)
+    parser.add_argument("--max-tool-calls", type=int, default=15)
+    parser.add_argument("--max-tokens", type=int, default=60000)
+    parser.add_argument("--deadline", type=float, default=120.0)
+    parser.add_argument("--client-timeout", type=float, default=10.0, help="seconds before a client gives up on a query")
+    asyncio.run(main(parser.parse_args()))
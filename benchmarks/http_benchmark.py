@@ -0,0 +1,80 @@
+"""Per-call latency of a bare requests.get versus the shared pooled HTTP session.
+
+Runs against a local keep-alive HTTP stub server, so it isolates connection
+setup cost (plain TCP here; TLS handshakes to real APIs make the gap larger).
+
+    python -m benchmarks.http_benchmark --calls 500
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+from utils.http_client import HTTPSession
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+    disable_nagle_algorithm = True  # avoid delayed-ACK stalls between header and body writes
+
+    def do_GET(self):
+        body = json.dumps({"main": {"temp": 28.5}, "weather": [{"description": "clear sky"}]}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def timed(fn, calls: int):
+    latencies = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        fn()
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+async def atimed(session: HTTPSession, url: str, calls: int):
+    latencies = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        await session.aget(url)
+        latencies.append((time.perf_counter() - start) * 1000)
+    await session.aclose()
+    return latencies
+
+
+def report(name: str, latencies):
+    latencies = sorted(latencies)
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+    print(f"{name:<28} mean {statistics.mean(latencies):6.3f} ms   p50 {statistics.median(latencies):6.3f} ms   p95 {p95:6.3f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=500)
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/data/2.5/weather"
+
+    session = HTTPSession()
+    report("requests.get (no session)", timed(lambda: requests.get(url, params={"q": "Goa"}), args.calls))
+    report("HTTPSession.get (pooled)", timed(lambda: session.get(url, params={"q": "Goa"}), args.calls))
+    report("HTTPSession.aget (pooled)", asyncio.run(atimed(session, url, args.calls)))
+    session.close()
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
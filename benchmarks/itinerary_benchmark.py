@@ -0,0 +1,60 @@
+"""Itinerary engine benchmark: planning time for 10, 100 and 1000 points of interest.
+
+POIs are scattered around a city centre (a few dense neighbourhoods plus
+outliers). Reports time to plan, number of days and total travel distance,
+with the days chosen automatically and with a fixed 3-day trip. Automatic
+plans must schedule every POI within the daily budget in at most 1.2x the
+lower bound on days, the POIs over the visits that fit in a day (one extra
+day allowed for small trips).
+
+    python -m benchmarks.itinerary_benchmark
+"""
+import argparse
+import math
+import time
+
+import numpy as np
+
+from utils.itinerary_engine import ItineraryEngine
+
+
+def make_pois(count: int, seed: int = 7):
+    rng = np.random.default_rng(seed)
+    centre = np.array([15.4989, 73.8278])  # Panaji, Goa
+    hubs = centre + rng.normal(scale=0.08, size=(6, 2))
+    coords = hubs[rng.integers(len(hubs), size=count)] + rng.normal(scale=0.01, size=(count, 2))
+    outliers = rng.random(count) < 0.1
+    coords[outliers] = centre + rng.uniform(-0.25, 0.25, size=(outliers.sum(), 2))
+    return [f"POI {index}" for index in range(count)], coords.tolist()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    engine = ItineraryEngine()
+    print(f"{'POIs':>6} {'mode':>8} {'ms (best)':>10} {'days':>5} {'min days':>9} {'travel km':>10} {'unscheduled':>12}")
+    for size in args.sizes:
+        names, coords = make_pois(size)
+        lower_bound = math.ceil(size / (engine.day_minutes // engine.visit_minutes))
+        for mode, days in (("auto", None), ("3 days", 3)):
+            timings = []
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                plan = engine.plan(names, coords, days=days)
+                timings.append((time.perf_counter() - start) * 1000)
+            travel = sum(day["travel_km"] for day in plan["days"])
+            print(f"{size:>6} {mode:>8} {min(timings):>10.2f} {len(plan['days']):>5} {lower_bound:>9} {travel:>10.1f} "
+                  f"{len(plan['unscheduled']):>12}")
+            if days is None:
+                scheduled = sorted(stop["name"] for day in plan["days"] for stop in day["stops"])
+                assert scheduled == sorted(names), "auto plan must schedule every POI exactly once"
+                assert all(day["total_minutes"] <= engine.day_minutes for day in plan["days"])
+                assert len(plan["days"]) <= max(1.2 * lower_bound, lower_bound + 1), (
+                    f"{len(plan['days'])} days for {size} POIs, lower bound {lower_bound}")
+
+
+if __name__ == "__main__":
+    main()
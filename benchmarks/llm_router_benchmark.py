@@ -0,0 +1,156 @@
+"""LLM router benchmark against simulated providers (no API keys, time-scaled).
+
+The primary provider is fast but heavy-tailed (occasional stalls) and rate limited
+to --rate-limit requests per window, answering 429 beyond it; the secondary is
+slower but steady. Compares the primary alone (SDK-style retry after Retry-After),
+the router with failover, and the router with hedging.
+
+    python -m benchmarks.llm_router_benchmark --requests 400 --concurrency 16
+"""
+import argparse
+import asyncio
+import random
+import time
+from collections import deque
+from typing import Any
+
+import numpy as np
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+from utils.llm_router import LLMRouter, RateLimitBudget
+
+
+class RateLimitError(Exception):
+    def __init__(self, retry_after: float):
+        super().__init__("429 Too Many Requests")
+        self.status_code = 429
+        self.retry_after = retry_after
+
+
+class SimulatedProvider(BaseChatModel):
+    """Lognormal latency with occasional stalls and a sliding-window request limit.
+
+    Rate-limit state is reported to `budget` the way the real clients' response hooks do.
+    """
+
+    label: str
+    median_ms: float
+    sigma: float = 0.3
+    stall_probability: float = 0.0
+    stall_ms: float = 0.0
+    rate_limit: int = 0
+    window_s: float = 1.0
+    budget: Any = None
+    seed: int = 0
+    rng: Any = None
+    sent: Any = None
+
+    def model_post_init(self, _):
+        self.rng = random.Random(self.seed)
+        self.sent = deque()
+
+    @property
+    def _llm_type(self) -> str:
+        return "simulated"
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        raise NotImplementedError("async only")
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        now = time.monotonic()
+        while self.sent and now - self.sent[0] > self.window_s:
+            self.sent.popleft()
+        if self.rate_limit and len(self.sent) >= self.rate_limit:
+            retry_after = self.window_s - (now - self.sent[0])
+            if self.budget is not None:
+                self.budget.update({"x-ratelimit-remaining-requests": "0", "x-ratelimit-reset-requests": f"{retry_after:.3f}s",
+                                    "retry-after": f"{retry_after:.3f}"}, 429)
+            await asyncio.sleep(0.005)  # the 429 round trip
+            raise RateLimitError(retry_after)
+        self.sent.append(now)
+        if self.budget is not None and self.rate_limit:
+            reset = self.window_s - (now - self.sent[0])
+            self.budget.update({"x-ratelimit-remaining-requests": str(self.rate_limit - len(self.sent)),
+                                "x-ratelimit-reset-requests": f"{reset:.3f}s"}, 200)
+        delay = self.median_ms * self.rng.lognormvariate(0, self.sigma)
+        if self.rng.random() < self.stall_probability:
+            delay += self.stall_ms
+        await asyncio.sleep(delay / 1000)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=self.label))])
+
+
+async def primary_with_retries(model: SimulatedProvider, messages, retries: int = 2):
+    """What a single provider gives today: the SDK waits for Retry-After and tries again"""
+    for attempt in range(retries + 1):
+        try:
+            return await model.ainvoke(messages)
+        except RateLimitError as e:
+            if attempt == retries:
+                raise
+            await asyncio.sleep(e.retry_after)
+
+
+async def drive(call, requests: int, concurrency: int) -> dict:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, failures = [], 0
+    messages = [SystemMessage(content="You are a travel planner."), HumanMessage(content="Plan 3 days in Goa")]
+
+    async def one():
+        nonlocal failures
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                await call(messages)
+                latencies.append((time.perf_counter() - start) * 1000)
+            except Exception:
+                failures += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(requests)))
+    elapsed = time.perf_counter() - start
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) if latencies else (float("nan"),) * 3
+    return {"p50": p50, "p95": p95, "p99": p99, "ok_per_s": len(latencies) / elapsed, "failed": failures}
+
+
+def providers(args, seed: int):
+    primary_budget, secondary_budget = RateLimitBudget(), RateLimitBudget()
+    primary = SimulatedProvider(label="primary", median_ms=args.primary_ms, stall_probability=args.stall_probability,
+                                stall_ms=args.stall_ms, rate_limit=args.rate_limit, budget=primary_budget, seed=seed)
+    secondary = SimulatedProvider(label="secondary", median_ms=args.secondary_ms, budget=secondary_budget, seed=seed + 1)
+    return primary, secondary, {"primary": primary_budget, "secondary": secondary_budget}
+
+
+async def main(args):
+    print(f"primary {args.primary_ms:.0f} ms median, {args.stall_probability:.0%} stalls of {args.stall_ms:.0f} ms, "
+          f"{args.rate_limit} req/s limit; secondary {args.secondary_ms:.0f} ms; {args.requests} requests at concurrency {args.concurrency}")
+    print(f"{'setup':<18} | {'p50 ms':>8} | {'p95 ms':>8} | {'p99 ms':>8} | {'ok/s':>7} | {'failed':>6}")
+    for name in ("primary only", "router", "router + hedging"):
+        primary, secondary, budgets = providers(args, args.seed)
+        if name == "primary only":
+            async def call(messages):
+                return await primary_with_retries(primary, messages)
+        else:
+            router = LLMRouter({"primary": primary, "secondary": secondary}, {"default": ["primary", "secondary"]},
+                               budgets=budgets, hedge=name.endswith("hedging"), hedge_min_ms=args.primary_ms,
+                               hedge_max_ms=args.stall_ms, hedge_default_ms=args.primary_ms * 3)
+            call = router.ainvoke
+        result = await drive(call, args.requests, args.concurrency)
+        print(f"{name:<18} | {result['p50']:>8.1f} | {result['p95']:>8.1f} | {result['p99']:>8.1f} | {result['ok_per_s']:>7.1f} | {result['failed']:>6}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--primary-ms", type=float, default=40.0)
+    parser.add_argument("--secondary-ms", type=float, default=90.0)
+    parser.add_argument("--stall-probability", type=float, default=0.03)
+    parser.add_argument("--stall-ms", type=float, default=1500.0)
+    parser.add_argument("--rate-limit", type=int, default=150, help="primary requests per 1 s window")
+    parser.add_argument("--seed", type=int, default=7)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,54 @@
+"""Load benchmark for the /query execution path against stubbed LLM and tool backends.
+
+Compares the old behaviour (sync graph.invoke called inside the event loop) with
+the async path (AgentGraph.ainvoke_with_config) at increasing session concurrency.
+
+    python -m benchmarks.load_benchmark --concurrency 1 4 16 64
+"""
+import argparse
+import asyncio
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from langchain_core.messages import HumanMessage
+
+from Agent.agent import AgentGraph
+from benchmarks.stubs import StubChatModel, make_stub_tools
+
+
+async def run_sessions(graph: AgentGraph, sessions: int, blocking: bool) -> float:
+    """Run `sessions` concurrent first-turn queries and return the elapsed wall-clock time"""
+
+    async def one_session():
+        messages = {"messages": [HumanMessage(content="Plan a trip to Goa for 5 days")]}
+        session_id = str(uuid.uuid4())
+        if blocking:
+            return graph.invoke_with_config(messages, session_id)
+        return await graph.ainvoke_with_config(messages, session_id)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one_session() for _ in range(sessions)))
+    return time.perf_counter() - start
+
+
+async def main(args):
+    loop = asyncio.get_running_loop()
+    loop.set_default_executor(ThreadPoolExecutor(max_workers=args.threads))
+    graph = AgentGraph(llm=StubChatModel(latency=args.llm_latency), tools=make_stub_tools(args.tool_latency))
+
+    print(f"LLM latency {args.llm_latency * 1000:.0f} ms, tool latency {args.tool_latency * 1000:.0f} ms, {args.threads} tool threads")
+    print(f"{'sessions':>8} | {'blocking req/s':>14} | {'async req/s':>11} | {'speedup':>7}")
+    for sessions in args.concurrency:
+        blocking = await run_sessions(graph, sessions, blocking=True)
+        concurrent = await run_sessions(graph, sessions, blocking=False)
+        print(f"{sessions:>8} | {sessions / blocking:>14.2f} | {sessions / concurrent:>11.2f} | {blocking / concurrent:>6.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16, 64])
+    parser.add_argument("--llm-latency", type=float, default=0.2, help="seconds per stubbed LLM call")
+    parser.add_argument("--tool-latency", type=float, default=0.1, help="seconds per stubbed tool call")
+    parser.add_argument("--threads", type=int, default=64, help="default executor size for blocking tools")
+    asyncio.run(main(parser.parse_args()))
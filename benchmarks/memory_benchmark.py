@@ -0,0 +1,82 @@
+"""Memory benchmark: RSS growth of the checkpointer over many synthetic sessions.
+
+Each backend runs in its own subprocess so the RSS numbers are independent.
+Every session is one stubbed first-turn plan (LLM + 5 tool calls); the SQLite
+saver is compacted every `--compact-every` sessions.
+
+    python -m benchmarks.memory_benchmark --sessions 10000
+"""
+import argparse
+import asyncio
+import os
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import uuid
+
+from langchain_core.messages import HumanMessage
+
+
+def rss_mb() -> float:
+    """Current resident set size in MB (Linux /proc, falling back to peak RSS)"""
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+async def run_backend(args):
+    from langgraph.checkpoint.memory import MemorySaver
+
+    from Agent.agent import AgentGraph
+    from benchmarks.stubs import StubChatModel, make_stub_tools
+    from utils.checkpointer import BoundedSqliteSaver
+
+    if args.backend == "sqlite":
+        path = os.path.join(tempfile.mkdtemp(), "checkpoints.sqlite")
+        saver = BoundedSqliteSaver(sqlite3.connect(path, check_same_thread=False), session_ttl_seconds=args.session_ttl)
+    else:
+        saver = MemorySaver()
+    graph = AgentGraph(llm=StubChatModel(), tools=make_stub_tools(), checkpointer=saver)
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def one_session():
+        async with semaphore:
+            await graph.ainvoke_with_config({"messages": [HumanMessage(content="Plan a trip to Goa")]}, str(uuid.uuid4()))
+
+    baseline = rss_mb()
+    print(f"[{args.backend}] baseline RSS {baseline:.1f} MB")
+    done = 0
+    while done < args.sessions:
+        batch = min(args.compact_every, args.sessions - done)
+        await asyncio.gather(*(one_session() for _ in range(batch)))
+        done += batch
+        if hasattr(saver, "compact"):
+            saver.compact()
+        print(f"[{args.backend}] {done:>6} sessions  RSS {rss_mb():8.1f} MB  (+{rss_mb() - baseline:.1f} MB)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=10000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--compact-every", type=int, default=1000)
+    parser.add_argument("--session-ttl", type=float, default=5.0, help="idle seconds before a session is expired")
+    parser.add_argument("--backend", choices=["memory", "sqlite"], help="run a single backend in-process")
+    args = parser.parse_args()
+
+    if args.backend:
+        asyncio.run(run_backend(args))
+        return
+    for backend in ("memory", "sqlite"):
+        subprocess.run([sys.executable, "-m", "benchmarks.memory_benchmark", *sys.argv[1:], "--backend", backend], check=True)
+
+
+if __name__ == "__main__":
+    main()
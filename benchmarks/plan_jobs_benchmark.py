@@ -0,0 +1,100 @@
+"""Plan jobs benchmark: long plans behind a client/proxy timeout, synchronous vs background jobs.
+
+Every plan takes longer than the client is willing to hold a connection open.
+Synchronously (like POST /query) each attempt is abandoned at the timeout and
+retried, so the agent's work is paid for again and no answer arrives. With plan
+jobs (like POST /plans + GET /plans/{id}) the client submits with an
+Idempotency-Key, retries the submission freely and polls; each plan runs once.
+Counts delivered answers and LLM calls against a stub agent.
+
+    python -m benchmarks.plan_jobs_benchmark --plans 20 --client-timeout 1.0 --retries 3
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from langchain_core.messages import HumanMessage
+from langgraph.checkpoint.memory import MemorySaver
+
+from Agent.agent import AgentGraph
+from benchmarks.stubs import StubChatModel, make_stub_tools
+from utils.plan_jobs import PlanJobRunner, PlanJobStore
+
+
+class CountingChatModel(StubChatModel):
+    calls: int = 0
+
+    def _next_message(self, messages):
+        self.calls += 1
+        return super()._next_message(messages)
+
+
+async def synchronous(graph: AgentGraph, args) -> int:
+    """Each client retries a blocking query; returns the number of answers delivered"""
+    async def client(index: int) -> bool:
+        for _ in range(args.retries + 1):
+            try:
+                messages = {"messages": [HumanMessage(content=f"Plan trip {index}")]}
+                await asyncio.wait_for(graph.ainvoke_with_config(messages, str(uuid.uuid4())), args.client_timeout)
+                return True
+            except asyncio.TimeoutError:
+                continue
+        return False
+
+    return sum(await asyncio.gather(*(client(index) for index in range(args.plans))))
+
+
+async def jobs(graph: AgentGraph, args) -> int:
+    """Each client submits a job (re-submitting with its Idempotency-Key) and polls until it is done"""
+    with tempfile.TemporaryDirectory() as data_dir:
+        runner = PlanJobRunner(PlanJobStore(os.path.join(data_dir, "plan_jobs.sqlite")), workers=args.workers, poll_seconds=0.1)
+        runner.start(graph)
+
+        async def client(index: int) -> bool:
+            key = str(uuid.uuid4())
+            deadline = time.monotonic() + args.client_timeout * (args.retries + 1) * 10
+            for _ in range(args.retries + 1):
+                # Retried submissions return the job the first one created
+                job, _ = await runner.submit(f"Plan trip {index}", None, key)
+            while time.monotonic() < deadline:
+                job = await runner.get(job["job_id"])
+                if job["status"] in ("succeeded", "failed"):
+                    return job["status"] == "succeeded"
+                await asyncio.sleep(args.poll)
+            return False
+
+        try:
+            return sum(await asyncio.gather(*(client(index) for index in range(args.plans))))
+        finally:
+            await runner.stop()
+
+
+async def main(args):
+    asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=args.threads))
+    plan_seconds = 2 * args.llm_latency + args.tool_latency
+    print(f"{args.plans} plans of ~{plan_seconds:.1f}s; client timeout {args.client_timeout}s, {args.retries} retries")
+    print(f"{'mode':>11} | {'answered':>8} | {'LLM calls':>9} | {'per answer':>10} | {'wall s':>6}")
+    for name, run in (("synchronous", synchronous), ("plan jobs", jobs)):
+        llm = CountingChatModel(latency=args.llm_latency)
+        graph = AgentGraph(llm=llm, tools=make_stub_tools(args.tool_latency), checkpointer=MemorySaver())
+        start = time.perf_counter()
+        answered = await run(graph, args)
+        per_answer = f"{llm.calls / answered:.1f}" if answered else "-"
+        print(f"{name:>11} | {answered:>4}/{args.plans:<3} | {llm.calls:>9} | {per_answer:>10} | {time.perf_counter() - start:>6.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--plans", type=int, default=20)
+    parser.add_argument("--llm-latency", type=float, default=0.6, help="seconds per stub LLM call")
+    parser.add_argument("--tool-latency", type=float, default=0.3, help="seconds per stub tool call")
+    parser.add_argument("--client-timeout", type=float, default=1.0, help="seconds a client or proxy keeps a request open")
+    parser.add_argument("--retries", type=int, default=3)
+    parser.add_argument("--workers", type=int, default=8, help="plan job workers")
+    parser.add_argument("--threads", type=int, default=64, help="default executor size for blocking tools")
+    parser.add_argument("--poll", type=float, default=0.5, help="seconds between status polls")
+    asyncio.run(main(parser.parse_args()))
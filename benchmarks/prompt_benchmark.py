@@ -0,0 +1,91 @@
+"""Prompt token benchmark: every tool bound on every call vs. per-step tool subsets.
+
+Replays the fixtures in benchmarks/fixtures through AgentGraph (no API keys, no
+latency) and, for each agent LLM call, estimates the prompt tokens sent with the
+real tool schemas: the cacheable prefix (system prompt + tool schemas) and the
+conversation messages after it. Nothing is sent to a provider; the tool backends
+are only constructed (placeholder keys) to read their schemas.
+
+    python -m benchmarks.prompt_benchmark
+"""
+import argparse
+import asyncio
+import os
+import uuid
+
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.messages.utils import count_tokens_approximately
+from langgraph.checkpoint.memory import MemorySaver
+
+from Agent.agent import AgentGraph
+from Agent.tool_selector import ToolSelector
+from benchmarks.replay import FIXTURE_DIR, LatencyModel, ReplayChatModel, load_fixtures, make_replay_tools
+from Prompt.system_prompt import SYSTEM_PROMPT
+from utils.llm_router import classify_step
+
+
+def real_tools() -> list:
+    """The production tools, for their schemas only (the Google client just checks the key's shape)"""
+    os.environ.setdefault("GPLACES_API_KEY", "AIza" + "0" * 35)
+    os.environ.setdefault("OPENWEATHERMAP_API_KEY", "placeholder")
+    os.environ.setdefault("TAVILY_API_KEY", "placeholder")
+    from Tools.Calculator_And_currency_tool import CurrencyCalculator
+    from Tools.itenary_planner_tool import ItineraryPlannerTool
+    from Tools.Place_search_tool import PlaceSearchTool
+    from Tools.weather_tool import WeatherTool
+
+    place_search = PlaceSearchTool()
+    return [
+        *CurrencyCalculator().currency_calculator_tools_list,
+        *place_search.place_search_tool_list,
+        *WeatherTool().weather_tool_list,
+        *ItineraryPlannerTool(geocoder=place_search.google_places_search.geocode).itinerary_tool_list,
+    ]
+
+
+async def conversations(fixtures) -> list:
+    """Final message list of each replayed first-turn conversation"""
+    graph = AgentGraph(
+        llm=ReplayChatModel.from_fixtures(fixtures, LatencyModel(scale=0.0)),
+        tools=make_replay_tools(fixtures, LatencyModel(scale=0.0)),
+        checkpointer=MemorySaver(),
+    )
+    results = []
+    for fixture in fixtures:
+        output = await graph.ainvoke_with_config({"messages": [HumanMessage(content=fixture["question"])]}, str(uuid.uuid4()))
+        results.append((fixture["question"], output["messages"]))
+    return results
+
+
+async def main(args):
+    fixtures = load_fixtures(args.fixtures)
+    tools = real_tools()
+    selector = ToolSelector(ReplayChatModel.from_fixtures(fixtures), tools, SYSTEM_PROMPT, enabled=True)
+    system_tokens = count_tokens_approximately([SYSTEM_PROMPT])
+    every_tool_prefix = count_tokens_approximately([SYSTEM_PROMPT], tools=tools)
+    print(f"system prompt {system_tokens} tokens; all {len(tools)} tools: prefix {every_tool_prefix} tokens")
+    for step, subset in selector.subsets.items():
+        print(f"  {step}: {len(subset)} tools, prefix {selector.prefix_tokens[step]} tokens")
+
+    print(f"\n{'question':<40} | {'step':<14} | {'messages':>8} | {'all tools':>9} | {'subset':>8} | {'cut':>6}")
+    totals = {"all": 0, "subset": 0}
+    for question, messages in await conversations(fixtures):
+        for index, message in enumerate(messages):
+            if not isinstance(message, AIMessage):
+                continue
+            history = messages[:index]
+            step = classify_step(history)
+            message_tokens = count_tokens_approximately(history)
+            every_tool = every_tool_prefix + message_tokens
+            subset = selector.prefix_tokens[step] + message_tokens
+            totals["all"] += every_tool
+            totals["subset"] += subset
+            print(f"{question[:40]:<40} | {step:<14} | {message_tokens:>8} | {every_tool:>9} | {subset:>8} | {1 - subset / every_tool:>6.1%}")
+    print(f"\nprompt tokens over all calls: {totals['all']} with every tool, {totals['subset']} with subsets "
+          f"({1 - totals['subset'] / totals['all']:.1%} fewer)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fixtures", default=os.path.join(FIXTURE_DIR, "*.json"), help="glob of fixture files")
+    asyncio.run(main(parser.parse_args()))
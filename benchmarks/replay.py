@@ -0,0 +1,196 @@
+"""Record agent runs to fixture files and replay them offline.
+
+A fixture is one first-turn conversation: the question, every agent LLM response
+(in order) and every tool output, each with the latency observed when it was
+recorded. `ReplayChatModel` and `make_replay_tools` serve those recordings back
+through AgentGraph without any API key, optionally with injected latency.
+"""
+import asyncio
+import glob
+import json
+import os
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, message_to_dict, messages_from_dict
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.tools import StructuredTool
+
+from Agent.context_manager import SUMMARY_TAG
+
+FIXTURE_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+
+
+def _args_key(args: dict) -> str:
+    return json.dumps(args, sort_keys=True, default=str)
+
+
+class TraceRecorder(BaseCallbackHandler):
+    """Callback that captures agent LLM responses and tool outputs of one graph run"""
+
+    def __init__(self):
+        self.llm: List[dict] = []
+        self.tools: List[dict] = []
+        self._started: Dict[UUID, tuple] = {}
+        self._lock = threading.Lock()
+
+    def on_chat_model_start(self, serialized, messages, *, run_id: UUID, tags=None, **kwargs: Any):
+        if SUMMARY_TAG not in (tags or []):
+            self._started[run_id] = ("llm", time.perf_counter())
+
+    def on_llm_end(self, response, *, run_id: UUID, **kwargs: Any):
+        started = self._started.pop(run_id, None)
+        if started is None:
+            return
+        message = response.generations[0][0].message
+        with self._lock:
+            self.llm.append({"message": message_to_dict(message), "latency_ms": round((time.perf_counter() - started[1]) * 1000, 1)})
+
+    def on_tool_start(self, serialized, input_str, *, run_id: UUID, inputs=None, **kwargs: Any):
+        name = kwargs.get("name") or (serialized or {}).get("name")
+        self._started[run_id] = (name, inputs if isinstance(inputs, dict) else {}, time.perf_counter())
+
+    def on_tool_end(self, output, *, run_id: UUID, **kwargs: Any):
+        started = self._started.pop(run_id, None)
+        if started is None:
+            return
+        name, args, start = started
+        content = getattr(output, "content", output)
+        with self._lock:
+            self.tools.append({
+                "name": name,
+                "args": args,
+                "output": content if isinstance(content, str) else json.dumps(content, default=str),
+                "latency_ms": round((time.perf_counter() - start) * 1000, 1),
+            })
+
+    def fixture(self, question: str) -> dict:
+        return {
+            "question": question,
+            "recorded_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "llm": self.llm,
+            "tools": self.tools,
+        }
+
+
+def save_fixture(fixture: dict, path: str):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as fixture_file:
+        json.dump(fixture, fixture_file, indent=2, ensure_ascii=False)
+
+
+def load_fixtures(pattern: str = os.path.join(FIXTURE_DIR, "*.json")) -> List[dict]:
+    fixtures = []
+    for path in sorted(glob.glob(pattern)):
+        with open(path, encoding="utf-8") as fixture_file:
+            fixtures.append(json.load(fixture_file))
+    if not fixtures:
+        raise FileNotFoundError(f"No replay fixtures match {pattern}")
+    return fixtures
+
+
+class LatencyModel:
+    """Injected latency: the recorded value × `scale`, or a fixed value, plus optional jitter.
+
+    Jitter is drawn from a generator seeded per (key, seed), so a replay is repeatable
+    regardless of how concurrent sessions interleave.
+    """
+
+    def __init__(self, fixed: Optional[float] = None, scale: float = 1.0, jitter: float = 0.0, seed: int = 0):
+        self.fixed = fixed
+        self.scale = scale
+        self.jitter = jitter
+        self.seed = seed
+
+    def seconds(self, recorded_ms: float, key: str) -> float:
+        base = self.fixed if self.fixed is not None else recorded_ms / 1000 * self.scale
+        if self.jitter:
+            base *= random.Random(f"{self.seed}:{key}").lognormvariate(0, self.jitter)
+        return base
+
+
+class ReplayChatModel(BaseChatModel):
+    """Chat model that replays recorded responses.
+
+    The fixture is chosen by the first-turn question and the step by the number of AI
+    messages since it, so one instance serves any number of concurrent sessions.
+    Summarization requests get a short canned summary.
+    """
+
+    fixtures: Dict[str, dict]
+    latency: Any = None
+
+    @classmethod
+    def from_fixtures(cls, fixtures: List[dict], latency: Optional[LatencyModel] = None) -> "ReplayChatModel":
+        return cls(fixtures={fixture["question"]: fixture for fixture in fixtures}, latency=latency or LatencyModel())
+
+    @property
+    def _llm_type(self) -> str:
+        return "replay"
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+    def _step(self, messages: List[BaseMessage]):
+        """(recorded step, step index, fixture question) for this prompt"""
+        human = [index for index, message in enumerate(messages) if isinstance(message, HumanMessage)]
+        if not human or messages[human[-1]].content not in self.fixtures:
+            return None, 0, ""
+        question = messages[human[-1]].content
+        steps = self.fixtures[question]["llm"]
+        index = sum(isinstance(message, AIMessage) for message in messages[human[-1]:])
+        return steps[min(index, len(steps) - 1)], index, question
+
+    def _reply(self, messages: List[BaseMessage]):
+        step, index, question = self._step(messages)
+        if step is None:
+            return AIMessage(content="Summary: earlier planning for this trip."), 0.0
+        message = messages_from_dict([step["message"]])[0]
+        return message, self.latency.seconds(step["latency_ms"], f"llm:{question}:{index}")
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs) -> ChatResult:
+        message, delay = self._reply(messages)
+        if delay:
+            time.sleep(delay)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs) -> ChatResult:
+        message, delay = self._reply(messages)
+        if delay:
+            await asyncio.sleep(delay)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+
+def make_replay_tools(fixtures: List[dict], latency: Optional[LatencyModel] = None) -> List[StructuredTool]:
+    """Blocking tools (like the real ones) returning the recorded output for the same name and args.
+
+    Calls with args never recorded get the first recorded output of that tool.
+    """
+    latency = latency or LatencyModel()
+    recorded: Dict[str, Dict[str, dict]] = {}
+    for fixture in fixtures:
+        for call in fixture["tools"]:
+            recorded.setdefault(call["name"], {}).setdefault(_args_key(call["args"]), call)
+
+    def make(name: str, calls: Dict[str, dict]) -> StructuredTool:
+        def run(**kwargs) -> str:
+            key = _args_key(kwargs)
+            call = calls.get(key) or next(iter(calls.values()))
+            delay = latency.seconds(call["latency_ms"], f"tool:{name}:{key}")
+            if delay:
+                time.sleep(delay)
+            return call["output"]
+
+        properties = {arg: {} for arg in next(iter(calls.values()))["args"]}
+        return StructuredTool.from_function(
+            func=run, name=name, description=f"Replay of {name}",
+            args_schema={"type": "object", "properties": properties},
+        )
+
+    return [make(name, calls) for name, calls in recorded.items()]
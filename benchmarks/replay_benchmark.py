@@ -0,0 +1,131 @@
+"""Offline replay benchmark: recorded LLM responses and tool outputs replayed through AgentGraph.
+
+`run` needs no API keys. Sessions cycle through the fixtures in benchmarks/fixtures;
+the fake chat model and the tools sleep for the recorded latencies (× --latency-scale,
+or a fixed --llm-latency / --tool-latency, with optional --jitter). Reports p50/p95/p99
+query latency and throughput at each concurrency level, then the memory retained per
+session by the in-memory checkpointer.
+
+    python -m benchmarks.replay_benchmark run --concurrency 1 8 32 --sessions 64
+    python -m benchmarks.replay_benchmark run --latency-scale 0 --sessions 500   # pure overhead
+
+`record` runs real questions against the configured LLM and tool backends (live keys
+required) and writes one fixture per question:
+
+    python -m benchmarks.replay_benchmark record "Plan 3 days in Lisbon for 2" --name lisbon
+"""
+import argparse
+import asyncio
+import gc
+import os
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from langchain_core.messages import HumanMessage
+from langgraph.checkpoint.memory import MemorySaver
+
+from Agent.agent import AgentGraph
+from benchmarks.memory_benchmark import rss_mb
+from benchmarks.replay import FIXTURE_DIR, LatencyModel, ReplayChatModel, TraceRecorder, load_fixtures, make_replay_tools, save_fixture
+
+
+def replay_graph(fixtures, args) -> AgentGraph:
+    llm_latency = LatencyModel(args.llm_latency, args.latency_scale, args.jitter, args.seed)
+    tool_latency = LatencyModel(args.tool_latency, args.latency_scale, args.jitter, args.seed)
+    return AgentGraph(
+        llm=ReplayChatModel.from_fixtures(fixtures, llm_latency),
+        tools=make_replay_tools(fixtures, tool_latency),
+        checkpointer=MemorySaver(),
+    )
+
+
+async def run_level(graph: AgentGraph, fixtures, sessions: int, concurrency: int) -> dict:
+    """`sessions` first-turn queries with at most `concurrency` in flight; per-query latencies and throughput"""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one_session(index: int):
+        question = fixtures[index % len(fixtures)]["question"]
+        async with semaphore:
+            start = time.perf_counter()
+            output = await graph.ainvoke_with_config({"messages": [HumanMessage(content=question)]}, str(uuid.uuid4()))
+            latencies.append(time.perf_counter() - start)
+        if output["messages"][-1].tool_calls:
+            raise RuntimeError(f"replay of {question!r} did not reach a final answer")
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one_session(index) for index in range(sessions)))
+    elapsed = time.perf_counter() - start
+    p50, p95, p99 = np.percentile(np.array(latencies) * 1000, [50, 95, 99])
+    return {"p50": p50, "p95": p95, "p99": p99, "throughput": sessions / elapsed}
+
+
+async def memory_per_session(fixtures, args, sessions: int) -> float:
+    """KB of RSS retained per completed session (checkpoints held by the in-memory saver)"""
+    graph = replay_graph(fixtures, argparse.Namespace(**{**vars(args), "latency_scale": 0.0, "llm_latency": None, "tool_latency": None}))
+    await run_level(graph, fixtures, len(fixtures), 1)  # warm up
+    gc.collect()
+    before = rss_mb()
+    await run_level(graph, fixtures, sessions, 16)
+    gc.collect()
+    return (rss_mb() - before) * 1024 / sessions
+
+
+async def run(args):
+    asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=args.threads))
+    fixtures = load_fixtures(args.fixtures)
+    graph = replay_graph(fixtures, args)
+    latency = "recorded latency" if args.llm_latency is None and args.tool_latency is None else "fixed latency"
+    print(f"{len(fixtures)} fixtures, {latency} × {args.latency_scale}, jitter {args.jitter}, {args.threads} tool threads")
+    await run_level(graph, fixtures, len(fixtures), 1)  # warm up
+
+    print(f"{'concurrency':>11} | {'sessions':>8} | {'p50 ms':>9} | {'p95 ms':>9} | {'p99 ms':>9} | {'queries/s':>9}")
+    for concurrency in args.concurrency:
+        result = await run_level(graph, fixtures, args.sessions, concurrency)
+        print(f"{concurrency:>11} | {args.sessions:>8} | {result['p50']:>9.1f} | {result['p95']:>9.1f} | {result['p99']:>9.1f} | {result['throughput']:>9.2f}")
+
+    print(f"memory retained per session: {await memory_per_session(fixtures, args, args.memory_sessions):.1f} KB "
+          f"(over {args.memory_sessions} sessions)")
+
+
+def record(args):
+    """Run each question against the live backends and save what the LLM and tools returned"""
+    graph = AgentGraph(checkpointer=MemorySaver())
+    for position, question in enumerate(args.questions):
+        recorder = TraceRecorder()
+        config = {"configurable": {"thread_id": str(uuid.uuid4())}, "callbacks": [recorder]}
+        graph.graph.invoke(graph.run_input({"messages": [HumanMessage(content=question)]}), config=config)
+        name = args.name if args.name and len(args.questions) == 1 else f"{args.name or 'recording'}_{position + 1}"
+        path = os.path.join(args.output, f"{name}.json")
+        save_fixture(recorder.fixture(question), path)
+        print(f"{path}: {len(recorder.llm)} LLM responses, {len(recorder.tools)} tool outputs")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="replay fixtures and report latency, throughput and memory")
+    run_parser.add_argument("--fixtures", default=os.path.join(FIXTURE_DIR, "*.json"), help="glob of fixture files")
+    run_parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    run_parser.add_argument("--sessions", type=int, default=64, help="queries per concurrency level")
+    run_parser.add_argument("--latency-scale", type=float, default=1.0, help="multiplier on recorded latencies (0 = none)")
+    run_parser.add_argument("--llm-latency", type=float, default=None, help="fixed seconds per LLM call instead of recorded")
+    run_parser.add_argument("--tool-latency", type=float, default=None, help="fixed seconds per tool call instead of recorded")
+    run_parser.add_argument("--jitter", type=float, default=0.0, help="lognormal sigma applied to every latency")
+    run_parser.add_argument("--seed", type=int, default=0)
+    run_parser.add_argument("--threads", type=int, default=64, help="default executor size for blocking tools")
+    run_parser.add_argument("--memory-sessions", type=int, default=500, help="sessions for the memory-per-session measurement")
+
+    record_parser = commands.add_parser("record", help="record fixtures from the live LLM and tool backends")
+    record_parser.add_argument("questions", nargs="+")
+    record_parser.add_argument("--name", default="", help="fixture file name (numbered when recording several)")
+    record_parser.add_argument("--output", default=FIXTURE_DIR)
+
+    arguments = parser.parse_args()
+    if arguments.command == "record":
+        record(arguments)
+    else:
+        asyncio.run(run(arguments))
@@ -0,0 +1,68 @@
+import asyncio
+import time
+import uuid
+from typing import Any, List, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.tools import StructuredTool
+
+STUB_TOOL_NAMES = [
+    "search_attractions",
+    "search_restaurants",
+    "search_activities",
+    "search_transportation",
+    "get_weather_forecast",
+]
+
+
+class StubChatModel(BaseChatModel):
+    """Deterministic chat model: requests every stub tool on a new question, then answers.
+
+    `latency` is slept (or awaited) on every call to mimic a remote LLM round trip.
+    """
+
+    latency: float = 0.0
+    tool_names: List[str] = STUB_TOOL_NAMES
+    place: str = "Goa"
+
+    @property
+    def _llm_type(self) -> str:
+        return "stub"
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+    def _next_message(self, messages: List[BaseMessage]) -> AIMessage:
+        if isinstance(messages[-1], HumanMessage):
+            tool_calls = [
+                {"name": name, "args": {"place": self.place}, "id": f"call_{uuid.uuid4().hex[:12]}"}
+                for name in self.tool_names
+            ]
+            return AIMessage(content="", tool_calls=tool_calls)
+        return AIMessage(content=f"Here is your stub travel plan for {self.place}.")
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs) -> ChatResult:
+        if self.latency:
+            time.sleep(self.latency)
+        return ChatResult(generations=[ChatGeneration(message=self._next_message(messages))])
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs) -> ChatResult:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return ChatResult(generations=[ChatGeneration(message=self._next_message(messages))])
+
+
+def make_stub_tools(latency: float = 0.0, names: List[str] = STUB_TOOL_NAMES) -> List[StructuredTool]:
+    """Blocking tools (like the real requests/SDK based ones) that sleep for `latency` seconds"""
+
+    def make(name: str) -> StructuredTool:
+        def run(place: str) -> str:
+            if latency:
+                time.sleep(latency)
+            return f"{name} result for {place}"
+
+        return StructuredTool.from_function(func=run, name=name, description=f"Stub for {name}")
+
+    return [make(name) for name in names]
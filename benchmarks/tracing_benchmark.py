@@ -0,0 +1,72 @@
+"""Tracing overhead benchmark: /query execution path with tracing off vs on (JSONL exporter).
+
+Runs the stubbed graph sequentially, first without a tracer provider (the default,
+non-recording spans) and then with the JSONL exporter installed. The zero-latency
+run shows the absolute cost per query; the run with realistic stub latencies shows
+the relative overhead a real request would see.
+
+    python -m benchmarks.tracing_benchmark --queries 200
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+import uuid
+
+from langchain_core.messages import HumanMessage
+from langgraph.checkpoint.memory import MemorySaver
+
+from Agent.agent import AgentGraph
+from benchmarks.stubs import StubChatModel, make_stub_tools
+from utils.tracing import JSONLSpanExporter, setup_tracing, tracer
+
+
+async def per_query_seconds(graph: AgentGraph, queries: int) -> list:
+    durations = []
+    for _ in range(queries):
+        messages = {"messages": [HumanMessage(content="Plan a trip to Goa for 5 days")]}
+        start = time.perf_counter()
+        with tracer.start_as_current_span("agent.query"):
+            await graph.ainvoke_with_config(messages, str(uuid.uuid4()))
+        durations.append(time.perf_counter() - start)
+    return durations
+
+
+def make_graph(llm_latency: float, tool_latency: float) -> AgentGraph:
+    return AgentGraph(llm=StubChatModel(latency=llm_latency), tools=make_stub_tools(tool_latency), checkpointer=MemorySaver())
+
+
+async def main(args):
+    scenarios = {
+        "no latency": make_graph(0.0, 0.0),
+        f"llm {args.llm_latency * 1000:.0f} ms / tool {args.tool_latency * 1000:.0f} ms": make_graph(args.llm_latency, args.tool_latency),
+    }
+    queries = {"no latency": args.queries, **{name: args.latency_queries for name in list(scenarios)[1:]}}
+    for name, graph in scenarios.items():
+        await per_query_seconds(graph, 5)  # warm up imports, pools and checkpointer
+
+    baseline = {name: await per_query_seconds(graph, queries[name]) for name, graph in scenarios.items()}
+
+    path = os.path.join(tempfile.mkdtemp(), "traces.jsonl")
+    provider = setup_tracing(exporter=JSONLSpanExporter(path))
+    traced = {name: await per_query_seconds(graph, queries[name]) for name, graph in scenarios.items()}
+    provider.force_flush()
+    with open(path, encoding="utf-8") as traces:
+        spans = sum(1 for _ in traces)
+
+    print(f"{spans} spans exported to {path} ({spans / sum(queries.values()):.1f} per query)")
+    print(f"{'scenario':<26} | {'queries':>7} | {'off ms/query':>12} | {'on ms/query':>11} | {'overhead':>8}")
+    for name in scenarios:
+        off, on = statistics.median(baseline[name]) * 1000, statistics.median(traced[name]) * 1000
+        print(f"{name:<26} | {queries[name]:>7} | {off:>12.2f} | {on:>11.2f} | {(on - off) / off:>8.2%}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--queries", type=int, default=200, help="queries in the zero-latency scenario")
+    parser.add_argument("--latency-queries", type=int, default=20, help="queries in the stubbed-latency scenario")
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="seconds per stubbed LLM call")
+    parser.add_argument("--tool-latency", type=float, default=0.3, help="seconds per stubbed tool call")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,28 @@
+"""main:app serving the offline replay agent, for benchmarks that run the real server.
+
+    gunicorn benchmarks.worker_app:app
+
+main.py is imported unchanged (placeholder keys let its backends be constructed;
+nothing calls them) and its module-level graph is swapped for a replay graph
+on the configured shared checkpointer, so every endpoint, the middleware and the
+metrics behave as in production. REPLAY_LATENCY_SCALE scales the recorded latencies.
+"""
+import os
+
+for _key in ("GROQ_API_KEY", "OPENWEATHERMAP_API_KEY", "TAVILY_API_KEY"):
+    os.environ.setdefault(_key, "placeholder")
+os.environ.setdefault("GPLACES_API_KEY", "AIza" + "0" * 35)
+
+import main  # noqa: E402
+from Agent.agent import AgentGraph  # noqa: E402
+from benchmarks.replay import LatencyModel, ReplayChatModel, load_fixtures, make_replay_tools  # noqa: E402
+from utils.checkpointer import load_checkpointer  # noqa: E402
+
+_fixtures = load_fixtures()
+_latency = LatencyModel(scale=float(os.getenv("REPLAY_LATENCY_SCALE", "0")))
+main.graph = AgentGraph(
+    llm=ReplayChatModel.from_fixtures(_fixtures, _latency),
+    tools=make_replay_tools(_fixtures, _latency),
+    checkpointer=load_checkpointer(),
+)
+app = main.app
@@ -0,0 +1,134 @@
+"""Worker scaling benchmark: /query throughput of gunicorn with 1..N uvicorn workers.
+
+Each run starts `gunicorn benchmarks.worker_app:app` (the real app and
+gunicorn.conf.py, with the offline replay agent) on a fresh SQLite checkpointer
+and tool cache shared by its workers, then drives sessions of two turns over HTTP.
+Nothing pins a session to a worker, so the second turn usually lands on a
+different worker; every session's history is checked afterwards. At the default
+zero replay latency a query is pure CPU (graph, checkpoints, HTTP), so throughput
+should grow close to linearly with workers up to the number of cores.
+
+    python -m benchmarks.worker_scaling_benchmark --workers 1 2 4 8 --sessions 400 --concurrency 64
+"""
+import argparse
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+
+import httpx
+import numpy as np
+
+from benchmarks.replay import load_fixtures
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(workers: int, port: int, data_dir: str, latency_scale: float) -> subprocess.Popen:
+    env = {
+        **os.environ,
+        "CHECKPOINTER_BACKEND": "sqlite",
+        "CHECKPOINTER_SQLITE_PATH": os.path.join(data_dir, "checkpoints.sqlite"),
+        "TOOL_CACHE_BACKEND": "sqlite",
+        "TOOL_CACHE_SQLITE_PATH": os.path.join(data_dir, "tool_cache.sqlite"),
+        "PROMETHEUS_MULTIPROC_DIR": os.path.join(data_dir, "metrics"),
+        "REPLAY_LATENCY_SCALE": str(latency_scale),
+        # All load comes from one client IP; measure throughput, not the per-IP limits
+        "RATE_LIMIT_SESSION_PER_MINUTE": "0",
+        "RATE_LIMIT_IP_PER_MINUTE": "0",
+        "LOG_LEVEL": "WARNING",
+    }
+    command = [sys.executable, "-m", "gunicorn", "benchmarks.worker_app:app", "--config", "gunicorn.conf.py",
+               "--workers", str(workers), "--bind", f"127.0.0.1:{port}"]
+    return subprocess.Popen(command, cwd=REPO_ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+
+
+async def wait_ready(client: httpx.AsyncClient, server: subprocess.Popen, timeout: float = 120.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"gunicorn exited: {server.stderr.read().decode()[-2000:]}")
+        try:
+            if (await client.get("/health")).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.2)
+    raise TimeoutError("gunicorn did not become ready")
+
+
+async def drive(client: httpx.AsyncClient, questions, sessions: int, concurrency: int) -> dict:
+    """`sessions` two-turn conversations with at most `concurrency` requests in flight"""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, session_ids = [], []
+
+    async def ask(question: str, session_id: str):
+        async with semaphore:
+            start = time.perf_counter()
+            response = await client.post("/query", json={"question": question, "session_id": session_id})
+            response.raise_for_status()
+            latencies.append(time.perf_counter() - start)
+
+    async def session(index: int):
+        session_id = str(uuid.uuid4())
+        session_ids.append(session_id)
+        await ask(questions[index % len(questions)], session_id)
+        await ask("Can you make day 2 more relaxed?", session_id)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(session(index) for index in range(sessions)))
+    elapsed = time.perf_counter() - start
+
+    # Both turns (question + answer each) must be in the shared history, whichever workers served them
+    counts = await asyncio.gather(*(client.get(f"/session-info/{session_id}") for session_id in session_ids))
+    complete = sum(1 for response in counts if response.json()["message_count"] >= 4)
+    p50, p99 = np.percentile(np.array(latencies) * 1000, [50, 99])
+    return {"throughput": len(latencies) / elapsed, "p50": p50, "p99": p99, "complete": complete}
+
+
+async def run_workers(workers: int, args, questions) -> dict:
+    port = free_port()
+    with tempfile.TemporaryDirectory() as data_dir:
+        server = start_server(workers, port, data_dir, args.latency_scale)
+        limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+        try:
+            async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", limits=limits, timeout=300) as client:
+                await wait_ready(client, server)
+                await drive(client, questions, max(workers * 4, 8), args.concurrency)  # warm up every worker
+                return await drive(client, questions, args.sessions, args.concurrency)
+        finally:
+            server.terminate()
+            server.wait(timeout=60)
+
+
+async def main(args):
+    questions = [fixture["question"] for fixture in load_fixtures()]
+    print(f"{os.cpu_count()} CPUs; {args.sessions} two-turn sessions at concurrency {args.concurrency}, "
+          f"replay latency × {args.latency_scale}")
+    print(f"{'workers':>7} | {'queries/s':>9} | {'speedup':>7} | {'efficiency':>10} | {'p50 ms':>8} | {'p99 ms':>8} | {'full history':>12}")
+    baseline = None
+    for workers in args.workers:
+        result = await run_workers(workers, args, questions)
+        baseline = baseline or result["throughput"] / workers
+        speedup = result["throughput"] / baseline
+        print(f"{workers:>7} | {result['throughput']:>9.1f} | {speedup:>6.2f}x | {speedup / workers:>10.0%} | "
+              f"{result['p50']:>8.1f} | {result['p99']:>8.1f} | {result['complete']:>5}/{args.sessions:<6}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--sessions", type=int, default=400, help="two-turn sessions per worker count")
+    parser.add_argument("--concurrency", type=int, default=64, help="requests in flight")
+    parser.add_argument("--latency-scale", type=float, default=0.0, help="multiplier on recorded LLM/tool latencies")
+    asyncio.run(main(parser.parse_args()))
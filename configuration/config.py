@@ -26,3 +26,182 @@ API_KEYS = {
     "groq": os.getenv("GROQ_API_KEY"),
     "openrouter": os.getenv("OPENROUTER_API_KEY")
 }
+
+# LLM router: providers tried in this order (those without an API key are skipped); one provider = no router
+LLM_PROVIDERS = [name.strip() for name in os.getenv("LLM_PROVIDERS", LLM_PROVIDER).split(",") if name.strip()]
+# Optional per-step model chains as "provider:model,provider:model"; empty uses MODEL_NAMES for LLM_PROVIDERS.
+# Tool selection (a question arriving) can go to a cheaper, faster model than writing the answer from tool results.
+LLM_STEP_MODELS = {
+    "tool_selection": os.getenv("LLM_TOOL_SELECTION_MODELS", ""),
+    "answer": os.getenv("LLM_ANSWER_MODELS", ""),
+}
+# Hedging: if the first model has not answered within its recent p95 latency (clamped to these bounds), ask the next one too
+LLM_HEDGE_ENABLED = os.getenv("LLM_HEDGE_ENABLED", "false").lower() == "true"
+LLM_HEDGE_DEFAULT_MS = float(os.getenv("LLM_HEDGE_DEFAULT_MS", "15000"))
+LLM_HEDGE_MIN_MS = float(os.getenv("LLM_HEDGE_MIN_MS", "3000"))
+LLM_HEDGE_MAX_MS = float(os.getenv("LLM_HEDGE_MAX_MS", "30000"))
+# Per-call timeout for routed models; the router fails over instead of letting the SDK retry
+LLM_REQUEST_TIMEOUT_SECONDS = float(os.getenv("LLM_REQUEST_TIMEOUT_SECONDS", "60"))
+# Output tokens assumed per call when checking a provider's remaining token budget
+LLM_OUTPUT_TOKEN_ESTIMATE = int(os.getenv("LLM_OUTPUT_TOKEN_ESTIMATE", "1000"))
+
+# Admission control for /query and /query/stream (per worker process): agent runs allowed at once,
+# requests waiting in FIFO order beyond that, and how long one may wait before it is turned away
+ADMISSION_MAX_CONCURRENT = int(os.getenv("ADMISSION_MAX_CONCURRENT", "16"))
+ADMISSION_MAX_QUEUE = int(os.getenv("ADMISSION_MAX_QUEUE", "64"))
+ADMISSION_QUEUE_TIMEOUT_SECONDS = float(os.getenv("ADMISSION_QUEUE_TIMEOUT_SECONDS", "30"))
+# Token buckets: sustained requests per minute and burst size, per session and per client IP (0 disables)
+RATE_LIMIT_SESSION_PER_MINUTE = float(os.getenv("RATE_LIMIT_SESSION_PER_MINUTE", "10"))
+RATE_LIMIT_SESSION_BURST = int(os.getenv("RATE_LIMIT_SESSION_BURST", "5"))
+RATE_LIMIT_IP_PER_MINUTE = float(os.getenv("RATE_LIMIT_IP_PER_MINUTE", "30"))
+RATE_LIMIT_IP_BURST = int(os.getenv("RATE_LIMIT_IP_BURST", "10"))
+# Reverse proxies / load balancers (comma-separated IPs or CIDRs) whose X-Forwarded-For names the client IP.
+# Empty: the header is ignored and the per-IP limit applies to the connecting address, so behind a proxy
+# list it here (otherwise every client shares the proxy's bucket) or set RATE_LIMIT_IP_PER_MINUTE=0
+TRUSTED_PROXIES = os.getenv("TRUSTED_PROXIES", "")
+
+# Background plan jobs (POST /plans): SQLite store shared by the workers on one host, agent runs per worker process,
+# jobs allowed to wait, seconds a running job's lease lasts without a heartbeat (then another worker resumes it),
+# attempts before a job is failed, how long finished jobs are kept, and how often idle workers look for new jobs
+PLAN_JOBS_SQLITE_PATH = os.getenv("PLAN_JOBS_SQLITE_PATH", "data/plan_jobs.sqlite")
+PLAN_JOB_WORKERS = int(os.getenv("PLAN_JOB_WORKERS", "4"))
+PLAN_JOBS_MAX_QUEUED = int(os.getenv("PLAN_JOBS_MAX_QUEUED", "500"))
+PLAN_JOB_LEASE_SECONDS = float(os.getenv("PLAN_JOB_LEASE_SECONDS", "30"))
+PLAN_JOB_MAX_ATTEMPTS = int(os.getenv("PLAN_JOB_MAX_ATTEMPTS", "3"))
+PLAN_JOB_TTL_SECONDS = int(os.getenv("PLAN_JOB_TTL_SECONDS", str(24 * 60 * 60)))
+PLAN_JOB_POLL_SECONDS = float(os.getenv("PLAN_JOB_POLL_SECONDS", "1.0"))
+
+# Worker threads available to blocking tool calls (requests/SDK clients) made from the async agent path
+TOOL_THREAD_POOL_SIZE = int(os.getenv("TOOL_THREAD_POOL_SIZE", "32"))
+
+# Independent tool calls emitted in one agent step run concurrently, up to this many at once
+TOOL_MAX_CONCURRENCY = int(os.getenv("TOOL_MAX_CONCURRENCY", "8"))
+# Seconds a single tool call may run before it is reported back to the model as timed out
+TOOL_TIMEOUT_SECONDS = float(os.getenv("TOOL_TIMEOUT_SECONDS", "30"))
+
+# Shared cache for external tool results: "memory" (per process), "sqlite" (shared across workers) or "redis" (across hosts)
+TOOL_CACHE_BACKEND = os.getenv("TOOL_CACHE_BACKEND", "memory")
+TOOL_CACHE_SQLITE_PATH = os.getenv("TOOL_CACHE_SQLITE_PATH", "data/tool_cache.sqlite")
+TOOL_CACHE_MAX_ENTRIES = int(os.getenv("TOOL_CACHE_MAX_ENTRIES", "4096"))
+# Redis (or any server speaking its protocol) for the "redis" tool cache and checkpointer backends
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+
+# Seconds each kind of tool result stays fresh
+TOOL_CACHE_TTLS = {
+    "weather_current": 10 * 60,
+    "weather_forecast": 60 * 60,
+    "places": 3 * 24 * 60 * 60,
+    "geocode": 30 * 24 * 60 * 60,
+}
+
+# Opt-in cache of whole answers for first-turn, history-free questions
+ANSWER_CACHE_ENABLED = os.getenv("ANSWER_CACHE_ENABLED", "false").lower() == "true"
+ANSWER_CACHE_TTL_SECONDS = int(os.getenv("ANSWER_CACHE_TTL_SECONDS", str(6 * 60 * 60)))
+# Hits older than this are still served but reported as stale serves
+ANSWER_CACHE_FRESH_SECONDS = int(os.getenv("ANSWER_CACHE_FRESH_SECONDS", str(60 * 60)))
+ANSWER_CACHE_MAX_ENTRIES = int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", "512"))
+# Embeddings provider for similarity matching ("openai" or empty for exact matching only)
+ANSWER_CACHE_EMBEDDINGS = os.getenv("ANSWER_CACHE_EMBEDDINGS", "")
+ANSWER_CACHE_SIMILARITY = float(os.getenv("ANSWER_CACHE_SIMILARITY", "0.95"))
+
+# Conversation checkpoints: "sqlite" (persistent, bounded, shared by the workers on one host),
+# "redis" (shared across hosts) or "memory" (unbounded, per process: single worker only)
+CHECKPOINTER_BACKEND = os.getenv("CHECKPOINTER_BACKEND", "sqlite")
+CHECKPOINTER_SQLITE_PATH = os.getenv("CHECKPOINTER_SQLITE_PATH", "data/checkpoints.sqlite")
+# Sessions idle for longer than this are deleted by the compaction job
+SESSION_TTL_SECONDS = int(os.getenv("SESSION_TTL_SECONDS", str(24 * 60 * 60)))
+# Older checkpoints beyond this many per session are pruned (the newest one holds the full history)
+MAX_CHECKPOINTS_PER_THREAD = int(os.getenv("MAX_CHECKPOINTS_PER_THREAD", "10"))
+CHECKPOINT_COMPACTION_INTERVAL_SECONDS = int(os.getenv("CHECKPOINT_COMPACTION_INTERVAL_SECONDS", "600"))
+
+# Approximate token budget for each agent prompt (system prompt + summary + kept messages)
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "8000"))
+# Tool results of the current turn are cut to this many characters, those of earlier turns much shorter
+CONTEXT_MAX_TOOL_RESULT_CHARS = int(os.getenv("CONTEXT_MAX_TOOL_RESULT_CHARS", "4000"))
+CONTEXT_STALE_TOOL_RESULT_CHARS = int(os.getenv("CONTEXT_STALE_TOOL_RESULT_CHARS", "400"))
+
+# Per-request budget of the agent <-> tools loop (0 disables a limit): agent LLM steps, tool calls,
+# agent LLM tokens and wall-clock seconds. Once one runs out the agent answers from what it has gathered.
+# The last of AGENT_MAX_STEPS is reserved for that answer, so values of 1 are raised to 2 (one tool round)
+AGENT_MAX_STEPS = int(os.getenv("AGENT_MAX_STEPS", "8"))
+AGENT_MAX_TOOL_CALLS = int(os.getenv("AGENT_MAX_TOOL_CALLS", "24"))
+AGENT_MAX_TOKENS = int(os.getenv("AGENT_MAX_TOKENS", "60000"))
+AGENT_DEADLINE_SECONDS = float(os.getenv("AGENT_DEADLINE_SECONDS", "120"))
+
+# Bind only the tools each agent step needs (fewer schema tokens per call); "false" binds every tool on every call
+TOOL_SUBSETS_ENABLED = os.getenv("TOOL_SUBSETS_ENABLED", "true").lower() == "true"
+# Tools offered per step (steps as in utils/llm_router.classify_step): lookups while a question is waiting,
+# composing tools (plus the cheap place searches, to fill gaps) once tool results are in
+AGENT_STEP_TOOLS = {
+    "tool_selection": os.getenv(
+        "AGENT_TOOL_SELECTION_TOOLS",
+        "get_destination_brief,search_attractions,search_restaurants,search_activities,search_transportation,"
+        "get_current_weather,get_weather_forecast,currency_convertor,convert_currency_batch,compare_budget_scenarios",
+    ),
+    "answer": os.getenv(
+        "AGENT_ANSWER_TOOLS",
+        "search_attractions,search_restaurants,search_activities,search_transportation,optimize_itinerary_by_location,"
+        "create_daily_itinerary,create_budget_breakdown,create_travel_checklist,estimate_total_hotel_cost,"
+        "calculate_total_expense,calculate_daily_expense_budget,currency_convertor",
+    ),
+}
+# Sent with OpenAI requests so calls sharing the system prompt + tool schemas prefix land on the same prompt cache
+PROMPT_CACHE_KEY = os.getenv("PROMPT_CACHE_KEY", "ai-travel-planner")
+
+# Shared HTTP client pools used by the tool backends (utils/http_client.py)
+HTTP_TIMEOUT_SECONDS = float(os.getenv("HTTP_TIMEOUT_SECONDS", "15"))
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+HTTP_MAX_CONNECTIONS_PER_HOST = int(os.getenv("HTTP_MAX_CONNECTIONS_PER_HOST", "20"))
+HTTP_MAX_RETRIES = int(os.getenv("HTTP_MAX_RETRIES", "2"))
+HTTP_BACKOFF_SECONDS = float(os.getenv("HTTP_BACKOFF_SECONDS", "0.5"))
+# Longest Retry-After honoured before a retry; a 429/503 asking for longer is returned to the caller at once
+HTTP_MAX_RETRY_AFTER_SECONDS = float(os.getenv("HTTP_MAX_RETRY_AFTER_SECONDS", "5"))
+
+# PDF export: worker processes for rendering, size bound of the rendered-PDF cache, download chunk size
+PDF_RENDER_WORKERS = int(os.getenv("PDF_RENDER_WORKERS", "2"))
+PDF_CACHE_MAX_BYTES = int(os.getenv("PDF_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+PDF_STREAM_CHUNK_BYTES = int(os.getenv("PDF_STREAM_CHUNK_BYTES", str(64 * 1024)))
+
+# Itinerary engine: usable minutes per day, time spent at each stop, average door-to-door travel speed in town
+ITINERARY_DAY_MINUTES = int(os.getenv("ITINERARY_DAY_MINUTES", str(8 * 60)))
+ITINERARY_VISIT_MINUTES = int(os.getenv("ITINERARY_VISIT_MINUTES", "90"))
+ITINERARY_TRAVEL_SPEED_KMH = float(os.getenv("ITINERARY_TRAVEL_SPEED_KMH", "20"))
+
+# Reference cost tables (per tier/destination/season) used by the budget engine
+BUDGET_COST_TABLE_PATH = os.getenv("BUDGET_COST_TABLE_PATH", os.path.join(os.path.dirname(__file__), "budget_costs.json"))
+
+# FX rate table: snapshot source (base-currency rates), refresh interval, retry delay after a failed refresh, offline fallback
+FX_RATES_URL = os.getenv("FX_RATES_URL", "https://open.er-api.com/v6/latest/USD")
+FX_REFRESH_SECONDS = int(os.getenv("FX_REFRESH_SECONDS", str(6 * 60 * 60)))
+FX_RETRY_SECONDS = int(os.getenv("FX_RETRY_SECONDS", "300"))
+FX_FALLBACK_PATH = os.getenv("FX_FALLBACK_PATH", os.path.join(os.path.dirname(__file__), "fx_rates_fallback.json"))
+
+# Destination brief: places listed per category by default, and the most a caller may ask for
+PLACES_BRIEF_TOP_N = int(os.getenv("PLACES_BRIEF_TOP_N", "5"))
+PLACES_BRIEF_MAX_TOP_N = int(os.getenv("PLACES_BRIEF_MAX_TOP_N", "10"))
+
+# Provider routing (Google Places -> Tavily): consecutive failures that open a circuit, seconds before a trial call,
+# hedge delay bounds (ms; the primary's p95 is used once known) and the worker threads running provider calls
+PROVIDER_BREAKER_FAILURES = int(os.getenv("PROVIDER_BREAKER_FAILURES", "5"))
+PROVIDER_BREAKER_RESET_SECONDS = float(os.getenv("PROVIDER_BREAKER_RESET_SECONDS", "30"))
+PROVIDER_HEDGE_DEFAULT_MS = float(os.getenv("PROVIDER_HEDGE_DEFAULT_MS", "2000"))
+PROVIDER_HEDGE_MIN_MS = float(os.getenv("PROVIDER_HEDGE_MIN_MS", "300"))
+PROVIDER_HEDGE_MAX_MS = float(os.getenv("PROVIDER_HEDGE_MAX_MS", "5000"))
+PROVIDER_POOL_SIZE = int(os.getenv("PROVIDER_POOL_SIZE", "32"))
+
+# Logging: level (DEBUG, INFO, WARNING, ...) and format ("json" for structured logs, "text" for local development)
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json")
+
+# Metrics: a session counts as active for this many seconds after its last request
+ACTIVE_SESSION_WINDOW_SECONDS = int(os.getenv("ACTIVE_SESSION_WINDOW_SECONDS", str(15 * 60)))
+# Set (by gunicorn.conf.py) when several worker processes serve the app: metrics are aggregated across them here
+PROMETHEUS_MULTIPROC_DIR = os.getenv("PROMETHEUS_MULTIPROC_DIR", "")
+
+# Tracing: "none" (disabled), "jsonl" (one span per line in TRACING_JSONL_PATH) or "otlp" (OTLP/HTTP collector)
+TRACING_EXPORTER = os.getenv("TRACING_EXPORTER", "none").lower()
+TRACING_JSONL_PATH = os.getenv("TRACING_JSONL_PATH", "traces.jsonl")
+TRACING_OTLP_ENDPOINT = os.getenv("TRACING_OTLP_ENDPOINT", "http://localhost:4318/v1/traces")
+# Fraction of requests traced (children follow their root's decision)
+TRACING_SAMPLE_RATIO = float(os.getenv("TRACING_SAMPLE_RATIO", "1.0"))
+TRACING_SERVICE_NAME = os.getenv("TRACING_SERVICE_NAME", "ai-travel-planner")
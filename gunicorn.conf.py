@@ -0,0 +1,45 @@
+"""Gunicorn settings for serving main:app with several uvicorn worker processes.
+
+    gunicorn main:app                       # picks up this file from the working directory
+    WEB_CONCURRENCY=8 gunicorn main:app
+
+Workers share no memory and requests are not pinned to a worker, so any worker can
+serve any session: conversation checkpoints and tool results live in shared storage
+(SQLite on one host by default, Redis across hosts via CHECKPOINTER_BACKEND /
+TOOL_CACHE_BACKEND=redis), and metrics are aggregated through PROMETHEUS_MULTIPROC_DIR.
+"""
+import multiprocessing
+import os
+import shutil
+import tempfile
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_CONCURRENCY", str(multiprocessing.cpu_count())))
+worker_class = "uvicorn_worker.UvicornWorker"
+# Agent runs and streamed answers can take minutes; a silent worker is only killed after this
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "300"))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", "30"))
+keepalive = 5
+# Each worker imports the app after the fork, so SQLite connections, HTTP pools and thread pools are never shared
+preload_app = False
+
+# Per-process backends would make a session's follow-up turns miss its history on another worker
+os.environ.setdefault("CHECKPOINTER_BACKEND", "sqlite")
+os.environ.setdefault("TOOL_CACHE_BACKEND", "sqlite")
+os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", os.path.join(tempfile.gettempdir(), "travel_planner_metrics"))
+
+
+def on_starting(server):
+    if workers > 1 and os.environ["CHECKPOINTER_BACKEND"] == "memory":
+        server.log.warning("CHECKPOINTER_BACKEND=memory keeps sessions per worker; follow-up turns will lose their history")
+    # Files left by a previous run would be added to this run's counters
+    metrics_dir = os.environ["PROMETHEUS_MULTIPROC_DIR"]
+    shutil.rmtree(metrics_dir, ignore_errors=True)
+    os.makedirs(metrics_dir, exist_ok=True)
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+
+    # Drops the dead worker's live gauges (in-flight requests, active sessions)
+    multiprocess.mark_process_dead(worker.pid)
@@ -7,15 +7,42 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from Agent.agent import AgentGraph
-from starlette.responses import JSONResponse
+from starlette.background import BackgroundTask
+from starlette.responses import JSONResponse, Response, StreamingResponse
 from pydantic import BaseModel
 from dotenv import load_dotenv
 from langchain_core.messages import HumanMessage, AIMessage
+from concurrent.futures import ThreadPoolExecutor
+from configuration.config import TOOL_THREAD_POOL_SIZE
+from utils.cache import tool_cache
+from utils.http_client import http_session
+from utils.singleflight import single_flight
+from utils.pdf_generator import iter_chunks, pdf_service
+from utils.fx_rates import fx_rates
+from utils.provider_router import places_router
+from utils.admission import AdmissionRejected, admission, client_ip
+from utils.plan_jobs import IdempotencyConflict, plan_jobs, public_job
+from utils.logger import configure_logging, get_logger
+from utils.metrics import (
+    HTTP_IN_FLIGHT,
+    HTTP_REQUEST_SECONDS,
+    QUERY_SECONDS,
+    active_sessions,
+    register_cache_collector,
+    render_metrics,
+)
+from utils.tracing import setup_tracing, shutdown_tracing, tracer
+import asyncio
+import json
 import os
+import time
 import uuid
 from typing import List, Optional
 
 load_dotenv()
+configure_logging()
+logger = get_logger(__name__)
+setup_tracing()
 
 app = FastAPI()
 
@@ -36,50 +63,221 @@ class QueryRequest(BaseModel):
     question: str
     session_id: Optional[str] = None
 
+class PlanRequest(BaseModel):
+    question: str
+    session_id: Optional[str] = None
+
 class ClearSessionRequest(BaseModel):
     session_id: str
     
 graph = AgentGraph()    
 
+# Cache hit ratios are read from the caches' own counters whenever /metrics is scraped
+register_cache_collector({
+    "tool_cache": tool_cache.stats,
+    "single_flight": single_flight.stats,
+    "answer_cache": lambda: graph.answer_cache.stats() if graph.answer_cache else {"enabled": False},
+})
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    """Latency per route template (not raw path, so session ids don't explode label cardinality)"""
+    start = time.perf_counter()
+    status = 500
+    HTTP_IN_FLIGHT.inc()
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        HTTP_IN_FLIGHT.dec()
+        route = getattr(request.scope.get("route"), "path", "unmatched")
+        HTTP_REQUEST_SECONDS.labels(request.method, route, str(status)).observe(time.perf_counter() - start)
+
+@app.on_event("startup")
+async def configure_tool_executor():
+    """Size the default executor that runs blocking tool calls for the async agent path"""
+    loop = asyncio.get_running_loop()
+    loop.set_default_executor(ThreadPoolExecutor(max_workers=TOOL_THREAD_POOL_SIZE, thread_name_prefix="agent-tools"))
+
+@app.on_event("startup")
+async def start_checkpoint_compaction():
+    """Expire idle sessions and trim old checkpoints in the background (SQLite checkpointer only)"""
+    if hasattr(graph.memory, "start_background_compaction"):
+        graph.memory.start_background_compaction()
+
+@app.on_event("startup")
+async def load_fx_rates():
+    """Replace the bundled FX snapshot with live rates without delaying startup"""
+    fx_rates.refresh_in_background()
+
+@app.on_event("startup")
+async def start_plan_jobs():
+    """Run background plan jobs (including ones left unfinished by a previous run) on this worker"""
+    plan_jobs.start(graph)
+
+@app.on_event("shutdown")
+async def stop_plan_jobs():
+    await plan_jobs.stop()
+
+@app.on_event("shutdown")
+async def stop_checkpoint_compaction():
+    if hasattr(graph.memory, "stop_background_compaction"):
+        graph.memory.stop_background_compaction()
+
+@app.on_event("shutdown")
+async def close_http_clients():
+    """Close the pooled tool-backend HTTP connections"""
+    await http_session.aclose()
+
+@app.on_event("shutdown")
+async def stop_pdf_workers():
+    pdf_service.shutdown()
+
+@app.on_event("shutdown")
+async def flush_traces():
+    shutdown_tracing()
+
+def _client_ip(request: Request) -> str:
+    # X-Forwarded-For only counts when the peer is one of TRUSTED_PROXIES
+    return client_ip(request.client.host if request.client else "", request.headers.get("x-forwarded-for"))
+
+def _rejected_response(rejection: AdmissionRejected) -> JSONResponse:
+    return JSONResponse(
+        status_code=rejection.status_code,
+        content={"error": str(rejection), "reason": rejection.reason, "retry_after": rejection.retry_after},
+        headers={"Retry-After": str(rejection.retry_after)},
+    )
+
 @app.post("/query")
-async def query_travel_agent(query: QueryRequest):
+async def query_travel_agent(query: QueryRequest, request: Request):
+    start = time.perf_counter()
+    # Use session-based invocation with memory
+    session_id = query.session_id or str(uuid.uuid4())
+    # Rate limits, then a slot in the agent (or a bounded wait for one)
     try:
-        # Use session-based invocation with memory
-        session_id = query.session_id or str(uuid.uuid4())
-        
-        print(f"Processing query for session: {session_id}")
-        print(f"Query: {query.question}")
-        
-        # Create message input with proper format
-        messages = {"messages": [HumanMessage(content=query.question)]}
-        
-        # Invoke with session configuration for memory persistence
-        output = graph.invoke_with_config(messages, session_id)
-        
-        print(f"Graph output type: {type(output)}")
-        print(f"Graph output: {output}")
-        print("✅Response has been created successfully")
+        ticket = await admission.acquire(query.session_id, _client_ip(request))
+    except AdmissionRejected as rejection:
+        QUERY_SECONDS.labels("query", "rejected").observe(time.perf_counter() - start)
+        logger.warning("Query rejected", extra={"session_id": session_id, "reason": rejection.reason, "retry_after": rejection.retry_after})
+        return _rejected_response(rejection)
+    # The slot is held from here on, so nothing between admission and the run can leak it
+    with ticket:
+        active_sessions.touch(session_id)
+        try:
+            logger.info("Processing query", extra={"session_id": session_id, "question_chars": len(query.question),
+                                                   "queued_ms": round(ticket.queued_seconds * 1000)})
+            logger.debug("Query text", extra={"session_id": session_id, "question": query.question})
+            
+            # Create message input with proper format
+            messages = {"messages": [HumanMessage(content=query.question)]}
+            
+            # Invoke with session configuration for memory persistence (async, so the event loop stays free)
+            # Agent span of the request trace; LLM, tool, provider and HTTP spans nest under it
+            with tracer.start_as_current_span("agent.query", attributes={"session_id": session_id}):
+                output = await graph.ainvoke_with_config(messages, session_id)
 
-        # Extract the AI response
-        if isinstance(output, dict) and "messages" in output:
-            final_output = output["messages"][-1].content  # Last AI response
-        else:
-            final_output = str(output)
-        
-        return {"answer": final_output, "session_id": session_id}
-    except Exception as e:
-        print(f"Error in query_travel_agent: {str(e)}")
-        print(f"Error type: {type(e)}")
-        import traceback
-        traceback.print_exc()
-        return JSONResponse(status_code=500, content={"error": str(e)})
+            # Extract the AI response
+            if isinstance(output, dict) and "messages" in output:
+                final_output = output["messages"][-1].content  # Last AI response
+            else:
+                final_output = str(output)
+            
+            elapsed = time.perf_counter() - start
+            QUERY_SECONDS.labels("query", "ok").observe(elapsed)
+            logger.info("Query answered", extra={"session_id": session_id, "duration_ms": round(elapsed * 1000), "answer_chars": len(final_output)})
+            return {"answer": final_output, "session_id": session_id}
+        except Exception as e:
+            QUERY_SECONDS.labels("query", "error").observe(time.perf_counter() - start)
+            logger.exception("Error in query_travel_agent", extra={"session_id": session_id})
+            return JSONResponse(status_code=500, content={"error": str(e)})
+
+@app.post("/query/stream")
+async def stream_travel_agent(query: QueryRequest, request: Request):
+    """Stream tokens and tool progress for a query as Server-Sent Events"""
+    # Measured to the end of the stream, not to the response headers
+    start = time.perf_counter()
+    session_id = query.session_id or str(uuid.uuid4())
+    messages = {"messages": [HumanMessage(content=query.question)]}
+    # Admitted before the response starts, so a rejection is still a plain 429/503 with Retry-After
+    try:
+        ticket = await admission.acquire(query.session_id, _client_ip(request))
+    except AdmissionRejected as rejection:
+        QUERY_SECONDS.labels("query_stream", "rejected").observe(time.perf_counter() - start)
+        logger.warning("Query rejected", extra={"session_id": session_id, "reason": rejection.reason, "retry_after": rejection.retry_after})
+        return _rejected_response(rejection)
+    
+    async def event_stream():
+        outcome = "ok"
+        try:
+            active_sessions.touch(session_id)
+            yield f"data: {json.dumps({'type': 'session', 'session_id': session_id})}\n\n"
+            with tracer.start_as_current_span("agent.query_stream", attributes={"session_id": session_id}):
+                async for event in graph.astream_with_config(messages, session_id):
+                    yield f"data: {json.dumps(event)}\n\n"
+        except (asyncio.CancelledError, GeneratorExit):
+            outcome = "disconnected"
+            raise
+        except Exception as e:
+            outcome = "error"
+            logger.exception("Error in stream_travel_agent", extra={"session_id": session_id})
+            yield f"data: {json.dumps({'type': 'error', 'error': str(e)})}\n\n"
+        finally:
+            ticket.release()
+            QUERY_SECONDS.labels("query_stream", outcome).observe(time.perf_counter() - start)
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        # Also frees the slot if the stream is cancelled before the generator starts (release is idempotent)
+        background=BackgroundTask(ticket.release),
+    )
+
+@app.post("/plans", status_code=202)
+async def submit_plan(plan: PlanRequest, request: Request):
+    """Queue a travel plan and return its job id at once; poll GET /plans/{job_id} for the result.
+
+    Retries carrying the same Idempotency-Key header get the original job instead of a new run.
+    """
+    idempotency_key = request.headers.get("idempotency-key")
+    try:
+        existing = await plan_jobs.find(idempotency_key, plan.question, plan.session_id)
+        if existing:
+            return JSONResponse(status_code=200, content=public_job(existing))
+        # Only new jobs count against the rate limits
+        admission.check_rate_limits(plan.session_id, _client_ip(request))
+        job, created = await plan_jobs.submit(plan.question, plan.session_id, idempotency_key)
+    except IdempotencyConflict as e:
+        return JSONResponse(status_code=409, content={"error": str(e)})
+    except AdmissionRejected as rejection:
+        logger.warning("Plan rejected", extra={"session_id": plan.session_id, "reason": rejection.reason, "retry_after": rejection.retry_after})
+        return _rejected_response(rejection)
+    if created:
+        active_sessions.touch(job["session_id"])
+        logger.info("Plan job queued", extra={"job_id": job["job_id"], "session_id": job["session_id"], "question_chars": len(plan.question)})
+    return JSONResponse(
+        status_code=202 if created else 200,
+        content=public_job(job),
+        headers={"Location": f"/plans/{job['job_id']}"},
+    )
+
+@app.get("/plans/{job_id}")
+async def get_plan(job_id: str):
+    """Status of a plan job: the answer once it has succeeded, the text streamed so far while it runs"""
+    job = await plan_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown plan job")
+    # Polling hint while the job is still queued or running
+    headers = {"Retry-After": "2"} if job["status"] in ("queued", "running") else {}
+    return JSONResponse(content=public_job(job), headers=headers)
 
 @app.post("/clear-session")
 async def clear_session(request: ClearSessionRequest):
     """Clear conversation history for a specific session using LangGraph memory"""
     try:
         session_id = request.session_id
-        if graph.clear_session(session_id):
+        if await graph.aclear_session(session_id):
             return {"message": f"Session {session_id} cleared successfully"}
         else:
             return {"message": f"Failed to clear session {session_id}"}
@@ -90,7 +288,7 @@ async def clear_session(request: ClearSessionRequest):
 async def get_session_info(session_id: str):
     """Get information about a conversation session using LangGraph memory"""
     try:
-        history = graph.get_session_history(session_id)
+        history = await graph.aget_session_history(session_id)
         message_count = len(history)
         
         return {
@@ -106,34 +304,59 @@ async def health_check():
     """Health check endpoint"""
     return {"status": "healthy", "message": "AI Travel Agent is running"}
 
+@app.get("/stats")
+async def get_stats():
+    """Cache hit/miss counters, answer cache, single-flight dedup, FX snapshot, provider and LLM router health, admission and plan job stats"""
+    return {
+        "tool_cache": tool_cache.stats(),
+        "single_flight": single_flight.stats(),
+        "fx_rates": fx_rates.stats(),
+        "providers": places_router.stats(),
+        "answer_cache": graph.answer_cache.stats() if graph.answer_cache else {"enabled": False},
+        "llm_router": graph.llm.stats() if hasattr(graph.llm, "stats") else {"enabled": False},
+        "admission": admission.stats(),
+        "plan_jobs": plan_jobs.stats(),
+    }
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus metrics: query/LLM/tool latency, tokens, graph steps, cache hit ratios, active sessions"""
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
+
 @app.get("/")
 async def read_root(request: Request):
     """Serve the main HTML page"""
     return templates.TemplateResponse("index.html", {"request": request})
 
 
-from starlette.responses import StreamingResponse
-from utils.pdf_generator import generate_pdf_from_text # Ensure this import
-
 @app.get("/generate-pdf/{session_id}")
-async def generate_travel_plan_pdf(session_id: str):
+async def generate_travel_plan_pdf(session_id: str, request: Request):
     try:
-        history = graph.get_session_history(session_id)
+        history = await graph.aget_session_history(session_id)
         # Assuming the last AI message is the full plan
         full_plan_message = next((msg.content for msg in reversed(history) if msg.type == 'ai'), None)
 
         if not full_plan_message:
             raise HTTPException(status_code=404, detail="No travel plan found for this session.")
 
-        pdf_buffer = generate_pdf_from_text(full_plan_message)
-        pdf_buffer.seek(0) # Rewind the buffer to the beginning
+        # Rendered in a worker process; unchanged plans are served from the content-hash cache
+        content_hash, pdf_bytes = await pdf_service.render(full_plan_message)
+        etag = f'"{content_hash}"'
+        if request.headers.get("if-none-match") == etag:
+            return Response(status_code=304, headers={"ETag": etag})
 
         return StreamingResponse(
-            pdf_buffer,
+            iter_chunks(pdf_bytes),
             media_type="application/pdf",
-            headers={"Content-Disposition": f"attachment; filename=travel_plan_{session_id}.pdf"}
+            headers={
+                "Content-Disposition": f"attachment; filename=travel_plan_{session_id}.pdf",
+                "Content-Length": str(len(pdf_bytes)),
+                "ETag": etag,
+            }
         )
+    except HTTPException:
+        raise
     except Exception as e:
-        print(f"Error generating PDF: {str(e)}")
+        logger.exception("Error generating PDF", extra={"session_id": session_id})
         raise HTTPException(status_code=500, detail=f"Error generating PDF: {str(e)}")
-    
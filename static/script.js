@@ -153,6 +153,176 @@ class TravelPlannerChat {
   }
 
   async sendQuery(question) {
+    // Fall back to the single JSON response when the browser cannot read streamed bodies
+    if (!window.ReadableStream || !window.TextDecoder) {
+      return this.sendQueryBlocking(question);
+    }
+
+    const controller = new AbortController();
+    // Abort only if the stream goes quiet for 60 seconds, not after a fixed total time
+    let timeoutId = setTimeout(() => controller.abort(), 60000);
+    const resetTimeout = () => {
+      clearTimeout(timeoutId);
+      timeoutId = setTimeout(() => controller.abort(), 60000);
+    };
+    let reader = null;
+    let bubble = null;
+    let finished = false;
+
+    try {
+      const BASE_URL = window.location.origin;
+
+      const response = await fetch(`${BASE_URL}/query/stream`, {
+        method: "POST",
+        headers: {
+          "Content-Type": "application/json",
+          "Accept": "text/event-stream"
+        },
+        body: JSON.stringify({
+          question: question,
+          session_id: this.sessionId
+        }),
+        signal: controller.signal
+      });
+
+      if (!response.ok) {
+        throw new Error(`Server error: ${response.status} ${response.statusText}`);
+      }
+      if (!response.body) {
+        clearTimeout(timeoutId);
+        return this.sendQueryBlocking(question);
+      }
+
+      reader = response.body.getReader();
+      const decoder = new TextDecoder();
+      let buffer = "";
+      let answer = null;
+      let streamed = "";
+      const runningTools = new Map();
+
+      const ensureBubble = () => {
+        if (!bubble) {
+          this.hideTypingIndicator();
+          bubble = this.createStreamingMessage();
+        }
+        return bubble;
+      };
+
+      const handleEvent = (event) => {
+        switch (event.type) {
+          case "session":
+            if (event.session_id) {
+              this.sessionId = event.session_id;
+              localStorage.setItem("travelPlannerSessionId", this.sessionId);
+            }
+            break;
+          case "token":
+            streamed += event.content;
+            ensureBubble().text.innerHTML = this.formatMessage(streamed);
+            this.scrollToBottom();
+            break;
+          case "tool_start":
+            runningTools.set(event.run_id, event.name);
+            this.updateToolStatus(ensureBubble(), runningTools);
+            break;
+          case "tool_end":
+            runningTools.delete(event.run_id);
+            this.updateToolStatus(ensureBubble(), runningTools);
+            break;
+          case "done":
+            answer = event.answer;
+            break;
+          case "error":
+            throw new Error(event.error || "The travel planner failed to respond");
+        }
+      };
+
+      while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        resetTimeout();
+
+        buffer += decoder.decode(value, { stream: true });
+        const frames = buffer.split("\n\n");
+        buffer = frames.pop();
+
+        for (const frame of frames) {
+          const data = frame
+            .split("\n")
+            .filter(line => line.startsWith("data:"))
+            .map(line => line.slice(5).trim())
+            .join("");
+          if (data) handleEvent(JSON.parse(data));
+        }
+      }
+
+      clearTimeout(timeoutId);
+
+      if (!answer) {
+        throw new Error("No answer received from the server");
+      }
+
+      // The final answer from the session state is authoritative over the streamed tokens
+      finished = true;
+      ensureBubble();
+      bubble.status.remove();
+      bubble.text.innerHTML = this.formatMessage(answer);
+      this.scrollToBottom();
+
+      this.lastResponse = answer;
+      this.saveToHistory("bot", answer);
+      this.showDownloadButton();
+
+    } catch (error) {
+      clearTimeout(timeoutId);
+      // Stop reading (an "error" event leaves the stream open) and drop the partial answer before the error shows
+      if (reader) reader.cancel().catch(() => {});
+      if (bubble && !finished) bubble.element.remove();
+
+      if (error.name === 'AbortError') {
+        throw new Error("Request timed out. Please try again.");
+      } else if (error.message.includes('Failed to fetch')) {
+        throw new Error("Unable to connect to the travel planner service. Please check if the server is running.");
+      } else {
+        throw error;
+      }
+    }
+  }
+
+  createStreamingMessage() {
+    const messageDiv = document.createElement("div");
+    messageDiv.className = "message bot-message";
+
+    messageDiv.innerHTML = `
+      <div class="message-avatar">
+        <i class="fas fa-robot"></i>
+      </div>
+      <div class="message-content">
+        <div class="message-status"></div>
+        <div class="message-text"></div>
+        <div class="message-time">${this.formatTime(new Date())}</div>
+      </div>
+    `;
+
+    this.chatBox.appendChild(messageDiv);
+    this.scrollToBottom();
+
+    return {
+      element: messageDiv,
+      status: messageDiv.querySelector(".message-status"),
+      text: messageDiv.querySelector(".message-text")
+    };
+  }
+
+  updateToolStatus(bubble, runningTools) {
+    const names = [...new Set(runningTools.values())];
+    bubble.status.textContent = names.length
+      ? `🔧 Gathering: ${names.map(name => name.replace(/_/g, " ")).join(", ")}...`
+      : "✍️ Writing your plan...";
+    this.scrollToBottom();
+  }
+
+  async sendQueryBlocking(question) {
     const controller = new AbortController();
     const timeoutId = setTimeout(() => controller.abort(), 60000); // 60 second timeout
     
@@ -0,0 +1,239 @@
+import asyncio
+import ipaddress
+import math
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Optional
+
+from configuration.config import (
+    ADMISSION_MAX_CONCURRENT,
+    ADMISSION_MAX_QUEUE,
+    ADMISSION_QUEUE_TIMEOUT_SECONDS,
+    RATE_LIMIT_IP_BURST,
+    RATE_LIMIT_IP_PER_MINUTE,
+    RATE_LIMIT_SESSION_BURST,
+    RATE_LIMIT_SESSION_PER_MINUTE,
+    TRUSTED_PROXIES,
+)
+from utils.metrics import ADMISSION_QUEUE_DEPTH, ADMISSION_QUEUE_SECONDS, ADMISSION_REJECTIONS, AGENT_RUNS_IN_FLIGHT
+
+
+_TRUSTED_NETWORKS = [
+    ipaddress.ip_network(proxy.strip(), strict=False) for proxy in TRUSTED_PROXIES.split(",") if proxy.strip()
+]
+
+
+def _is_trusted(address: str) -> bool:
+    try:
+        ip = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+    return any(ip in network for network in _TRUSTED_NETWORKS)
+
+
+def client_ip(peer: str, forwarded_for: Optional[str] = None) -> str:
+    """Client address for the per-IP rate limit.
+
+    X-Forwarded-For is only read when the connection comes from a TRUSTED_PROXIES
+    address; its entries are then walked right to left and the first one not added
+    by a trusted proxy is the client (entries further left can be forged by it).
+    """
+    if not forwarded_for or not _is_trusted(peer):
+        return peer
+    hops = [hop.strip() for hop in forwarded_for.split(",") if hop.strip()]
+    for hop in reversed(hops):
+        if not _is_trusted(hop):
+            return hop
+    return hops[0] if hops else peer
+
+
+class AdmissionRejected(Exception):
+    """Query turned away before reaching the agent; carries the HTTP status and a Retry-After hint in seconds"""
+
+    def __init__(self, reason: str, retry_after: float, status_code: int = 429):
+        super().__init__(f"Too many requests ({reason.replace('_', ' ')}), retry in {max(1, math.ceil(retry_after))}s")
+        self.reason = reason
+        self.retry_after = max(1, math.ceil(retry_after))
+        self.status_code = status_code
+
+
+class TokenBucketLimiter:
+    """One token bucket per key (session id or client IP): `per_minute` sustained, bursts of `burst`.
+
+    Buckets idle long enough to have refilled are dropped, so memory follows the
+    number of recently active keys (hard-capped at `max_keys`).
+    """
+
+    def __init__(self, per_minute: float, burst: int, max_keys: int = 100_000):
+        self.rate = per_minute / 60
+        self.burst = max(1, burst)
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()  # key -> (tokens, updated_at), least recently used first
+        self._lock = threading.Lock()
+
+    def acquire(self, key: Optional[str]) -> float:
+        """Takes a token and returns 0, or returns the seconds until one is available"""
+        if self.rate <= 0 or not key:
+            return 0.0
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated_at = self._buckets.pop(key, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - updated_at) * self.rate)
+            wait = 0.0 if tokens >= 1 else (1 - tokens) / self.rate
+            self._buckets[key] = (tokens - 1 if wait == 0 else tokens, now)
+            refill_seconds = self.burst / self.rate
+            while self._buckets:
+                oldest, (_, seen) = next(iter(self._buckets.items()))
+                if now - seen < refill_seconds and len(self._buckets) <= self.max_keys:
+                    break
+                del self._buckets[oldest]
+            return wait
+
+    def __len__(self):
+        return len(self._buckets)
+
+
+class AdmissionTicket:
+    """An admitted query's agent slot; release it (or leave the `with` block) when the run ends"""
+
+    def __init__(self, controller: "AdmissionController", queued_seconds: float):
+        self.controller = controller
+        self.queued_seconds = queued_seconds
+        self.started = time.perf_counter()
+        self.released = False
+
+    def release(self):
+        if not self.released:
+            self.released = True
+            self.controller._finished(time.perf_counter() - self.started)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.release()
+
+
+class AdmissionController:
+    """Admission in front of the agent: rate limits, a concurrency cap and a bounded FIFO queue.
+
+    - Per-session and per-IP token buckets are checked first (429, Retry-After = time to the next token).
+    - Up to `max_concurrent` queries run the agent at once; the next `max_queue` wait in
+      arrival order and are handed slots as runs finish.
+    - A full queue is answered at once (429). The queue counts as full early when recent
+      run times say its tail could not start within `queue_timeout`; a query that still
+      waits that long gives up (503). Retry-After comes from recent run times.
+    So overload becomes bounded queueing delay plus fast rejections, instead of every
+    run slowing down and failing against exhausted upstream quotas.
+
+    Used from the event loop only. Limits are per worker process.
+    """
+
+    def __init__(self, max_concurrent: int = ADMISSION_MAX_CONCURRENT, max_queue: int = ADMISSION_MAX_QUEUE,
+                 queue_timeout: float = ADMISSION_QUEUE_TIMEOUT_SECONDS,
+                 session_limiter: Optional[TokenBucketLimiter] = None, ip_limiter: Optional[TokenBucketLimiter] = None):
+        self.max_concurrent = max(1, max_concurrent)
+        self.max_queue = max(0, max_queue)
+        self.queue_timeout = queue_timeout
+        self.session_limiter = session_limiter or TokenBucketLimiter(RATE_LIMIT_SESSION_PER_MINUTE, RATE_LIMIT_SESSION_BURST)
+        self.ip_limiter = ip_limiter or TokenBucketLimiter(RATE_LIMIT_IP_PER_MINUTE, RATE_LIMIT_IP_BURST)
+        self.running = 0
+        self._waiters = deque()
+        # Moving average of agent run time, for Retry-After estimates
+        self.average_run_seconds = 10.0
+        self._counters = {"admitted": 0, "queued": 0, "rate_limited_session": 0, "rate_limited_ip": 0,
+                          "queue_full": 0, "queue_timeout": 0}
+
+    def _reject(self, reason: str, retry_after: float, status_code: int = 429):
+        self._counters[reason] += 1
+        ADMISSION_REJECTIONS.labels(reason).inc()
+        raise AdmissionRejected(reason, retry_after, status_code)
+
+    def _estimated_wait(self, position: int) -> float:
+        """Seconds until the query at 1-based queue `position` would start"""
+        return position * self.average_run_seconds / self.max_concurrent
+
+    def queue_limit(self) -> int:
+        """Waiting room actually offered: no more than can start within `queue_timeout` at recent run times"""
+        servable = int(self.queue_timeout * self.max_concurrent / max(self.average_run_seconds, 1e-3))
+        return min(self.max_queue, max(1, servable))
+
+    def _admit(self, queued_seconds: float) -> AdmissionTicket:
+        self._counters["admitted"] += 1
+        ADMISSION_QUEUE_SECONDS.labels("admitted").observe(queued_seconds)
+        return AdmissionTicket(self, queued_seconds)
+
+    def check_rate_limits(self, session_id: Optional[str] = None, client_ip: Optional[str] = None):
+        """Takes a token from the session and IP buckets; raises AdmissionRejected when either is empty"""
+        wait = self.session_limiter.acquire(session_id)
+        if wait:
+            self._reject("rate_limited_session", wait)
+        wait = self.ip_limiter.acquire(client_ip)
+        if wait:
+            self._reject("rate_limited_ip", wait)
+
+    async def acquire(self, session_id: Optional[str] = None, client_ip: Optional[str] = None) -> AdmissionTicket:
+        """Wait for an agent slot; raises AdmissionRejected instead of queueing without bound"""
+        self.check_rate_limits(session_id, client_ip)
+
+        if self.running < self.max_concurrent and not self._waiters:
+            self.running += 1
+            AGENT_RUNS_IN_FLIGHT.inc()
+            return self._admit(0.0)
+        if len(self._waiters) >= self.queue_limit():
+            self._reject("queue_full", self._estimated_wait(len(self._waiters) + 1))
+
+        slot = asyncio.get_running_loop().create_future()
+        self._waiters.append(slot)
+        self._counters["queued"] += 1
+        ADMISSION_QUEUE_DEPTH.inc()
+        start = time.perf_counter()
+        outcome = "cancelled"
+        try:
+            await asyncio.wait({slot}, timeout=self.queue_timeout)
+            if slot.done():
+                outcome = "admitted"
+                return self._admit(time.perf_counter() - start)
+            outcome = "timeout"
+            self._reject("queue_timeout", self._estimated_wait(len(self._waiters)), status_code=503)
+        finally:
+            if outcome != "admitted":
+                ADMISSION_QUEUE_SECONDS.labels(outcome).observe(time.perf_counter() - start)
+                if slot.done() and not slot.cancelled():
+                    # Handed a slot just as we gave up (or the client went away): pass it on
+                    self._release_slot()
+                elif slot in self._waiters:
+                    self._waiters.remove(slot)
+                    ADMISSION_QUEUE_DEPTH.dec()
+                slot.cancel()
+
+    def _release_slot(self):
+        while self._waiters:
+            slot = self._waiters.popleft()
+            ADMISSION_QUEUE_DEPTH.dec()
+            if not slot.done():
+                slot.set_result(None)  # the slot moves to the oldest waiter; `running` is unchanged
+                return
+        self.running -= 1
+        AGENT_RUNS_IN_FLIGHT.dec()
+
+    def _finished(self, run_seconds: float):
+        self.average_run_seconds += 0.1 * (run_seconds - self.average_run_seconds)
+        self._release_slot()
+
+    def stats(self) -> dict:
+        return {
+            "max_concurrent": self.max_concurrent,
+            "running": self.running,
+            "max_queue": self.max_queue,
+            "queue_limit": self.queue_limit(),
+            "waiting": len(self._waiters),
+            "average_run_seconds": round(self.average_run_seconds, 3),
+            "rate_limited_keys": {"session": len(self.session_limiter), "ip": len(self.ip_limiter)},
+            **self._counters,
+        }
+
+
+# Shared by /query and /query/stream (/plans only uses its rate limits; plan jobs have their own worker pool)
+admission = AdmissionController()
@@ -0,0 +1,201 @@
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Optional
+
+import numpy as np
+
+from configuration.config import (
+    ANSWER_CACHE_EMBEDDINGS,
+    ANSWER_CACHE_FRESH_SECONDS,
+    ANSWER_CACHE_MAX_ENTRIES,
+    ANSWER_CACHE_SIMILARITY,
+    ANSWER_CACHE_TTL_SECONDS,
+)
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+def normalize_question(question: str) -> str:
+    """Lowercase, drop punctuation and collapse whitespace so near-identical questions match exactly"""
+    return " ".join(re.sub(r"[^\w\s$€£₹.-]", " ", question.lower()).split()).strip(" .")
+
+
+# Tokens that change what a plan must contain: numbers (days, people, budget, dates), number words,
+# currency symbols/codes and months. Embeddings barely separate "5 days" from "7 days".
+_NUMBER_WORDS = "one two three four five six seven eight nine ten eleven twelve fourteen fifteen twenty thirty".split()
+_MONTHS = ("jan feb mar apr may jun jul aug sep sept oct nov dec january february march april june july august "
+           "september october november december").split()
+_CONSTRAINT_PATTERN = re.compile(
+    r"\d+(?:[.,]\d+)*|[$€£₹]|\b(?:" + "|".join(_NUMBER_WORDS + _MONTHS) + r"|usd|eur|gbp|inr|jpy|aud|cad)\b"
+)
+# Places are read from words after these ("trip to Goa", "3 days in Lisbon") and from capitalized words
+_PLACE_PREPOSITIONS = {"to", "in", "at", "from", "around", "near", "visit", "visiting", "explore", "exploring"}
+# Words that end a place phrase and are never places themselves (also sentence-initial capitals)
+_NOT_PLACE = set(_NUMBER_WORDS + _MONTHS) | set(
+    "a an the my our me us i we you it this that these next last of for with and or on by during over under "
+    "plan planning please suggest create make give show find help need want can could would what where how which "
+    "trip trips travel tour itinerary holiday holidays vacation getaway weekend week weeks day days night nights "
+    "budget cheap luxury people person persons adults kids children family couple friends solo honeymoon "
+    "best top things do see places food".split()
+)
+
+
+def question_constraints(normalized: str) -> tuple:
+    """Numbers, currencies and months of a normalized question, in order; a semantic hit must match them exactly"""
+    return tuple(_CONSTRAINT_PATTERN.findall(normalized))
+
+
+def question_places(question: str) -> frozenset:
+    """Place phrases of the original (not normalized) question; a semantic hit must name the same places"""
+    places, phrase, capturing = set(), [], False
+    for word in re.findall(r"[^\W\d_][\w'-]*", question):
+        lower = word.lower()
+        if lower in _PLACE_PREPOSITIONS:
+            capturing = True
+        elif lower not in _NOT_PLACE and (capturing or word[0].isupper()):
+            phrase.append(lower)
+            continue
+        else:
+            capturing = False
+        if phrase:
+            places.add(" ".join(phrase))
+            phrase = []
+    if phrase:
+        places.add(" ".join(phrase))
+    return frozenset(places)
+
+
+def _unit_vector(vector: List[float]) -> np.ndarray:
+    vector = np.asarray(vector, dtype=np.float32)
+    return vector / (np.linalg.norm(vector) or 1.0)
+
+
+class AnswerCache:
+    """Cache of complete first-turn travel-plan answers.
+
+    Lookups match exactly on the normalized question and, when an embeddings model
+    is configured, fall back to cosine similarity over an in-memory vector index (a
+    normalized numpy matrix, rebuilt on writes and searched outside the lock). A
+    similar question only counts as a hit when its numbers, currencies, months and
+    places are the same (a 5-day Porto plan is not served for 7 days, or for Lisbon).
+    Entries expire after `ttl` seconds and the least recently used entry is evicted
+    once `max_entries` is reached. Hits older than `fresh_seconds` are still served
+    but counted as stale serves.
+    """
+
+    def __init__(self, max_entries: int = ANSWER_CACHE_MAX_ENTRIES, ttl: float = ANSWER_CACHE_TTL_SECONDS,
+                 fresh_seconds: float = ANSWER_CACHE_FRESH_SECONDS, similarity_threshold: float = ANSWER_CACHE_SIMILARITY,
+                 embeddings=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.fresh_seconds = fresh_seconds
+        self.similarity_threshold = similarity_threshold
+        self.embeddings = embeddings
+        # normalized question -> {"answer", "created_at", "vector", "constraints"}
+        self._entries = OrderedDict()
+        # (keys, unit vectors as rows, constraints) of the entries with a vector; replaced, never mutated
+        self._index = ([], None, [])
+        self._lock = threading.Lock()
+        self._counters = {"exact_hits": 0, "semantic_hits": 0, "misses": 0, "stale_serves": 0, "stores": 0}
+
+    def _embed(self, text: str) -> Optional[np.ndarray]:
+        if self.embeddings is None:
+            return None
+        try:
+            return _unit_vector(self.embeddings.embed_query(text))
+        except Exception as e:
+            logger.warning("Answer cache embedding failed", extra={"error": str(e)})
+            return None
+
+    def _rebuild_index(self):
+        indexed = [(key, entry) for key, entry in self._entries.items() if entry["vector"] is not None]
+        matrix = np.stack([entry["vector"] for _, entry in indexed]) if indexed else None
+        self._index = ([key for key, _ in indexed], matrix, [entry["constraints"] for _, entry in indexed])
+
+    def _evict_expired(self, now: float):
+        expired = [key for key, entry in self._entries.items() if now - entry["created_at"] > self.ttl]
+        for key in expired:
+            del self._entries[key]
+        if expired:
+            self._rebuild_index()
+
+    def _hit(self, key: str, counter: str, now: float) -> str:
+        entry = self._entries[key]
+        self._entries.move_to_end(key)
+        self._counters[counter] += 1
+        if now - entry["created_at"] > self.fresh_seconds:
+            self._counters["stale_serves"] += 1
+        return entry["answer"]
+
+    def _search(self, index, vector: np.ndarray, constraints) -> Optional[str]:
+        """Most similar indexed question above the threshold with the same constraints"""
+        keys, matrix, entry_constraints = index
+        if matrix is None:
+            return None
+        scores = matrix @ vector
+        allowed = np.fromiter((candidate == constraints for candidate in entry_constraints), dtype=bool, count=len(keys))
+        scores[~allowed] = -np.inf
+        best = int(np.argmax(scores))
+        return keys[best] if scores[best] >= self.similarity_threshold else None
+
+    def lookup(self, question: str) -> Optional[str]:
+        """Return a cached answer for the question, or None on a miss"""
+        key = normalize_question(question)
+        now = time.time()
+        with self._lock:
+            self._evict_expired(now)
+            if key in self._entries:
+                return self._hit(key, "exact_hits", now)
+            index = self._index
+
+        vector = self._embed(key) if index[1] is not None else None
+        best_key = None
+        if vector is not None:
+            # The matrix-vector product runs on the snapshot, outside the lock
+            best_key = self._search(index, vector, (question_constraints(key), question_places(question)))
+        with self._lock:
+            # Evicted between the snapshot and now: a miss
+            if best_key is not None and best_key in self._entries:
+                return self._hit(best_key, "semantic_hits", now)
+            self._counters["misses"] += 1
+            return None
+
+    def store(self, question: str, answer: str):
+        key = normalize_question(question)
+        vector = self._embed(key)
+        with self._lock:
+            self._entries[key] = {"answer": answer, "created_at": time.time(), "vector": vector,
+                                  "constraints": (question_constraints(key), question_places(question))}
+            self._entries.move_to_end(key)
+            self._counters["stores"] += 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._rebuild_index()
+
+    def stats(self) -> dict:
+        with self._lock:
+            counters = dict(self._counters)
+            entries = len(self._entries)
+        hits = counters["exact_hits"] + counters["semantic_hits"]
+        lookups = hits + counters["misses"]
+        return {
+            "enabled": True,
+            "entries": entries,
+            **counters,
+            "hit_ratio": round(hits / lookups, 4) if lookups else 0.0,
+            "stale_serve_ratio": round(counters["stale_serves"] / hits, 4) if hits else 0.0,
+        }
+
+
+def load_answer_cache_embeddings():
+    provider = ANSWER_CACHE_EMBEDDINGS
+    if not provider:
+        return None
+    elif provider == "openai":
+        from langchain_openai import OpenAIEmbeddings
+        return OpenAIEmbeddings(model="text-embedding-3-small")
+    else:
+        raise ValueError(f"Unknown answer cache embeddings provider: {provider}")
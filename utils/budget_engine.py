@@ -0,0 +1,177 @@
+import json
+import re
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+
+from configuration.config import BUDGET_COST_TABLE_PATH
+
+TIERS = ("low", "medium", "high")
+
+
+def parse_int_list(values) -> list:
+    """'1, 2,4' or [1, 2, 4] -> [1, 2, 4]"""
+    if isinstance(values, (int, float)):
+        return [int(values)]
+    if isinstance(values, str):
+        values = re.findall(r"\d+", values)
+    return [int(value) for value in values if int(value) > 0]
+
+
+def parse_codes(values) -> list:
+    """'usd, inr' or ['usd', 'inr'] -> ['USD', 'INR'] (order kept, duplicates dropped)"""
+    if isinstance(values, str):
+        values = re.split(r"[\s,;/]+", values)
+    return list(dict.fromkeys(value.strip().upper() for value in values if value.strip()))
+
+
+class BudgetEngine:
+    """Trip cost estimates from NumPy cost tables.
+
+    The tables (configuration/budget_costs.json) hold reference unit costs per
+    tier and category, a price index per destination and category, and season
+    multipliers. `scenarios` evaluates every combination of travelers × days ×
+    tier × currency in one broadcast, so a single tool call can present all options.
+    """
+
+    def __init__(self, table_path: str = BUDGET_COST_TABLE_PATH):
+        with open(table_path, encoding="utf-8") as table_file:
+            table = json.load(table_file)
+        self.categories = list(table["categories"])
+        self.tiers = np.array([table["tiers"][tier] for tier in TIERS], dtype=float)  # (tier, category)
+        self.seasons = {name: np.array(values, dtype=float) for name, values in table["seasons"].items()}
+        self.destinations = {name: np.array(values, dtype=float) for name, values in table["destinations"].items()}
+        self.room_occupancy = table["room_occupancy"]
+        self.contingency = table["contingency"]
+        self.base_currency = table["currency"]
+        self._destination_pattern = re.compile(
+            r"\b(" + "|".join(re.escape(name) for name in sorted(self.destinations, key=len, reverse=True)) + r")\b"
+        )
+
+    def price_index(self, destination: str):
+        """(matched table entry or None, per-category price index) for a free-text destination.
+
+        The first entry mentioned wins, so "Goa, India" uses Goa's prices rather than India's.
+        """
+        match = self._destination_pattern.search(destination.lower())
+        if match:
+            return match.group(1), self.destinations[match.group(1)]
+        return None, np.ones(len(self.categories))
+
+    def season_multipliers(self, season: str) -> np.ndarray:
+        return self.seasons.get((season or "regular").lower(), self.seasons["regular"])
+
+    def scenarios(self, destination: str, travelers: Sequence[int], days: Sequence[int],
+                  season: str = "regular", rates: Optional[Dict[str, float]] = None) -> dict:
+        """Costs for every travelers × days × tier × currency combination.
+
+        `rates` maps currency code -> units per one unit of the base currency (USD);
+        the base currency is always included. Returns the axes, the matched destination
+        entry and `costs` with shape (travelers, days, tier, currency, category).
+        """
+        rates = {self.base_currency: 1.0, **{code.upper(): rate for code, rate in (rates or {}).items()}}
+        matched, index = self.price_index(destination)
+        travelers_axis = np.asarray(travelers, dtype=float)
+        days_axis = np.asarray(days, dtype=float)
+
+        unit = self.tiers * index * self.season_multipliers(season)  # (tier, category)
+        # Units bought per category: room-nights for accommodation, person-days for the rest
+        rooms = np.ceil(travelers_axis / self.room_occupancy)[:, None]
+        nights = np.maximum(days_axis - 1, 1)[None, :]
+        person_days = travelers_axis[:, None] * days_axis[None, :]
+        quantity = np.repeat(person_days[:, :, None], len(self.categories), axis=2)  # (travelers, days, category)
+        quantity[:, :, self.categories.index("accommodation")] = rooms * nights
+
+        usd = quantity[:, :, None, :] * unit[None, None, :, :]  # (travelers, days, tier, category)
+        currency_rates = np.array(list(rates.values()), dtype=float)
+        costs = usd[:, :, :, None, :] * currency_rates[None, None, None, :, None]
+        return {
+            "destination": destination,
+            "matched": matched,
+            "season": (season or "regular").lower(),
+            "travelers": [int(value) for value in travelers_axis],
+            "days": [int(value) for value in days_axis],
+            "tiers": list(TIERS),
+            "currencies": list(rates),
+            "categories": self.categories,
+            "unit_costs": unit,
+            "costs": costs,
+        }
+
+    def totals(self, scenarios: dict) -> np.ndarray:
+        """Grand totals including the contingency buffer, shape (travelers, days, tier, currency)"""
+        return scenarios["costs"].sum(axis=-1) * (1 + self.contingency)
+
+
+def _money(amount: float, currency: str) -> str:
+    return f"{currency} {amount:,.0f}"
+
+
+def format_scenarios(engine: BudgetEngine, scenarios: dict) -> str:
+    """One compact table: a row per travelers/days combination, total and per person for each tier and currency"""
+    totals = engine.totals(scenarios)
+    source = scenarios["matched"] or "generic reference prices (destination not in the cost table)"
+    lines = [
+        f"## 💰 Budget Scenarios for {scenarios['destination']}",
+        f"Season: {scenarios['season'].title()} · Price basis: {source} · Includes {engine.contingency:.0%} contingency",
+        "",
+    ]
+    columns = [f"{tier.title()} ({currency})" for tier in scenarios["tiers"] for currency in scenarios["currencies"]]
+    lines.append("| Travelers | Days | " + " | ".join(columns) + " |")
+    lines.append("|---|---|" + "---|" * len(columns))
+    for t, travelers in enumerate(scenarios["travelers"]):
+        for d, days in enumerate(scenarios["days"]):
+            cells = [
+                f"{totals[t, d, tier, c]:,.0f} ({totals[t, d, tier, c] / travelers:,.0f}/person)"
+                for tier in range(len(scenarios["tiers"])) for c in range(len(scenarios["currencies"]))
+            ]
+            lines.append(f"| {travelers} | {days} | " + " | ".join(cells) + " |")
+
+    unit = scenarios["unit_costs"]
+    lines.append("")
+    lines.append(f"Daily unit costs ({engine.base_currency}; accommodation per room-night, others per person):")
+    for tier_index, tier in enumerate(scenarios["tiers"]):
+        parts = ", ".join(f"{category} {unit[tier_index, i]:,.0f}" for i, category in enumerate(scenarios["categories"]))
+        lines.append(f"- {tier.title()}: {parts}")
+    return "\n".join(lines)
+
+
+def format_breakdown(engine: BudgetEngine, scenarios: dict, tier: str, currency: str) -> str:
+    """Detailed per-category breakdown of a single scenario (first travelers/days entry)"""
+    tier_index = scenarios["tiers"].index(tier)
+    currency_index = scenarios["currencies"].index(currency)
+    travelers, days = scenarios["travelers"][0], scenarios["days"][0]
+    costs = scenarios["costs"][0, 0, tier_index, currency_index]
+    subtotal = costs.sum()
+    total = subtotal * (1 + engine.contingency)
+    source = scenarios["matched"] or "generic reference prices (destination not in the cost table)"
+
+    lines = [
+        f"## 💰 Budget Breakdown for {scenarios['destination']}",
+        "",
+        "**Trip Details:**",
+        f"- Duration: {days} days · Travelers: {travelers} · Budget Category: {tier.title()} · Season: {scenarios['season'].title()}",
+        f"- Price basis: {source}",
+        "",
+        "### Cost Breakdown:",
+    ]
+    for category, amount in zip(scenarios["categories"], costs):
+        lines.append(f"- **{category.title()}:** {_money(amount, currency)}")
+    lines += [
+        f"- **Contingency ({engine.contingency:.0%}):** {_money(total - subtotal, currency)}",
+        "",
+        "### Summary:",
+        f"- **Total Budget:** {_money(total, currency)}",
+        f"- **Per Person:** {_money(total / travelers, currency)}",
+        f"- **Daily Average:** {_money(total / days, currency)}",
+    ]
+    all_tiers = engine.totals(scenarios)[0, 0, :, currency_index]
+    lines.append("- **Other tiers:** " + ", ".join(
+        f"{name.title()} {_money(amount, currency)}" for name, amount in zip(scenarios["tiers"], all_tiers) if name != tier
+    ))
+    lines.append("\n*Note: Estimates from reference price tables; actual prices vary with availability and specific choices.*")
+    return "\n".join(lines)
+
+
+# Cost tables are loaded once per process
+budget_engine = BudgetEngine()
@@ -0,0 +1,234 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Optional, Tuple
+
+from configuration.config import REDIS_URL, TOOL_CACHE_BACKEND, TOOL_CACHE_MAX_ENTRIES, TOOL_CACHE_SQLITE_PATH
+from utils.tracing import record_cache_lookup
+
+
+def normalize_arg(value: Any) -> Any:
+    """Normalize a tool argument so trivially different inputs share a cache entry"""
+    if isinstance(value, str):
+        return " ".join(value.split()).lower()
+    if isinstance(value, (list, tuple)):
+        return [normalize_arg(item) for item in value]
+    if isinstance(value, dict):
+        return {key: normalize_arg(item) for key, item in sorted(value.items())}
+    return value
+
+
+def make_cache_key(namespace: str, *args, **kwargs) -> str:
+    """Build a stable key from a namespace and normalized positional/keyword arguments"""
+    return json.dumps([namespace, normalize_arg(list(args)), normalize_arg(kwargs)], sort_keys=True, default=str)
+
+
+class MemoryCacheBackend:
+    """In-process LRU cache with per-entry expiry"""
+
+    name = "memory"
+
+    def __init__(self, max_entries: int = TOOL_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return False, None
+            value, expires_at = entry
+            if expires_at <= time.time():
+                del self._entries[key]
+                return False, None
+            self._entries.move_to_end(key)
+            return True, value
+
+    def set(self, key: str, value: Any, ttl: float):
+        with self._lock:
+            self._entries[key] = (value, time.time() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SQLiteCacheBackend:
+    """On-disk cache shared by every worker process on the host.
+
+    Values are stored as JSON; least recently used rows are pruned once the
+    table grows past `max_entries`.
+    """
+
+    name = "sqlite"
+
+    def __init__(self, path: str = TOOL_CACHE_SQLITE_PATH, max_entries: int = TOOL_CACHE_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._writes = 0
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS tool_cache ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL, last_access REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS tool_cache_last_access ON tool_cache (last_access)")
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        now = time.time()
+        with self._lock, self._conn:
+            row = self._conn.execute("SELECT value, expires_at FROM tool_cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return False, None
+            if row[1] <= now:
+                self._conn.execute("DELETE FROM tool_cache WHERE key = ?", (key,))
+                return False, None
+            self._conn.execute("UPDATE tool_cache SET last_access = ? WHERE key = ?", (now, key))
+        return True, json.loads(row[0])
+
+    def set(self, key: str, value: Any, ttl: float):
+        try:
+            payload = json.dumps(value)
+        except (TypeError, ValueError):
+            return  # Not JSON-serializable, leave it uncached
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO tool_cache (key, value, expires_at, last_access) VALUES (?, ?, ?, ?)",
+                (key, payload, now + ttl, now),
+            )
+            self._writes += 1
+            # Prune periodically rather than on every write
+            if self._writes % 64 == 0:
+                self._conn.execute("DELETE FROM tool_cache WHERE expires_at <= ?", (now,))
+                self._conn.execute(
+                    "DELETE FROM tool_cache WHERE key IN ("
+                    "SELECT key FROM tool_cache ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,),
+                )
+
+    def clear(self):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM tool_cache")
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM tool_cache").fetchone()[0]
+
+
+class RedisCacheBackend:
+    """Cache shared by every worker on every host, in Redis or a server speaking its protocol.
+
+    Values are stored as JSON with a Redis TTL; size is bounded by the server's
+    maxmemory policy (e.g. allkeys-lru) rather than `max_entries`.
+    """
+
+    name = "redis"
+
+    def __init__(self, url: str = REDIS_URL, prefix: str = "travel:tool_cache:"):
+        try:
+            import redis
+        except ImportError as e:
+            raise ImportError("TOOL_CACHE_BACKEND=redis requires `pip install redis`") from e
+        self.prefix = prefix
+        self._client = redis.Redis.from_url(url)
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        payload = self._client.get(self.prefix + key)
+        if payload is None:
+            return False, None
+        return True, json.loads(payload)
+
+    def set(self, key: str, value: Any, ttl: float):
+        try:
+            payload = json.dumps(value)
+        except (TypeError, ValueError):
+            return  # Not JSON-serializable, leave it uncached
+        self._client.set(self.prefix + key, payload, ex=max(1, int(ttl)))
+
+    def clear(self):
+        keys = list(self._client.scan_iter(match=self.prefix + "*", count=1000))
+        for start in range(0, len(keys), 1000):
+            self._client.delete(*keys[start:start + 1000])
+
+    def __len__(self):
+        return sum(1 for _ in self._client.scan_iter(match=self.prefix + "*", count=1000))
+
+
+class ToolResultCache:
+    """TTL cache for external tool results with per-namespace hit/miss counters"""
+
+    def __init__(self, backend):
+        self.backend = backend
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def _count(self, namespace: str, outcome: str):
+        with self._lock:
+            counters = self._counters.setdefault(namespace, {"hits": 0, "misses": 0})
+            counters[outcome] += 1
+
+    def get_or_set(self, namespace: str, key_args: tuple, ttl: float, compute: Callable[[], Any],
+                   should_cache: Optional[Callable[[Any], bool]] = None) -> Any:
+        """Return the cached value for (namespace, key_args), computing and storing it on a miss.
+
+        Results rejected by `should_cache` (e.g. upstream error payloads) are returned but not stored.
+        """
+        key = make_cache_key(namespace, *key_args)
+        found, value = self.backend.get(key)
+        record_cache_lookup(namespace, found)
+        if found:
+            self._count(namespace, "hits")
+            return value
+        self._count(namespace, "misses")
+        value = compute()
+        if value is not None and (should_cache is None or should_cache(value)):
+            self.backend.set(key, value, ttl)
+        return value
+
+    def stats(self) -> dict:
+        with self._lock:
+            namespaces = {name: dict(counters) for name, counters in self._counters.items()}
+        for counters in namespaces.values():
+            total = counters["hits"] + counters["misses"]
+            counters["hit_ratio"] = round(counters["hits"] / total, 4) if total else 0.0
+        hits = sum(counters["hits"] for counters in namespaces.values())
+        misses = sum(counters["misses"] for counters in namespaces.values())
+        return {
+            "backend": self.backend.name,
+            "entries": len(self.backend),
+            "hits": hits,
+            "misses": misses,
+            "hit_ratio": round(hits / (hits + misses), 4) if hits + misses else 0.0,
+            "namespaces": namespaces,
+        }
+
+
+def load_cache_backend():
+    backend = TOOL_CACHE_BACKEND
+    if backend == "memory":
+        return MemoryCacheBackend()
+    elif backend == "sqlite":
+        return SQLiteCacheBackend()
+    elif backend == "redis":
+        return RedisCacheBackend()
+    else:
+        raise ValueError(f"Unknown tool cache backend: {backend}")
+
+
+# Shared by every tool in the process (and across processes with the sqlite or redis backend)
+tool_cache = ToolResultCache(load_cache_backend())
@@ -0,0 +1,213 @@
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.checkpoint.sqlite import SqliteSaver
+
+from configuration.config import (
+    CHECKPOINTER_BACKEND,
+    CHECKPOINTER_SQLITE_PATH,
+    CHECKPOINT_COMPACTION_INTERVAL_SECONDS,
+    MAX_CHECKPOINTS_PER_THREAD,
+    REDIS_URL,
+    SESSION_TTL_SECONDS,
+)
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class ThreadedAsyncSaverMixin:
+    """Async checkpointer methods that run the sync ones in a worker thread.
+
+    Lets a sync saver serve invoke() as well as ainvoke()/astream_events().
+    """
+
+    async def aget_tuple(self, config):
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(self, config, *, filter=None, before=None, limit=None):
+        checkpoints = await asyncio.to_thread(lambda: list(self.list(config, filter=filter, before=before, limit=limit)))
+        for checkpoint in checkpoints:
+            yield checkpoint
+
+    async def aput(self, config, checkpoint, metadata, new_versions):
+        return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(self, config, writes, task_id, task_path=""):
+        return await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        return await asyncio.to_thread(self.delete_thread, thread_id)
+
+
+class BoundedSqliteSaver(ThreadedAsyncSaverMixin, SqliteSaver):
+    """SQLite checkpointer with bounded growth.
+
+    Tracks the last activity of every thread (session) so idle sessions can be
+    expired, and keeps only the newest `max_checkpoints_per_thread` checkpoints of
+    each thread. Both are enforced by `compact()`, which can run periodically in a
+    background thread. The database file can be shared by several worker processes
+    (WAL mode, waits on locks); only one of them compacts per interval.
+    """
+
+    def __init__(self, conn: sqlite3.Connection, max_checkpoints_per_thread: int = MAX_CHECKPOINTS_PER_THREAD,
+                 session_ttl_seconds: float = SESSION_TTL_SECONDS):
+        super().__init__(conn)
+        # The newest checkpoint holds the full state; keep at least one parent for in-flight runs
+        self.max_checkpoints_per_thread = max(2, max_checkpoints_per_thread)
+        self.session_ttl_seconds = session_ttl_seconds
+        self._compaction_stop = threading.Event()
+        self._compaction_thread = None
+
+    def setup(self) -> None:
+        if self.is_setup:
+            return
+        super().setup()
+        self.conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS thread_activity (
+                thread_id TEXT PRIMARY KEY,
+                last_seen REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS thread_activity_last_seen ON thread_activity (last_seen);
+            CREATE TABLE IF NOT EXISTS maintenance (
+                task TEXT PRIMARY KEY,
+                last_run REAL NOT NULL
+            );
+            """
+        )
+
+    def claim_compaction(self, interval_seconds: float) -> bool:
+        """True for the one process (of those sharing the file) that should compact in this interval"""
+        self.setup()
+        now = time.time()
+        with self.cursor() as cur:
+            cur.execute(
+                "INSERT INTO maintenance (task, last_run) VALUES ('compaction', ?) "
+                "ON CONFLICT(task) DO UPDATE SET last_run = excluded.last_run WHERE maintenance.last_run <= ?",
+                (now, now - interval_seconds * 0.9),
+            )
+            return cur.rowcount == 1
+
+    def put(self, config, checkpoint, metadata, new_versions):
+        saved = super().put(config, checkpoint, metadata, new_versions)
+        with self.cursor() as cur:
+            cur.execute(
+                "INSERT INTO thread_activity (thread_id, last_seen) VALUES (?, ?) "
+                "ON CONFLICT(thread_id) DO UPDATE SET last_seen = excluded.last_seen",
+                (str(config["configurable"]["thread_id"]), time.time()),
+            )
+        return saved
+
+    def delete_thread(self, thread_id: str) -> None:
+        super().delete_thread(thread_id)
+        with self.cursor() as cur:
+            cur.execute("DELETE FROM thread_activity WHERE thread_id = ?", (str(thread_id),))
+
+    def compact(self) -> dict:
+        """Expire idle sessions and trim old checkpoints; returns how many rows were removed"""
+        cutoff = time.time() - self.session_ttl_seconds
+        with self.cursor() as cur:
+            expired = [row[0] for row in cur.execute("SELECT thread_id FROM thread_activity WHERE last_seen < ?", (cutoff,))]
+            for thread_id in expired:
+                cur.execute("DELETE FROM checkpoints WHERE thread_id = ?", (thread_id,))
+                cur.execute("DELETE FROM writes WHERE thread_id = ?", (thread_id,))
+                cur.execute("DELETE FROM thread_activity WHERE thread_id = ?", (thread_id,))
+
+            # checkpoint_id is time-ordered, so the highest ids are the newest checkpoints
+            cur.execute(
+                """
+                DELETE FROM checkpoints WHERE rowid IN (
+                    SELECT rowid FROM (
+                        SELECT rowid, ROW_NUMBER() OVER (
+                            PARTITION BY thread_id, checkpoint_ns ORDER BY checkpoint_id DESC
+                        ) AS position
+                        FROM checkpoints
+                    ) WHERE position > ?
+                )
+                """,
+                (self.max_checkpoints_per_thread,),
+            )
+            pruned_checkpoints = cur.rowcount
+            cur.execute(
+                """
+                DELETE FROM writes WHERE NOT EXISTS (
+                    SELECT 1 FROM checkpoints c
+                    WHERE c.thread_id = writes.thread_id
+                      AND c.checkpoint_ns = writes.checkpoint_ns
+                      AND c.checkpoint_id = writes.checkpoint_id
+                )
+                """
+            )
+            pruned_writes = cur.rowcount
+        with self.cursor() as cur:
+            # Fold the WAL back into the main file so it does not grow between compactions
+            cur.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        return {"expired_sessions": len(expired), "pruned_checkpoints": pruned_checkpoints, "pruned_writes": pruned_writes}
+
+    def start_background_compaction(self, interval_seconds: float = CHECKPOINT_COMPACTION_INTERVAL_SECONDS):
+        """Run compact() every `interval_seconds` in a daemon thread"""
+        if self._compaction_thread is not None:
+            return
+
+        def run():
+            while not self._compaction_stop.wait(interval_seconds):
+                try:
+                    # Other workers sharing the database may already have compacted this interval
+                    if not self.claim_compaction(interval_seconds):
+                        continue
+                    result = self.compact()
+                    logger.info("Checkpoint compaction", extra=result)
+                except Exception as e:
+                    logger.exception("Checkpoint compaction failed")
+
+        self._compaction_stop.clear()
+        self._compaction_thread = threading.Thread(target=run, name="checkpoint-compaction", daemon=True)
+        self._compaction_thread.start()
+
+    def stop_background_compaction(self):
+        self._compaction_stop.set()
+        self._compaction_thread = None
+
+
+def load_redis_checkpointer(url: str = REDIS_URL):
+    """Checkpointer on Redis (or a compatible server with the JSON and Search modules, e.g. Redis Stack)"""
+    try:
+        from langgraph.checkpoint.redis.shallow import ShallowRedisSaver
+    except ImportError as e:
+        raise ImportError("CHECKPOINTER_BACKEND=redis requires `pip install langgraph-checkpoint-redis`") from e
+
+    class ThreadedShallowRedisSaver(ThreadedAsyncSaverMixin, ShallowRedisSaver):
+        pass
+
+    saver = ThreadedShallowRedisSaver(
+        redis_url=url, ttl={"default_ttl": SESSION_TTL_SECONDS / 60, "refresh_on_read": True},
+    )
+    saver.setup()
+    return saver
+
+
+def load_checkpointer():
+    backend = CHECKPOINTER_BACKEND
+
+    if backend == "sqlite":
+        if os.path.dirname(CHECKPOINTER_SQLITE_PATH):
+            os.makedirs(os.path.dirname(CHECKPOINTER_SQLITE_PATH), exist_ok=True)
+        # Shared by every worker process on the host; writers wait up to `timeout` seconds for the lock
+        conn = sqlite3.connect(CHECKPOINTER_SQLITE_PATH, check_same_thread=False, timeout=30)
+        return BoundedSqliteSaver(conn)
+
+    elif backend == "redis":
+        # Shared across hosts; keeps only each session's newest checkpoint and expires idle sessions
+        return load_redis_checkpointer()
+
+    elif backend == "memory":
+        # Unbounded and per-process; only suitable for local development
+        return MemorySaver()
+
+    else:
+        raise ValueError(f"Unknown checkpointer backend: {backend}")
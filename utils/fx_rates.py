@@ -0,0 +1,144 @@
+import calendar
+import json
+import threading
+import time
+from typing import Dict, Sequence
+
+import numpy as np
+
+from configuration.config import FX_FALLBACK_PATH, FX_RATES_URL, FX_REFRESH_SECONDS, FX_RETRY_SECONDS
+from utils.http_client import http_session
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class _Snapshot:
+    """Immutable set of rates against one base currency; swapped whole on refresh"""
+
+    def __init__(self, base: str, rates: Dict[str, float], as_of: float, source: str, fetched_at: float):
+        rates = {code.upper(): float(rate) for code, rate in rates.items()}
+        self.base = base.upper()
+        self.codes = sorted(rates)
+        self.index = {code: position for position, code in enumerate(self.codes)}
+        self.per_base = np.array([rates[code] for code in self.codes])
+        self.as_of = as_of
+        self.source = source
+        self.fetched_at = fetched_at
+
+
+class FXRateTable:
+    """In-process FX rate table with cross rates through a single base currency.
+
+    Starts from the bundled fallback snapshot, refreshes from FX_RATES_URL in a
+    background thread once the snapshot is older than `refresh_seconds`, and keeps
+    serving the last good snapshot whenever the upstream fails or rate-limits, so a
+    conversion never waits on the network.
+    """
+
+    def __init__(self, url: str = FX_RATES_URL, refresh_seconds: float = FX_REFRESH_SECONDS,
+                 retry_seconds: float = FX_RETRY_SECONDS, fallback_path: str = FX_FALLBACK_PATH, http=None):
+        self.url = url
+        self.refresh_seconds = refresh_seconds
+        self.retry_seconds = retry_seconds
+        self.http = http or http_session
+        self._snapshot = self._load_fallback(fallback_path)
+        self._last_attempt = 0.0
+        self._refreshing = False
+        self._lock = threading.Lock()
+        self._counters = {"refreshes": 0, "refresh_failures": 0, "conversions": 0}
+
+    def _load_fallback(self, path: str) -> _Snapshot:
+        with open(path, encoding="utf-8") as fallback_file:
+            data = json.load(fallback_file)
+        as_of = calendar.timegm(time.strptime(data["as_of"], "%Y-%m-%d"))
+        # fetched_at=0 makes the first lookup schedule a refresh
+        return _Snapshot(data["base"], data["rates"], as_of, "bundled snapshot", fetched_at=0.0)
+
+    def refresh(self) -> bool:
+        """Fetch a new snapshot now; on failure the current one stays in place"""
+        self._last_attempt = time.time()
+        try:
+            response = self.http.get(self.url)
+            response.raise_for_status()
+            data = response.json()
+            if data.get("result", "success") != "success" or not data.get("rates"):
+                raise ValueError(f"unexpected rates payload: {data.get('error-type') or data.get('result')}")
+            now = time.time()
+            self._snapshot = _Snapshot(
+                data.get("base_code") or data.get("base") or "USD", data["rates"],
+                as_of=float(data.get("time_last_update_unix") or now), source=self.url, fetched_at=now,
+            )
+            self._counters["refreshes"] += 1
+            return True
+        except Exception as e:
+            self._counters["refresh_failures"] += 1
+            logger.warning("FX rate refresh failed", extra={"keeping": self._snapshot.source, "error": str(e)})
+            return False
+        finally:
+            self._refreshing = False
+
+    def refresh_in_background(self):
+        """Start a refresh thread unless one is already running"""
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+        threading.Thread(target=self.refresh, name="fx-refresh", daemon=True).start()
+
+    def _current(self) -> _Snapshot:
+        snapshot = self._snapshot
+        now = time.time()
+        if now - snapshot.fetched_at > self.refresh_seconds and now - self._last_attempt > self.retry_seconds:
+            self.refresh_in_background()
+        return snapshot
+
+    def _positions(self, snapshot: _Snapshot, codes: Sequence[str]) -> np.ndarray:
+        try:
+            return np.array([snapshot.index[code.strip().upper()] for code in codes], dtype=int)
+        except KeyError as e:
+            raise ValueError(f"Unknown currency code: {e.args[0]}") from None
+
+    def rate(self, from_currency: str, to_currency: str) -> float:
+        """Units of to_currency per unit of from_currency"""
+        snapshot = self._current()
+        source, target = self._positions(snapshot, (from_currency, to_currency))
+        return float(snapshot.per_base[target] / snapshot.per_base[source])
+
+    def convert(self, amount: float, from_currency: str, to_currency: str) -> float:
+        self._counters["conversions"] += 1
+        return float(amount) * self.rate(from_currency, to_currency)
+
+    def convert_many(self, amounts: Sequence[float], from_currencies: Sequence[str], to_currencies: Sequence[str]) -> np.ndarray:
+        """Element-wise conversion of parallel sequences in one vectorized step"""
+        snapshot = self._current()
+        sources = self._positions(snapshot, from_currencies)
+        targets = self._positions(snapshot, to_currencies)
+        self._counters["conversions"] += len(sources)
+        return np.asarray(amounts, dtype=float) * snapshot.per_base[targets] / snapshot.per_base[sources]
+
+    def rates_from(self, base: str, codes: Sequence[str]) -> Dict[str, float]:
+        """{code: units per one `base`} for each code; unknown codes raise ValueError"""
+        snapshot = self._current()
+        values = snapshot.per_base[self._positions(snapshot, codes)] / snapshot.per_base[self._positions(snapshot, [base])[0]]
+        return {code.strip().upper(): float(value) for code, value in zip(codes, values)}
+
+    def describe(self) -> str:
+        """Short provenance line for tool output"""
+        snapshot = self._snapshot
+        return f"rates as of {time.strftime('%Y-%m-%d %H:%M UTC', time.gmtime(snapshot.as_of))} ({snapshot.source})"
+
+    def stats(self) -> dict:
+        snapshot = self._snapshot
+        return {
+            "base": snapshot.base,
+            "currencies": len(snapshot.codes),
+            "source": snapshot.source,
+            "as_of": snapshot.as_of,
+            "age_seconds": round(time.time() - (snapshot.fetched_at or snapshot.as_of)),
+            **self._counters,
+        }
+
+
+# Shared rate table for all conversions in the process
+fx_rates = FXRateTable()
@@ -0,0 +1,171 @@
+import asyncio
+import random
+import threading
+import time
+from typing import Optional
+from urllib.parse import urlsplit
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+
+from configuration.config import (
+    HTTP_BACKOFF_SECONDS,
+    HTTP_MAX_CONNECTIONS,
+    HTTP_MAX_CONNECTIONS_PER_HOST,
+    HTTP_MAX_RETRIES,
+    HTTP_MAX_RETRY_AFTER_SECONDS,
+    HTTP_TIMEOUT_SECONDS,
+)
+from utils.tracing import tracer
+
+# Upstream responses worth retrying (rate limited or transient server errors)
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+def _span_attributes(method: str, url: str) -> dict:
+    # Path only: query strings carry API keys
+    parts = urlsplit(str(url))
+    return {"http.request.method": method, "server.address": parts.netloc, "url.path": parts.path}
+
+
+class TracedHTTPAdapter(HTTPAdapter):
+    """requests adapter that wraps every request (e.g. googlemaps SDK calls) in a client span"""
+
+    def send(self, request, **kwargs):
+        with tracer.start_as_current_span(f"HTTP {request.method}", attributes=_span_attributes(request.method, request.url)) as span:
+            response = super().send(request, **kwargs)
+            span.set_attribute("http.response.status_code", response.status_code)
+            return response
+
+
+class HTTPSession:
+    """Shared, lifecycle-managed HTTP layer for every tool backend.
+
+    Holds one sync and one async httpx client with keep-alive connection pools
+    (created on first use, closed on app shutdown), caps in-flight requests per
+    host, and retries transport errors and 429/5xx responses with exponential
+    backoff. A Retry-After of up to `max_retry_after` seconds is honoured; a longer
+    one is not waited out (it would hold the caller past the tool timeout), the
+    response is returned as is. SDKs that require `requests` can get a pooled
+    session from `requests_session()`.
+    """
+
+    def __init__(self, timeout: float = HTTP_TIMEOUT_SECONDS, max_connections: int = HTTP_MAX_CONNECTIONS,
+                 max_connections_per_host: int = HTTP_MAX_CONNECTIONS_PER_HOST, max_retries: int = HTTP_MAX_RETRIES,
+                 backoff_seconds: float = HTTP_BACKOFF_SECONDS, max_retry_after: float = HTTP_MAX_RETRY_AFTER_SECONDS):
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self.max_connections_per_host = max_connections_per_host
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self.max_retry_after = max_retry_after
+        self._client = None
+        self._aclient = None
+        self._host_limits = {}
+        self._ahost_limits = {}
+        self._lock = threading.Lock()
+
+    def _limits(self) -> httpx.Limits:
+        return httpx.Limits(max_connections=self.max_connections, max_keepalive_connections=self.max_connections, keepalive_expiry=60)
+
+    @property
+    def client(self) -> httpx.Client:
+        with self._lock:
+            if self._client is None:
+                self._client = httpx.Client(timeout=self.timeout, limits=self._limits(), follow_redirects=True)
+            return self._client
+
+    @property
+    def aclient(self) -> httpx.AsyncClient:
+        with self._lock:
+            if self._aclient is None:
+                self._aclient = httpx.AsyncClient(timeout=self.timeout, limits=self._limits(), follow_redirects=True)
+            return self._aclient
+
+    def requests_session(self) -> requests.Session:
+        """Pooled requests.Session for SDK clients (e.g. googlemaps) that cannot use httpx"""
+        session = requests.Session()
+        adapter = TracedHTTPAdapter(pool_connections=self.max_connections, pool_maxsize=self.max_connections_per_host)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+    def _host_limit(self, url: str) -> threading.BoundedSemaphore:
+        host = urlsplit(url).netloc
+        with self._lock:
+            return self._host_limits.setdefault(host, threading.BoundedSemaphore(self.max_connections_per_host))
+
+    def _ahost_limit(self, url: str) -> asyncio.Semaphore:
+        host = urlsplit(url).netloc
+        with self._lock:
+            return self._ahost_limits.setdefault(host, asyncio.Semaphore(self.max_connections_per_host))
+
+    def _retry_delay(self, attempt: int, response: Optional[httpx.Response]) -> Optional[float]:
+        """Seconds to wait before the next attempt, or None when the server asks for longer than we wait"""
+        retry_after = response.headers.get("Retry-After") if response is not None else None
+        if retry_after and retry_after.isdigit():
+            return float(retry_after) if float(retry_after) <= self.max_retry_after else None
+        # Exponential backoff with jitter so synchronized callers spread out
+        return self.backoff_seconds * (2 ** attempt) * (0.5 + random.random())
+
+    def request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        with tracer.start_as_current_span(f"HTTP {method}", attributes=_span_attributes(method, url)) as span:
+            for attempt in range(self.max_retries + 1):
+                response = None
+                span.set_attribute("http.request.resend_count", attempt)
+                try:
+                    with self._host_limit(url):
+                        response = self.client.request(method, url, **kwargs)
+                    delay = self._retry_delay(attempt, response)
+                    if response.status_code not in RETRY_STATUSES or attempt == self.max_retries or delay is None:
+                        span.set_attribute("http.response.status_code", response.status_code)
+                        return response
+                except httpx.TransportError:
+                    if attempt == self.max_retries:
+                        raise
+                    delay = self._retry_delay(attempt, None)
+                time.sleep(delay)
+
+    async def arequest(self, method: str, url: str, **kwargs) -> httpx.Response:
+        with tracer.start_as_current_span(f"HTTP {method}", attributes=_span_attributes(method, url)) as span:
+            for attempt in range(self.max_retries + 1):
+                response = None
+                span.set_attribute("http.request.resend_count", attempt)
+                try:
+                    async with self._ahost_limit(url):
+                        response = await self.aclient.request(method, url, **kwargs)
+                    delay = self._retry_delay(attempt, response)
+                    if response.status_code not in RETRY_STATUSES or attempt == self.max_retries or delay is None:
+                        span.set_attribute("http.response.status_code", response.status_code)
+                        return response
+                except httpx.TransportError:
+                    if attempt == self.max_retries:
+                        raise
+                    delay = self._retry_delay(attempt, None)
+                await asyncio.sleep(delay)
+
+    def get(self, url: str, **kwargs) -> httpx.Response:
+        return self.request("GET", url, **kwargs)
+
+    async def aget(self, url: str, **kwargs) -> httpx.Response:
+        return await self.arequest("GET", url, **kwargs)
+
+    def close(self):
+        with self._lock:
+            if self._client is not None:
+                self._client.close()
+                self._client = None
+
+    async def aclose(self):
+        """Close both clients (on app shutdown); the next request opens new ones"""
+        self.close()
+        with self._lock:
+            aclient, self._aclient = self._aclient, None
+            self._ahost_limits = {}
+        if aclient is not None:
+            await aclient.aclose()
+
+
+# Shared by every tool backend in the process; closed on app shutdown
+http_session = HTTPSession()
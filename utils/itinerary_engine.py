@@ -0,0 +1,356 @@
+import math
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from configuration.config import ITINERARY_DAY_MINUTES, ITINERARY_TRAVEL_SPEED_KMH, ITINERARY_VISIT_MINUTES
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+EARTH_RADIUS_KM = 6371.0088
+GEOCODE_CONCURRENCY = 8
+
+# "Name (lat, lon)" as produced by the destination tools; coordinates are optional
+_POI_PATTERN = re.compile(r"^(?P<name>.*?)\s*\(\s*(?P<lat>-?\d+(?:\.\d+)?)\s*,\s*(?P<lon>-?\d+(?:\.\d+)?)\s*\)\s*$")
+# Split on commas, semicolons or newlines that are not inside parentheses
+_POI_SEPARATOR = re.compile(r"\s*(?:[;\n]|,(?![^()]*\)))\s*")
+
+
+def parse_attractions(attractions: str) -> List[Tuple[str, Optional[Tuple[float, float]]]]:
+    """Split the tool input into (name, (lat, lon) or None) pairs"""
+    parsed = []
+    for item in _POI_SEPARATOR.split(attractions.strip()):
+        if not item:
+            continue
+        match = _POI_PATTERN.match(item)
+        if match:
+            parsed.append((match["name"], (float(match["lat"]), float(match["lon"]))))
+        else:
+            parsed.append((item, None))
+    return parsed
+
+
+def haversine_matrix(coords: np.ndarray) -> np.ndarray:
+    """Pairwise great-circle distances in km for an (n, 2) array of (lat, lon) degrees"""
+    lat, lon = np.radians(coords).T
+    half_dlat = (lat[:, None] - lat[None, :]) / 2
+    half_dlon = (lon[:, None] - lon[None, :]) / 2
+    a = np.sin(half_dlat) ** 2 + np.cos(lat)[:, None] * np.cos(lat)[None, :] * np.sin(half_dlon) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def path_legs(coords: np.ndarray, path: Sequence[int]) -> np.ndarray:
+    """Great-circle km of each consecutive leg along a path"""
+    lat, lon = np.radians(coords[np.asarray(path)]).T
+    a = np.sin(np.diff(lat) / 2) ** 2 + np.cos(lat[:-1]) * np.cos(lat[1:]) * np.sin(np.diff(lon) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def _unit_vectors(coords: np.ndarray) -> np.ndarray:
+    # k-means on points of the unit sphere: Euclidean distance there is monotonic in great-circle distance
+    lat, lon = np.radians(coords).T
+    return np.column_stack((np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)))
+
+
+def kmeans(coords: np.ndarray, k: int, iterations: int = 50, seed: int = 0) -> np.ndarray:
+    """Cluster label per point (k-means++ seeding, deterministic for a given seed)"""
+    points = _unit_vectors(coords)
+    n = len(points)
+    rng = np.random.default_rng(seed)
+    centers = np.empty((k, 3))
+    centers[0] = points[rng.integers(n)]
+    closest = ((points - centers[0]) ** 2).sum(axis=1)
+    for c in range(1, k):
+        total = closest.sum()
+        index = rng.choice(n, p=closest / total) if total > 0 else rng.integers(n)
+        centers[c] = points[index]
+        closest = np.minimum(closest, ((points - centers[c]) ** 2).sum(axis=1))
+
+    labels = np.zeros(n, dtype=int)
+    for iteration in range(iterations):
+        # |p - c|^2 = 2 - 2 p.c on the unit sphere, so the nearest centre maximizes the dot product
+        new_labels = (points @ centers.T).argmax(axis=1)
+        if iteration and np.array_equal(new_labels, labels):
+            break
+        labels = new_labels
+        sums = np.zeros((k, 3))
+        np.add.at(sums, labels, points)
+        counts = np.bincount(labels, minlength=k)
+        occupied = counts > 0
+        centers[occupied] = sums[occupied] / np.linalg.norm(sums[occupied], axis=1, keepdims=True)
+    return labels
+
+
+def two_opt(dist: np.ndarray, path: List[int], max_passes: int = 50) -> List[int]:
+    """Improve an open path with 2-opt moves (each pass vectorized over the second edge)"""
+    m = len(path)
+    # A zero-cost dummy node turns the open path into a tour, so the endpoints are free to move
+    padded = np.zeros((m + 1, m + 1))
+    padded[:m, :m] = dist
+    tour = np.array([m] + list(path))
+    n = m + 1
+    for _ in range(max_passes):
+        improved = False
+        for i in range(1, n - 1):
+            j = np.arange(i + 1, n)
+            a, b = tour[i - 1], tour[i]
+            c, d = tour[j], tour[(j + 1) % n]
+            delta = padded[a, c] + padded[b, d] - padded[a, b] - padded[c, d]
+            best = int(delta.argmin())
+            if delta[best] < -1e-9:
+                end = j[best]
+                tour[i:end + 1] = tour[i:end + 1][::-1].copy()
+                improved = True
+        if not improved:
+            break
+    return tour[1:].tolist()
+
+
+def nearest_neighbour_path(dist: np.ndarray) -> List[int]:
+    """Greedy open path starting from the outermost stop"""
+    m = len(dist)
+    start = int(dist.sum(axis=1).argmax())
+    visited = np.zeros(m, dtype=bool)
+    visited[start] = True
+    path = [start]
+    for _ in range(m - 1):
+        nxt = int(np.where(visited, np.inf, dist[path[-1]]).argmin())
+        visited[nxt] = True
+        path.append(nxt)
+    return path
+
+
+def route_order(dist: np.ndarray) -> List[int]:
+    """Visiting order for one day: nearest-neighbour path, then 2-opt"""
+    if len(dist) <= 2:
+        return list(range(len(dist)))
+    return two_opt(dist, nearest_neighbour_path(dist))
+
+
+class ItineraryEngine:
+    """Turns a list of geolocated attractions into day-by-day routes.
+
+    Attractions are clustered into one group per day (k-means on the sphere),
+    each day is ordered with nearest-neighbour + 2-opt over haversine distances,
+    and stops are dropped from a day, the biggest detours first, until it fits the daily time budget.
+    When the number of days is not fixed it is chosen so that every stop fits, and
+    underfilled days are then merged into their neighbours.
+    """
+
+    def __init__(self, day_minutes: float = ITINERARY_DAY_MINUTES, visit_minutes: float = ITINERARY_VISIT_MINUTES,
+                 speed_kmh: float = ITINERARY_TRAVEL_SPEED_KMH):
+        self.day_minutes = day_minutes
+        self.visit_minutes = visit_minutes
+        self.speed_kmh = speed_kmh
+
+    def _travel_minutes(self, km):
+        return km / self.speed_kmh * 60
+
+    def _day_minutes(self, stops: int, travel_km: float) -> float:
+        return stops * self.visit_minutes + self._travel_minutes(travel_km)
+
+    def _route(self, coords: np.ndarray, members: np.ndarray) -> Tuple[np.ndarray, float]:
+        """Ordered members for one day and the day's travel distance in km"""
+        if len(members) == 1:
+            return members, 0.0
+        dist = haversine_matrix(coords[members])
+        order = route_order(dist)
+        return members[order], float(dist[order[:-1], order[1:]].sum())
+
+    def _fit_day(self, dist: np.ndarray, path: List[int]) -> Tuple[List[int], List[int]]:
+        """Drop the stops that cost the most travel until the day fits; returns (kept, dropped) local indexes"""
+        path, dropped = list(path), []
+        travel_km = float(dist[path[:-1], path[1:]].sum())
+        while len(path) > 1 and self._day_minutes(len(path), travel_km) > self.day_minutes:
+            order = np.array(path)
+            saving = np.zeros(len(order))
+            saving[0] = dist[order[0], order[1]]
+            saving[-1] = dist[order[-2], order[-1]]
+            if len(order) > 2:
+                saving[1:-1] = dist[order[:-2], order[1:-1]] + dist[order[1:-1], order[2:]] - dist[order[:-2], order[2:]]
+            worst = int(saving.argmax())
+            travel_km -= saving[worst]
+            dropped.append(path.pop(worst))
+        return path, dropped
+
+    def _split_until_fits(self, coords: np.ndarray, members: np.ndarray) -> List[np.ndarray]:
+        """Route a cluster as one day, splitting it (k-means, k from its visit time) while it does not fit the budget"""
+        if len(members) * self.visit_minutes <= self.day_minutes or len(members) == 1:
+            path, travel_km = self._route(coords, members)
+            if len(members) == 1 or self._day_minutes(len(path), travel_km) <= self.day_minutes:
+                return [path]
+        # As many parts as the visit time needs rather than halves, which leave most days half empty
+        k = min(len(members), max(2, math.ceil(len(members) * self.visit_minutes / self.day_minutes)))
+        labels = kmeans(coords[members], k)
+        if labels.min() == labels.max():  # identical coordinates: split evenly
+            labels = np.arange(len(members)) * k // len(members)
+        days = []
+        for cluster in range(k):
+            part = members[labels == cluster]
+            if len(part):
+                days.extend(self._split_until_fits(coords, part))
+        return days
+
+    def _insertion(self, coords: np.ndarray, path: List[int], stop: int) -> Tuple[float, int]:
+        """(extra km, position) of the cheapest place to insert a stop into a day's path"""
+        dist = haversine_matrix(coords[[stop] + path])
+        to_stop, legs = dist[0, 1:], np.diagonal(dist, offset=1)[1:]
+        extra = np.concatenate(([to_stop[0]], to_stop[:-1] + to_stop[1:] - legs, [to_stop[-1]]))
+        position = int(extra.argmin())
+        return float(extra[position]), position
+
+    def _empty_day(self, coords: np.ndarray, days: List[List[int]], travel: List[float], source: int,
+                   neighbours: np.ndarray) -> Optional[dict]:
+        """Move every stop of a day into nearby days that still have room: {day: (path, travel km)}, or None"""
+        moved = {}
+        for stop in days[source]:
+            best = None
+            for target in neighbours:
+                path, travel_km = moved.get(target, (days[target], travel[target]))
+                if not path or (len(path) + 1) * self.visit_minutes > self.day_minutes:
+                    continue
+                extra_km, position = self._insertion(coords, path, stop)
+                if self._day_minutes(len(path) + 1, travel_km + extra_km) <= self.day_minutes and (
+                        best is None or extra_km < best[0]):
+                    best = (extra_km, target, position)
+            if best is None:
+                return None
+            extra_km, target, position = best
+            path, travel_km = moved.get(target, (days[target], travel[target]))
+            moved[target] = (path[:position] + [stop] + path[position:], travel_km + extra_km)
+        return moved
+
+    def _compact(self, coords: np.ndarray, days: List[np.ndarray], neighbours: int = 6) -> List[np.ndarray]:
+        """Merge underfilled days into their neighbours, emptiest day first, while every stop of one still fits"""
+        days = [path.tolist() for path in days]
+        travel = [float(path_legs(coords, path).sum()) for path in days]
+        changed = set()
+        merged = True
+        while merged and len(days) > 1:
+            merged = False
+            centres = _unit_vectors(np.array([coords[path].mean(axis=0) for path in days]))
+            for source in sorted(range(len(days)), key=lambda day: len(days[day])):
+                if not days[source]:
+                    continue
+                closest = np.argsort(-(centres @ centres[source]))
+                moved = self._empty_day(coords, days, travel, source, closest[closest != source][:neighbours])
+                if moved is None:
+                    continue
+                for target, (path, travel_km) in moved.items():
+                    days[target], travel[target] = path, travel_km
+                    changed.add(target)
+                days[source] = []
+                merged = True
+            kept = [day for day in range(len(days)) if days[day]]
+            changed = {position for position, day in enumerate(kept) if day in changed}
+            days, travel = [days[day] for day in kept], [travel[day] for day in kept]
+        # Stops were inserted greedily: re-route the days that grew
+        return [self._route(coords, np.array(path))[0] if day in changed else np.array(path)
+                for day, path in enumerate(days)]
+
+    def _auto_schedule(self, coords: np.ndarray) -> Tuple[List[np.ndarray], List[int]]:
+        n = len(coords)
+        # Start from the visit-time lower bound on days; clusters that do not fit are split further
+        # and the underfilled days this leaves are merged back into their neighbours
+        k = min(n, max(1, math.ceil(n * self.visit_minutes / self.day_minutes)))
+        labels = kmeans(coords, k)
+        days = []
+        for cluster in range(k):
+            members = np.flatnonzero(labels == cluster)
+            if len(members):
+                days.extend(self._split_until_fits(coords, members))
+        return self._compact(coords, days), []
+
+    def _fixed_schedule(self, coords: np.ndarray, k: int) -> Tuple[List[np.ndarray], List[int]]:
+        labels = kmeans(coords, k)
+        days, dropped = [], []
+        for cluster in range(k):
+            members = np.flatnonzero(labels == cluster)
+            if not len(members):
+                continue
+            # Trim a greedy route first so 2-opt only works on the stops that are kept
+            dist = haversine_matrix(coords[members])
+            kept, cut = self._fit_day(dist, nearest_neighbour_path(dist))
+            days.append(self._route(coords, members[kept])[0])
+            dropped.extend(members[cut].tolist())
+        return days, dropped
+
+    def plan(self, names: Sequence[str], coords: Sequence[Tuple[float, float]], days: Optional[int] = None) -> dict:
+        """Plan routes for the given stops.
+
+        Returns {"days": [{"day", "stops": [{"name", "lat", "lon", "leg_km", "leg_minutes"}],
+        "travel_km", "total_minutes"}], "unscheduled": [names]}.
+        """
+        if not names:
+            return {"days": [], "unscheduled": []}
+        coords = np.asarray(coords, dtype=float)
+        if days:
+            schedule, dropped = self._fixed_schedule(coords, min(days, len(names)))
+        else:
+            schedule, dropped = self._auto_schedule(coords)
+
+        # Days in west-to-east order of their first stop keep the output stable
+        schedule.sort(key=lambda path: (coords[path[0], 1], coords[path[0], 0]))
+        plan_days = []
+        for number, path in enumerate(schedule, start=1):
+            legs = np.concatenate(([0.0], path_legs(coords, path)))
+            stops = [{
+                "name": names[index],
+                "lat": float(coords[index, 0]),
+                "lon": float(coords[index, 1]),
+                "leg_km": round(float(leg_km), 2),
+                "leg_minutes": int(round(self._travel_minutes(leg_km))),
+            } for index, leg_km in zip(path, legs)]
+            plan_days.append({
+                "day": number,
+                "stops": stops,
+                "travel_km": round(float(legs.sum()), 1),
+                "total_minutes": int(round(self._day_minutes(len(path), legs.sum()))),
+            })
+        return {"days": plan_days, "unscheduled": [names[index] for index in dropped]}
+
+
+def format_itinerary(plan: dict, city: str, unlocated: Sequence[str] = ()) -> str:
+    """Compact markdown for the model: one line per stop with the leg before it"""
+    lines = [f"## 📍 Location-Optimized Itinerary for {city}"]
+    for day in plan["days"]:
+        hours, minutes = divmod(day["total_minutes"], 60)
+        lines.append(f"\n### Day {day['day']} ({len(day['stops'])} stops, {day['travel_km']} km travel, ~{hours}h{minutes:02d})")
+        for position, stop in enumerate(day["stops"], start=1):
+            leg = f" — {stop['leg_km']} km / {stop['leg_minutes']} min from previous" if position > 1 else ""
+            lines.append(f"{position}. {stop['name']} ({stop['lat']:.5f}, {stop['lon']:.5f}){leg}")
+    if plan["unscheduled"]:
+        lines.append(f"\n**Did not fit the daily time budget:** {', '.join(plan['unscheduled'])}")
+    if unlocated:
+        lines.append(f"\n**Could not be located:** {', '.join(unlocated)}")
+    return "\n".join(lines)
+
+
+def locate_attractions(attractions: str, city: str, geocoder: Optional[Callable[[str], Optional[Sequence[float]]]] = None):
+    """Resolve coordinates for every attraction; returns (names, coords, unlocated names)"""
+    parsed = parse_attractions(attractions)
+
+    def lookup(item):
+        name, location = item
+        if location is None and geocoder is not None:
+            try:
+                return geocoder(f"{name}, {city}")
+            except Exception as e:
+                logger.warning("Geocoding failed", extra={"attraction": name, "city": city, "error": str(e)})
+        return location
+
+    # Geocoding results are cached, but a first lookup of many names still goes out in parallel
+    with ThreadPoolExecutor(max_workers=GEOCODE_CONCURRENCY) as executor:
+        locations = list(executor.map(lookup, parsed))
+
+    names, coords, unlocated = [], [], []
+    for (name, _), location in zip(parsed, locations):
+        if location is None:
+            unlocated.append(name)
+        else:
+            names.append(name)
+            coords.append(tuple(location))
+    return names, coords, unlocated
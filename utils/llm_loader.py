@@ -1,24 +1,67 @@
-from configuration.config import LLM_PROVIDER, MODEL_NAMES, API_KEYS, BASE_URLS
+from configuration.config import (
+    API_KEYS,
+    BASE_URLS,
+    LLM_PROVIDER,
+    LLM_PROVIDERS,
+    LLM_REQUEST_TIMEOUT_SECONDS,
+    LLM_STEP_MODELS,
+    MODEL_NAMES,
+    PROMPT_CACHE_KEY,
+)
 from langchain_openai import ChatOpenAI
 from langchain_groq import ChatGroq
+from utils.llm_router import STEPS, LLMRouter, RateLimitBudget
+from utils.logger import get_logger
 
-def load_llm():
-    provider = LLM_PROVIDER
-    model_name = MODEL_NAMES[provider]
+logger = get_logger(__name__)
+
+def load_chat_model(provider: str, model_name: str, budget: RateLimitBudget = None):
+    """Chat model for one provider; with a budget, its HTTP responses keep the budget's rate-limit view current"""
     api_key = API_KEYS[provider]
     base_url = BASE_URLS[provider]
+    # Routed models fail over to the next provider instead of retrying in the SDK
+    routed = {} if budget is None else dict(
+        zip(("http_client", "http_async_client"), budget.http_clients(LLM_REQUEST_TIMEOUT_SECONDS)),
+        max_retries=0, timeout=LLM_REQUEST_TIMEOUT_SECONDS,
+    )
+    logger.info("Loading LLM", extra={"provider": provider, "model": model_name})
 
     if provider == "groq":
-        print("Loading Groq model...")
-        return ChatGroq(model=model_name, api_key=api_key)
+        return ChatGroq(model=model_name, api_key=api_key, **routed)
     
     elif provider == "openai":
-        print("Loading OpenAI model...")
-        return ChatOpenAI(model_name=model_name, api_key=api_key)
+        # OpenAI caches long prompt prefixes automatically; the key keeps our shared prefix on one cache
+        return ChatOpenAI(model_name=model_name, api_key=api_key, model_kwargs={"prompt_cache_key": PROMPT_CACHE_KEY}, **routed)
     
     elif provider == "openrouter":
-        print("Loading OpenRouter model...")
-        return ChatOpenAI(model_name=model_name, api_key=api_key, base_url=base_url)
+        return ChatOpenAI(model_name=model_name, api_key=api_key, base_url=base_url, **routed)
 
     else:
         raise ValueError(f"Unknown LLM provider: {provider}")
+
+def _parse_chain(spec: str) -> list:
+    """'groq:llama-3.1-8b-instant, openai:gpt-4o-mini' -> [("groq", "llama-3.1-8b-instant"), ("openai", "gpt-4o-mini")]"""
+    chain = []
+    for entry in filter(None, (part.strip() for part in spec.split(","))):
+        provider, _, model_name = entry.partition(":")
+        chain.append((provider, model_name or MODEL_NAMES[provider]))
+    return chain
+
+def load_llm():
+    """The configured chat model, or an LLMRouter when several providers or per-step models are configured"""
+    default_chain = [(provider, MODEL_NAMES[provider]) for provider in LLM_PROVIDERS]
+    chains = {"default": default_chain, **{step: _parse_chain(LLM_STEP_MODELS[step]) for step in STEPS}}
+    chains = {step: [(provider, name) for provider, name in chain if API_KEYS.get(provider)] for step, chain in chains.items()}
+    models = list(dict.fromkeys(entry for chain in chains.values() for entry in chain))
+
+    if len(models) <= 1:
+        provider, model_name = models[0] if models else (LLM_PROVIDER, MODEL_NAMES[LLM_PROVIDER])
+        return load_chat_model(provider, model_name)
+
+    # Providers enforce rate limits per model, so each routed model tracks its own budget
+    budgets = {f"{provider}:{name}": RateLimitBudget() for provider, name in models}
+    routed = {f"{provider}:{name}": load_chat_model(provider, name, budgets[f"{provider}:{name}"]) for provider, name in models}
+    routes = {step: [f"{provider}:{name}" for provider, name in chain] for step, chain in chains.items() if chain}
+    routes.setdefault("default", list(routed))
+    logger.info("LLM router enabled", extra={"routes": routes})
+    return LLMRouter(routed, routes, budgets=budgets)
@@ -0,0 +1,322 @@
+import asyncio
+import re
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+import httpx
+from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage, convert_to_messages
+from langchain_core.messages.utils import count_tokens_approximately
+from langchain_core.runnables import Runnable, RunnableConfig, ensure_config
+
+from configuration.config import (
+    LLM_HEDGE_DEFAULT_MS,
+    LLM_HEDGE_ENABLED,
+    LLM_HEDGE_MAX_MS,
+    LLM_HEDGE_MIN_MS,
+    LLM_OUTPUT_TOKEN_ESTIMATE,
+)
+from utils.http_client import RETRY_STATUSES
+from utils.logger import get_logger
+from utils.provider_router import CircuitBreaker, ProviderStats
+
+logger = get_logger(__name__)
+
+try:
+    from langchain_core.tracers._streaming import _StreamingCallbackHandler
+except ImportError:  # older langchain-core: treat every call as non-streaming
+    _StreamingCallbackHandler = ()
+
+STEPS = ("tool_selection", "answer")
+# Status codes that mean "this provider, right now" rather than "this request": fail over to the next one
+FAILOVER_STATUSES = RETRY_STATUSES | {408, 409}
+
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+_DURATION_UNITS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+
+
+def _reset_seconds(value: Optional[str]) -> Optional[float]:
+    """'6m0s', '7.66s', '120ms' or plain seconds -> seconds"""
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        parts = _DURATION_PART.findall(value)
+        return sum(float(amount) * _DURATION_UNITS[unit] for amount, unit in parts) if parts else None
+
+
+class RateLimitBudget:
+    """Remaining request/token budget of one provider, refreshed from its rate-limit headers.
+
+    Understands the OpenAI/Groq `x-ratelimit-{remaining,reset}-{requests,tokens}` headers,
+    OpenRouter's `x-ratelimit-remaining` / `x-ratelimit-reset` (epoch ms) and Retry-After
+    on 429. Each dispatched call is deducted locally until the next response refreshes the
+    numbers, so concurrent requests don't all pile onto the same nearly-empty provider.
+    """
+
+    def __init__(self):
+        self.requests_remaining = None
+        self.requests_reset_at = 0.0
+        self.tokens_remaining = None
+        self.tokens_reset_at = 0.0
+        self.blocked_until = 0.0
+        self.counters = {"rate_limited": 0, "skipped": 0}
+        self._lock = threading.Lock()
+
+    def update(self, headers, status_code: int):
+        now = time.time()
+        with self._lock:
+            if "x-ratelimit-remaining-requests" in headers:
+                self.requests_remaining = int(float(headers["x-ratelimit-remaining-requests"]))
+                self.requests_reset_at = now + (_reset_seconds(headers.get("x-ratelimit-reset-requests")) or 0)
+            elif "x-ratelimit-remaining" in headers:
+                self.requests_remaining = int(float(headers["x-ratelimit-remaining"]))
+                reset = float(headers.get("x-ratelimit-reset") or 0) / 1000
+                self.requests_reset_at = reset if reset > now else now
+            if "x-ratelimit-remaining-tokens" in headers:
+                self.tokens_remaining = int(float(headers["x-ratelimit-remaining-tokens"]))
+                self.tokens_reset_at = now + (_reset_seconds(headers.get("x-ratelimit-reset-tokens")) or 0)
+            if status_code == 429:
+                self.counters["rate_limited"] += 1
+                wait = _reset_seconds(headers.get("retry-after")) or max(self.requests_reset_at, self.tokens_reset_at) - now
+                self.blocked_until = now + max(wait, 1.0)
+
+    def has_room(self, tokens: int) -> bool:
+        now = time.time()
+        with self._lock:
+            if now < self.blocked_until:
+                return False
+            if self.requests_remaining is not None and self.requests_remaining <= 0 and now < self.requests_reset_at:
+                return False
+            if self.tokens_remaining is not None and self.tokens_remaining < tokens and now < self.tokens_reset_at:
+                return False
+            return True
+
+    def reserve(self, tokens: int):
+        with self._lock:
+            if self.requests_remaining is not None:
+                self.requests_remaining -= 1
+            if self.tokens_remaining is not None:
+                self.tokens_remaining -= tokens
+
+    def skipped(self):
+        with self._lock:
+            self.counters["skipped"] += 1
+
+    def snapshot(self) -> dict:
+        now = time.time()
+        with self._lock:
+            return {
+                "requests_remaining": self.requests_remaining,
+                "tokens_remaining": self.tokens_remaining,
+                "blocked_for_s": round(max(0.0, self.blocked_until - now), 1),
+                **self.counters,
+            }
+
+    def http_clients(self, timeout: float):
+        """(sync, async) httpx clients whose responses refresh this budget; passed to the chat model SDK"""
+
+        def on_response(response: httpx.Response):
+            self.update(response.headers, response.status_code)
+
+        async def aon_response(response: httpx.Response):
+            self.update(response.headers, response.status_code)
+
+        return (
+            httpx.Client(timeout=timeout, event_hooks={"response": [on_response]}),
+            httpx.AsyncClient(timeout=timeout, event_hooks={"response": [aon_response]}),
+        )
+
+
+def _should_fail_over(error: Exception) -> bool:
+    status = getattr(error, "status_code", None) or getattr(getattr(error, "response", None), "status_code", None)
+    if status is not None:
+        return status in FAILOVER_STATUSES
+    # SDK connection/timeout errors (openai and groq share these names) and plain network errors
+    return isinstance(error, (TimeoutError, ConnectionError, httpx.TransportError)) or type(error).__name__ in ("APIConnectionError", "APITimeoutError")
+
+
+def _is_streaming(config: RunnableConfig) -> bool:
+    callbacks = config.get("callbacks")
+    handlers = getattr(callbacks, "handlers", callbacks) or []
+    return any(isinstance(handler, _StreamingCallbackHandler) for handler in handlers)
+
+
+def classify_step(messages: Sequence[BaseMessage]) -> str:
+    """"tool_selection" when a user message is waiting (the model usually picks tools next);
+    "answer" once tool results are in (the model usually writes the plan)."""
+    last = next((message for message in reversed(messages) if not isinstance(message, SystemMessage)), None)
+    return "tool_selection" if isinstance(last, HumanMessage) else "answer"
+
+
+class _Health:
+    """Per-model breaker, latency stats and rate-limit budget; shared by every bound copy of a router"""
+
+    def __init__(self, keys: Sequence[str], budgets: Dict[str, RateLimitBudget]):
+        self.breakers = {key: CircuitBreaker() for key in keys}
+        self.stats = {key: ProviderStats() for key in keys}
+        self.budgets = budgets
+
+
+class LLMRouter(Runnable):
+    """Chat-model-compatible runnable that routes each call across several provider models.
+
+    - Each step ("tool_selection" / "answer", see `classify_step`, or `llm_step` in the
+      run config metadata) has its own ordered model chain.
+    - Models whose circuit is open or whose rate-limit budget can't cover the call are
+      skipped; 429/5xx/timeouts fail over to the next model, other errors are raised.
+    - Optional hedging (async, non-streaming calls): if the first model has not answered
+      within its p95 latency, the next one is started and the first answer wins.
+    - The run config is passed through, so callbacks, tags and streaming reach the chosen model.
+    """
+
+    def __init__(self, models: Dict[str, Runnable], routes: Dict[str, List[str]], health: Optional[_Health] = None,
+                 budgets: Optional[Dict[str, RateLimitBudget]] = None, hedge: bool = LLM_HEDGE_ENABLED,
+                 hedge_min_ms: float = LLM_HEDGE_MIN_MS, hedge_max_ms: float = LLM_HEDGE_MAX_MS,
+                 hedge_default_ms: float = LLM_HEDGE_DEFAULT_MS, min_samples: int = 20):
+        self.models = models
+        # A step's own chain first, then the default chain as its fallback
+        self.routes = {step: list(dict.fromkeys([*routes.get(step, []), *routes["default"]])) for step in ("default", *STEPS)}
+        self.health = health or _Health(list(models), budgets or {key: RateLimitBudget() for key in models})
+        self.hedge = hedge
+        self.hedge_min_ms = hedge_min_ms
+        self.hedge_max_ms = hedge_max_ms
+        self.hedge_default_ms = hedge_default_ms
+        self.min_samples = min_samples
+
+    @property
+    def model_name(self) -> str:
+        return "router:" + ",".join(dict.fromkeys(key for route in self.routes.values() for key in route))
+
+    def bind_tools(self, tools, **kwargs) -> "LLMRouter":
+        bound = {key: model.bind_tools(tools, **kwargs) for key, model in self.models.items()}
+        return LLMRouter(bound, self.routes, health=self.health, hedge=self.hedge, hedge_min_ms=self.hedge_min_ms,
+                         hedge_max_ms=self.hedge_max_ms, hedge_default_ms=self.hedge_default_ms, min_samples=self.min_samples)
+
+    def _messages(self, input) -> List[BaseMessage]:
+        if hasattr(input, "to_messages"):
+            return input.to_messages()
+        return convert_to_messages([input] if isinstance(input, str) else input)
+
+    def hedge_delay(self, key: str) -> float:
+        stats = self.health.stats[key]
+        p95 = stats.percentile(0.95) if len(stats.recent) >= self.min_samples else None
+        delay_ms = self.hedge_default_ms if p95 is None else min(max(p95, self.hedge_min_ms), self.hedge_max_ms)
+        return delay_ms / 1000
+
+    def _candidates(self, messages: List[BaseMessage], config: RunnableConfig) -> tuple:
+        """(ordered model keys to try, estimated tokens for the call)"""
+        step = (config.get("metadata") or {}).get("llm_step") or classify_step(messages)
+        route = self.routes.get(step) or self.routes["default"]
+        tokens = count_tokens_approximately(messages) + LLM_OUTPUT_TOKEN_ESTIMATE
+        healthy = []
+        for key in route:
+            if self.health.breakers[key].state == "open":
+                continue
+            if not self.health.budgets[key].has_room(tokens):
+                self.health.budgets[key].skipped()
+                continue
+            healthy.append(key)
+        # Everything throttled or broken: trying in priority order beats failing outright
+        return healthy or list(route), tokens
+
+    def _claim(self, key: str, tokens: int) -> bool:
+        if not self.health.breakers[key].allow():
+            return False
+        self.health.budgets[key].reserve(tokens)
+        return True
+
+    def _record(self, key: str, start: float, error: Optional[Exception]):
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        self.health.stats[key].record("successes" if error is None else "errors", elapsed_ms)
+        # Request-specific errors (bad input, context too long) say nothing about provider health
+        self.health.breakers[key].record(error is None or not _should_fail_over(error))
+
+    def invoke(self, input, config: Optional[RunnableConfig] = None, **kwargs: Any):
+        config = ensure_config(config)
+        messages = self._messages(input)
+        queue, tokens = self._candidates(messages, config)
+        last_error = None
+        for key in queue:
+            if not self._claim(key, tokens):
+                continue
+            start = time.perf_counter()
+            try:
+                result = self.models[key].invoke(messages, config, **kwargs)
+            except Exception as e:
+                self._record(key, start, e)
+                if not _should_fail_over(e):
+                    raise
+                logger.warning("LLM call failed, failing over", extra={"model": key, "error": str(e)})
+                last_error = e
+                continue
+            self._record(key, start, None)
+            if key != queue[0]:
+                self.health.stats[key].count("fallback_wins")
+            return result
+        raise last_error or RuntimeError("no LLM provider available")
+
+    async def ainvoke(self, input, config: Optional[RunnableConfig] = None, **kwargs: Any):
+        config = ensure_config(config)
+        messages = self._messages(input)
+        queue, tokens = self._candidates(messages, config)
+        hedge = self.hedge and not _is_streaming(config)
+        running: Dict[asyncio.Task, str] = {}
+        started: Dict[str, float] = {}
+        last_error = None
+        primary = None
+
+        def launch() -> Optional[str]:
+            while queue:
+                key = queue.pop(0)
+                if self._claim(key, tokens):
+                    started[key] = time.perf_counter()
+                    running[asyncio.ensure_future(self.models[key].ainvoke(messages, config, **kwargs))] = key
+                    return key
+            return None
+
+        try:
+            primary = launch()
+            while running:
+                timeout = self.hedge_delay(primary) if hedge and queue and len(running) == 1 and primary in running.values() else None
+                done, _ = await asyncio.wait(running, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    self.health.stats[primary].count("hedged_for")
+                    launch()
+                    continue
+                for task in done:
+                    key = running.pop(task)
+                    error = task.exception()
+                    self._record(key, started[key], error)
+                    if error is None:
+                        if key != primary:
+                            self.health.stats[key].count("hedge_wins" if primary in running.values() else "fallback_wins")
+                        return task.result()
+                    if not _should_fail_over(error):
+                        raise error
+                    logger.warning("LLM call failed, failing over", extra={"model": key, "error": str(error)})
+                    last_error = error
+                if not running:
+                    launch()
+        finally:
+            # Losing hedges are cancelled (and not counted against their provider); a cancelled
+            # half-open trial must give its slot back or the circuit would never let a call through again
+            for task, key in running.items():
+                task.cancel()
+                self.health.breakers[key].release_trial()
+        raise last_error or RuntimeError("no LLM provider available")
+
+    def stats(self) -> dict:
+        return {
+            "routes": {step: route for step, route in self.routes.items()},
+            "models": {
+                key: {
+                    "circuit": self.health.breakers[key].state,
+                    "hedge_delay_ms": round(self.hedge_delay(key) * 1000),
+                    "rate_limit": self.health.budgets[key].snapshot(),
+                    **self.health.stats[key].snapshot(),
+                }
+                for key in self.models
+            },
+        }
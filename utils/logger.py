@@ -0,0 +1,47 @@
+import json
+import logging
+import sys
+from datetime import datetime, timezone
+
+from configuration.config import LOG_FORMAT, LOG_LEVEL
+
+# Attributes every LogRecord has; anything else was passed via `extra=` and is emitted as a field
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "taskName"}
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per line: timestamp, level, logger, message, extra fields and exception"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        entry.update({key: value for key, value in vars(record).items() if key not in _RECORD_ATTRIBUTES})
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+def configure_logging(level: str = LOG_LEVEL, log_format: str = LOG_FORMAT):
+    """Install a single stdout handler on the root logger (idempotent)"""
+    root = logging.getLogger()
+    root.setLevel(level.upper())
+    if any(getattr(handler, "_travel_planner", False) for handler in root.handlers):
+        return
+    handler = logging.StreamHandler(sys.stdout)
+    handler._travel_planner = True
+    if log_format == "json":
+        handler.setFormatter(JSONFormatter())
+    else:
+        handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+    root.addHandler(handler)
+    # httpx logs every request at INFO; tool backends make many of them
+    logging.getLogger("httpx").setLevel(max(root.level, logging.WARNING))
+
+
+def get_logger(name: str) -> logging.Logger:
+    configure_logging()
+    return logging.getLogger(name)
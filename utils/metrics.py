@@ -0,0 +1,232 @@
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest, multiprocess
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+
+from configuration.config import ACTIVE_SESSION_WINDOW_SECONDS, PROMETHEUS_MULTIPROC_DIR
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120)
+TOKEN_BUCKETS = (100, 250, 500, 1000, 2000, 4000, 8000, 16000, 32000)
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "travel_http_request_duration_seconds", "HTTP request latency by route", ["method", "route", "status"], buckets=LATENCY_BUCKETS,
+)
+HTTP_IN_FLIGHT = Gauge("travel_http_requests_in_flight", "HTTP requests currently being served", multiprocess_mode="livesum")
+QUERY_SECONDS = Histogram(
+    "travel_query_duration_seconds", "End-to-end agent query latency", ["endpoint", "outcome"], buckets=LATENCY_BUCKETS,
+)
+GRAPH_STEPS = Histogram(
+    "travel_graph_steps", "Graph node executions (agent + tools steps) per query", buckets=(1, 2, 3, 4, 5, 7, 10, 15, 25, 50),
+)
+LLM_SECONDS = Histogram(
+    "travel_llm_call_duration_seconds", "Latency of a single chat model call", ["model", "purpose", "status"], buckets=LATENCY_BUCKETS,
+)
+LLM_TOKENS = Counter("travel_llm_tokens_total", "Tokens consumed by chat model calls", ["model", "purpose", "kind"])
+LLM_CALL_TOKENS = Histogram(
+    "travel_llm_call_tokens", "Tokens per chat model call", ["model", "purpose", "kind"], buckets=TOKEN_BUCKETS,
+)
+PROMPT_TOKENS = Histogram(
+    "travel_llm_prompt_tokens", "Estimated prompt tokens per agent call: cacheable prefix (system prompt + tool schemas) and messages",
+    ["step", "part"], buckets=TOKEN_BUCKETS,
+)
+ADMISSION_QUEUE_SECONDS = Histogram(
+    "travel_admission_queue_seconds", "Time a query waited for an agent slot (admitted, timeout, cancelled)", ["outcome"],
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60),
+)
+ADMISSION_QUEUE_DEPTH = Gauge("travel_admission_queue_depth", "Queries waiting for an agent slot", multiprocess_mode="livesum")
+AGENT_RUNS_IN_FLIGHT = Gauge("travel_agent_runs_in_flight", "Admitted queries currently running the agent", multiprocess_mode="livesum")
+ADMISSION_REJECTIONS = Counter(
+    "travel_admission_rejections_total", "Queries turned away before the agent (rate limits, full queue, queue timeout)", ["reason"],
+)
+BUDGET_EXHAUSTED = Counter(
+    "travel_agent_budget_exhausted_total", "Agent runs cut short by their per-request budget, by the limit reached", ["limit"],
+)
+PLAN_JOBS = Counter(
+    "travel_plan_jobs_total", "Background plan job events (submitted, deduplicated, resumed, recovered, retried, succeeded, failed, lost)",
+    ["event"],
+)
+PLAN_JOB_QUEUE_SECONDS = Histogram(
+    "travel_plan_job_queue_seconds", "Time from a plan job's submission to its first run", buckets=LATENCY_BUCKETS,
+)
+TOOL_SECONDS = Histogram(
+    "travel_tool_call_duration_seconds", "Latency of a single tool call", ["tool", "status"], buckets=LATENCY_BUCKETS,
+)
+TOOL_CALLS = Counter("travel_tool_calls_total", "Tool calls by outcome (ok, error, timeout)", ["tool", "status"])
+
+
+def observe_tool(tool: str, status: str, seconds: float):
+    TOOL_SECONDS.labels(tool, status).observe(seconds)
+    TOOL_CALLS.labels(tool, status).inc()
+
+
+def observe_prompt(step: str, prefix_tokens: int, message_tokens: int):
+    PROMPT_TOKENS.labels(step, "prefix").observe(prefix_tokens)
+    PROMPT_TOKENS.labels(step, "messages").observe(message_tokens)
+
+
+class SessionTracker:
+    """Sessions seen within the last `window` seconds, exported as a gauge at scrape time"""
+
+    def __init__(self, window: float = ACTIVE_SESSION_WINDOW_SECONDS):
+        self.window = window
+        self._last_seen: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def touch(self, session_id: str):
+        with self._lock:
+            self._last_seen[session_id] = time.monotonic()
+        if PROMETHEUS_MULTIPROC_DIR:
+            # Gauge files can't call back at scrape time; summed over workers (a session may count once per worker)
+            ACTIVE_SESSIONS.set(self.active())
+
+    def active(self) -> int:
+        cutoff = time.monotonic() - self.window
+        with self._lock:
+            # Forget expired sessions while counting, so the map stays bounded by the window
+            for session_id in [s for s, seen in self._last_seen.items() if seen < cutoff]:
+                del self._last_seen[session_id]
+            return len(self._last_seen)
+
+
+ACTIVE_SESSIONS = Gauge(
+    "travel_active_sessions", f"Sessions with a request in the last {ACTIVE_SESSION_WINDOW_SECONDS}s", multiprocess_mode="livesum",
+)
+active_sessions = SessionTracker()
+if not PROMETHEUS_MULTIPROC_DIR:
+    ACTIVE_SESSIONS.set_function(active_sessions.active)
+
+
+class MetricsCallbackHandler(BaseCallbackHandler):
+    """Per-run LangChain callback: chat model latency/tokens and graph step count.
+
+    Create one per graph invocation (passed in the run config); callbacks reach the
+    nested LLM calls. Calls tagged `summary_tag` are labelled purpose="summary".
+    """
+
+    def __init__(self, summary_tag: str = ""):
+        self.summary_tag = summary_tag
+        self._llm_runs: Dict[UUID, tuple] = {}
+        self._root: Optional[UUID] = None
+        self.steps = 0
+
+    def on_chain_start(self, serialized, inputs, *, run_id: UUID, parent_run_id: Optional[UUID] = None, metadata=None, **kwargs: Any):
+        if parent_run_id is None and self._root is None:
+            self._root = run_id
+        # A graph node's own run carries its node name; the functions it wraps run under it
+        node = (metadata or {}).get("langgraph_node")
+        if node and kwargs.get("name") == node:
+            self.steps += 1
+
+    def _finish_root(self, run_id: UUID):
+        if run_id == self._root:
+            GRAPH_STEPS.observe(self.steps)
+            self._root = None
+
+    def on_chain_end(self, outputs, *, run_id: UUID, **kwargs: Any):
+        self._finish_root(run_id)
+
+    def on_chain_error(self, error, *, run_id: UUID, **kwargs: Any):
+        self._finish_root(run_id)
+
+    def on_chat_model_start(self, serialized, messages, *, run_id: UUID, tags=None, **kwargs: Any):
+        params = kwargs.get("invocation_params") or {}
+        model = params.get("model") or params.get("model_name") or (serialized or {}).get("name") or "unknown"
+        purpose = "summary" if self.summary_tag and self.summary_tag in (tags or []) else "agent"
+        self._llm_runs[run_id] = (str(model), purpose, time.perf_counter())
+
+    def on_llm_end(self, response, *, run_id: UUID, **kwargs: Any):
+        run = self._llm_runs.pop(run_id, None)
+        if run is None:
+            return
+        model, purpose, started = run
+        LLM_SECONDS.labels(model, purpose, "ok").observe(time.perf_counter() - started)
+        for kind, tokens in _token_usage(response).items():
+            LLM_TOKENS.labels(model, purpose, kind).inc(tokens)
+            LLM_CALL_TOKENS.labels(model, purpose, kind).observe(tokens)
+
+    def on_llm_error(self, error, *, run_id: UUID, **kwargs: Any):
+        run = self._llm_runs.pop(run_id, None)
+        if run is not None:
+            model, purpose, started = run
+            LLM_SECONDS.labels(model, purpose, "error").observe(time.perf_counter() - started)
+
+
+def _token_usage(response) -> Dict[str, int]:
+    """{"input": n, "output": n, "cached_input": n} from the message usage_metadata, or the provider's llm_output.
+
+    "cached_input" (the part of the input served from the provider's prompt cache) is only
+    present when the provider reports it.
+    """
+    for generations in response.generations or []:
+        for generation in generations:
+            usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+            if usage:
+                tokens = {"input": usage.get("input_tokens", 0), "output": usage.get("output_tokens", 0)}
+                cached = (usage.get("input_token_details") or {}).get("cache_read")
+                return {**tokens, "cached_input": cached} if cached is not None else tokens
+    usage = (response.llm_output or {}).get("token_usage") or {}
+    if usage:
+        tokens = {"input": usage.get("prompt_tokens", 0), "output": usage.get("completion_tokens", 0)}
+        cached = (usage.get("prompt_tokens_details") or {}).get("cached_tokens")
+        return {**tokens, "cached_input": cached} if cached is not None else tokens
+    return {}
+
+
+class CacheStatsCollector:
+    """Exposes the hit/miss counters the caches already keep, read at scrape time"""
+
+    def __init__(self, sources: Dict[str, Callable[[], dict]]):
+        self.sources = sources
+
+    def collect(self):
+        hits = CounterMetricFamily("travel_cache_hits", "Cache hits", labels=["cache", "namespace"])
+        misses = CounterMetricFamily("travel_cache_misses", "Cache misses", labels=["cache", "namespace"])
+        ratio = GaugeMetricFamily("travel_cache_hit_ratio", "Cache hit ratio since start", labels=["cache", "namespace"])
+        for cache, stats in ((name, source()) for name, source in self.sources.items()):
+            if not stats.get("enabled", True):
+                continue
+            if cache == "tool_cache":
+                for namespace, counters in stats["namespaces"].items():
+                    hits.add_metric([cache, namespace], counters["hits"])
+                    misses.add_metric([cache, namespace], counters["misses"])
+                    ratio.add_metric([cache, namespace], counters["hit_ratio"])
+            elif cache == "answer_cache":
+                hits.add_metric([cache, "exact"], stats["exact_hits"])
+                hits.add_metric([cache, "semantic"], stats["semantic_hits"])
+                misses.add_metric([cache, ""], stats["misses"])
+                ratio.add_metric([cache, ""], stats["hit_ratio"])
+            elif cache == "single_flight":
+                # A coalesced call is a "hit": it shared a leader's in-flight upstream request
+                hits.add_metric([cache, ""], stats["shared"])
+                misses.add_metric([cache, ""], stats["executions"])
+                ratio.add_metric([cache, ""], stats["dedup_ratio"])
+        yield from (hits, misses, ratio)
+
+
+_scrape_collectors = []
+
+
+def register_cache_collector(sources: Dict[str, Callable[[], dict]]):
+    collector = CacheStatsCollector(sources)
+    _scrape_collectors.append(collector)
+    REGISTRY.register(collector)
+
+
+def render_metrics() -> tuple:
+    """(body, content type) for the /metrics endpoint.
+
+    With several worker processes, counters, histograms and gauges are read from
+    every worker's files in PROMETHEUS_MULTIPROC_DIR; the cache collectors still
+    describe the worker answering the scrape.
+    """
+    if not PROMETHEUS_MULTIPROC_DIR:
+        return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    for collector in _scrape_collectors:
+        registry.register(collector)
+    return generate_latest(registry), CONTENT_TYPE_LATEST
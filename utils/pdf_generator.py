@@ -1,8 +1,18 @@
 
 
 from fpdf import FPDF
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from configuration.config import PDF_CACHE_MAX_BYTES, PDF_RENDER_WORKERS, PDF_STREAM_CHUNK_BYTES
+import asyncio
+import hashlib
 import io
 import datetime
+import multiprocessing
+import threading
+from typing import Optional
+
+from utils.singleflight import SingleFlight
 
 def remove_non_latin1(text: str) -> str:
     return text.encode("latin-1", "ignore").decode("latin-1")
@@ -19,6 +29,14 @@ class CustomFPDF(FPDF):
         self.cell(0, 10, 'Page ' + str(self.page_no()) + '/{nb}', 0, 0, 'C')
 
 def generate_pdf_from_text(text: str) -> io.BytesIO:
+    return io.BytesIO(render_pdf_bytes(text, generated_on=datetime.datetime.now()))
+
+def render_pdf_bytes(text: str, generated_on: Optional[datetime.datetime] = None) -> bytes:
+    """Render the travel plan to PDF bytes (CPU bound; the server runs it in a worker process).
+
+    The "Generated on" subheading is only added when `generated_on` is given, so cached
+    renders stay the same for every download of a plan.
+    """
     pdf = CustomFPDF() # Use the custom FPDF class
     pdf.alias_nb_pages() # Required for {nb} alias in footer
     pdf.add_page()
@@ -29,9 +47,10 @@ def generate_pdf_from_text(text: str) -> io.BytesIO:
     pdf.cell(0, 10, remove_non_latin1("AI-Generated Travel Plan"), ln=True, align='C')
     
     # Subheading with date
-    pdf.set_font("Arial", "", 10)
-    generated_date = remove_non_latin1(datetime.datetime.now().strftime('%Y-%m-%d at %H:%M'))
-    pdf.cell(0, 10, f"Generated on: {generated_date}", ln=True, align='C')
+    if generated_on is not None:
+        pdf.set_font("Arial", "", 10)
+        generated_date = remove_non_latin1(generated_on.strftime('%Y-%m-%d at %H:%M'))
+        pdf.cell(0, 10, f"Generated on: {generated_date}", ln=True, align='C')
     
     pdf.ln(10)  # Add space
 
@@ -65,6 +84,80 @@ def generate_pdf_from_text(text: str) -> io.BytesIO:
     pdf.set_text_color(100, 100, 100)
     pdf.multi_cell(0, 8, remove_non_latin1("*This travel plan was generated using AI. Please verify key details before finalizing bookings.*"))
 
-    # Output to BytesIO for download
-    pdf_bytes = pdf.output(dest='S').encode('latin1')
-    return io.BytesIO(pdf_bytes)
\ No newline at end of file
+    return pdf.output(dest='S').encode('latin1')
+
+def plan_hash(text: str) -> str:
+    """Content hash of a plan, used as the PDF cache key and ETag"""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+def iter_chunks(data: bytes, chunk_size: int = PDF_STREAM_CHUNK_BYTES):
+    """Yield the PDF in fixed-size chunks for a StreamingResponse"""
+    view = memoryview(data)
+    for start in range(0, len(view), chunk_size):
+        yield bytes(view[start:start + chunk_size])
+
+class PDFRenderService:
+    """Renders PDFs in a process pool and caches them by content hash.
+
+    Repeated downloads of the same plan are served from an in-memory LRU bounded
+    by total size in bytes; concurrent requests for a plan that is still
+    rendering wait for the same render. Cached PDFs carry no "Generated on"
+    date, which would otherwise show the first download's time on every later one.
+    """
+
+    def __init__(self, workers: int = PDF_RENDER_WORKERS, max_cache_bytes: int = PDF_CACHE_MAX_BYTES):
+        self.workers = workers
+        self.max_cache_bytes = max_cache_bytes
+        self._executor = None
+        self._cache = OrderedDict()
+        self._cache_bytes = 0
+        self._lock = threading.Lock()
+        # Own instance: PDF downloads must not show up in the tool-call dedup counters
+        self._single_flight = SingleFlight()
+
+    def _pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # spawn: don't fork a process that is running event-loop and tool threads
+                self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"))
+            return self._executor
+
+    def _cache_get(self, key: str):
+        with self._lock:
+            data = self._cache.get(key)
+            if data is not None:
+                self._cache.move_to_end(key)
+            return data
+
+    def _cache_put(self, key: str, data: bytes):
+        with self._lock:
+            if key in self._cache or len(data) > self.max_cache_bytes:
+                return
+            self._cache[key] = data
+            self._cache_bytes += len(data)
+            while self._cache_bytes > self.max_cache_bytes:
+                _, evicted = self._cache.popitem(last=False)
+                self._cache_bytes -= len(evicted)
+
+    async def render(self, text: str) -> tuple:
+        """Return (content hash, PDF bytes), rendering off the event loop on a cache miss"""
+        key = plan_hash(text)
+        data = self._cache_get(key)
+        if data is not None:
+            return key, data
+
+        async def render_in_pool():
+            return await asyncio.get_running_loop().run_in_executor(self._pool(), render_pdf_bytes, text)
+
+        data = await self._single_flight.ado(key, render_in_pool)
+        self._cache_put(key, data)
+        return key, data
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+# Shared by the /generate-pdf endpoint
+pdf_service = PDFRenderService()
\ No newline at end of file
@@ -1,43 +1,144 @@
 import os
+import googlemaps
 from langchain_tavily import TavilySearch
 from langchain_google_community import GooglePlacesTool, GooglePlacesAPIWrapper
 from dotenv import load_dotenv
+from configuration.config import TOOL_CACHE_TTLS, HTTP_TIMEOUT_SECONDS
+from utils.cache import tool_cache
+from utils.http_client import http_session
 
 load_dotenv() 
 
+# Text-search query per place category, shared by the text and structured searches
+PLACE_QUERIES = {
+    "attractions": "top attractive places in and around {place}",
+    "restaurants": "what are the top 10 restaurants and eateries in and around {place}?",
+    "activities": "Activities in and around {place}",
+    "transportation": "What are the different modes of transportations available in {place}",
+}
+
+def _has_places(result) -> bool:
+    """Only keep real search results in the cache, not empty/no-match answers"""
+    return bool(result) and not str(result).startswith("Google Places did not find")
+
+def _has_web_results(result) -> bool:
+    """Tavily searches report unavailability/errors as text rather than raising"""
+    return bool(result) and not str(result).startswith("Unable to search")
+
 class GooglePlaceSearchTool:
     def __init__(self, api_key: str):
         self.places_wrapper = GooglePlacesAPIWrapper(gplaces_api_key=api_key)
+        # Swap in a client on the shared, pooled requests session (googlemaps cannot use httpx)
+        self.places_wrapper.google_map_client = googlemaps.Client(
+            key=api_key, timeout=HTTP_TIMEOUT_SECONDS, requests_session=http_session.requests_session()
+        )
         self.places_tool = GooglePlacesTool(api_wrapper=self.places_wrapper)
     
+    def geocode(self, query: str):
+        """
+        Returns [lat, lon] for a place name or address, or None if Google cannot find it.
+        """
+        def lookup():
+            results = self.places_wrapper.google_map_client.geocode(query)
+            if not results:
+                return None
+            location = results[0]["geometry"]["location"]
+            return [location["lat"], location["lng"]]
+
+        return tool_cache.get_or_set("geocode", (query,), TOOL_CACHE_TTLS["geocode"], lookup,
+                                     should_cache=lambda result: result is not None)
+
     def google_search_attractions(self, place: str) -> dict:
         """
         Searches for attractions in the specified place using GooglePlaces API.
         """
-        return self.places_tool.run(f"top attractive places in and around {place}")
+        return tool_cache.get_or_set(
+            "places:attractions", (place,), TOOL_CACHE_TTLS["places"],
+            lambda: self.places_tool.run(PLACE_QUERIES["attractions"].format(place=place)),
+            should_cache=_has_places,
+        )
     
     def google_search_restaurants(self, place: str) -> dict:
         """
         Searches for available restaurants in the specified place using GooglePlaces API.
         """
-        return self.places_tool.run(f"what are the top 10 restaurants and eateries in and around {place}?")
+        return tool_cache.get_or_set(
+            "places:restaurants", (place,), TOOL_CACHE_TTLS["places"],
+            lambda: self.places_tool.run(PLACE_QUERIES["restaurants"].format(place=place)),
+            should_cache=_has_places,
+        )
     
     def google_search_activity(self, place: str) -> dict:
         """
         Searches for popular activities in the specified place using GooglePlaces API.
         """
-        return self.places_tool.run(f"Activities in and around {place}")
+        return tool_cache.get_or_set(
+            "places:activities", (place,), TOOL_CACHE_TTLS["places"],
+            lambda: self.places_tool.run(PLACE_QUERIES["activities"].format(place=place)),
+            should_cache=_has_places,
+        )
 
     def google_search_transportation(self, place: str) -> dict:
         """
         Searches for available modes of transportation in the specified place using GooglePlaces API.
         """
-        return self.places_tool.run(f"What are the different modes of transportations available in {place}")
+        return tool_cache.get_or_set(
+            "places:transportation", (place,), TOOL_CACHE_TTLS["places"],
+            lambda: self.places_tool.run(PLACE_QUERIES["transportation"].format(place=place)),
+            should_cache=_has_places,
+        )
+
+    def google_search(self, category: str, place: str) -> str:
+        """
+        Text search for one category (see PLACE_QUERIES) using GooglePlaces API.
+        """
+        return {
+            "attractions": self.google_search_attractions,
+            "restaurants": self.google_search_restaurants,
+            "activities": self.google_search_activity,
+            "transportation": self.google_search_transportation,
+        }[category](place)
+
+    def google_search_places(self, category: str, place: str) -> list:
+        """
+        Structured text search for one category: a single Places call returning name, place_id, rating,
+        review count, price level, address and coordinates for each result (no per-place detail lookups).
+        """
+        def search():
+            response = self.places_wrapper.google_map_client.places(query=PLACE_QUERIES[category].format(place=place))
+            return [{
+                "place_id": result.get("place_id"),
+                "name": result.get("name"),
+                "rating": result.get("rating"),
+                "reviews": result.get("user_ratings_total", 0),
+                "price_level": result.get("price_level"),
+                "address": result.get("formatted_address", ""),
+                "lat": result.get("geometry", {}).get("location", {}).get("lat"),
+                "lon": result.get("geometry", {}).get("location", {}).get("lng"),
+            } for result in response.get("results", [])]
+
+        return tool_cache.get_or_set(
+            f"places:structured:{category}", (place,), TOOL_CACHE_TTLS["places"], search,
+            should_cache=bool,
+        )
 
 class TavilyPlaceSearchTool:
     def __init__(self):
         self.tavily_api_key = os.getenv("TAVILY_API_KEY")
         self.has_tavily = self.tavily_api_key and self.tavily_api_key != "your_tavily_api_key_here"
+        # One client for all searches instead of a new one (and new connections) per call
+        self.tavily_tool = TavilySearch(api_key=self.tavily_api_key, topic="general", include_answer="advanced") if self.has_tavily else None
+
+    def tavily_search(self, category: str, place: str) -> str:
+        """
+        Searches one place category (see PLACE_QUERIES) using TavilySearch.
+        """
+        return {
+            "attractions": self.tavily_search_attractions,
+            "restaurants": self.tavily_search_restaurants,
+            "activities": self.tavily_search_activity,
+            "transportation": self.tavily_search_transportation,
+        }[category](place)
 
     def tavily_search_attractions(self, place: str) -> str:
         """
@@ -47,8 +148,7 @@ class TavilyPlaceSearchTool:
             return f"Unable to search for attractions in {place} - API service unavailable. Please visit local tourism websites for information."
         
         try:
-            tavily_tool = TavilySearch(api_key=self.tavily_api_key, topic="general", include_answer="advanced")
-            result = tavily_tool.invoke({"query": f"top attractive places in and around {place}"})
+            result = self.tavily_tool.invoke({"query": f"top attractive places in and around {place}"})
             if isinstance(result, dict) and result.get("answer"):
                 return result["answer"]
             return str(result)
@@ -63,8 +163,7 @@ class TavilyPlaceSearchTool:
             return f"Unable to search for restaurants in {place} - API service unavailable. Please check local restaurant review websites."
         
         try:
-            tavily_tool = TavilySearch(api_key=self.tavily_api_key, topic="general", include_answer="advanced")
-            result = tavily_tool.invoke({"query": f"what are the top 10 restaurants and eateries in and around {place}."})
+            result = self.tavily_tool.invoke({"query": f"what are the top 10 restaurants and eateries in and around {place}."})
             if isinstance(result, dict) and result.get("answer"):
                 return result["answer"]
             return str(result)
@@ -79,8 +178,7 @@ class TavilyPlaceSearchTool:
             return f"Unable to search for activities in {place} - API service unavailable. Please check local tourism websites."
         
         try:
-            tavily_tool = TavilySearch(api_key=self.tavily_api_key, topic="general", include_answer="advanced")
-            result = tavily_tool.invoke({"query": f"activities in and around {place}"})
+            result = self.tavily_tool.invoke({"query": f"activities in and around {place}"})
             if isinstance(result, dict) and result.get("answer"):
                 return result["answer"]
             return str(result)
@@ -95,11 +193,60 @@ class TavilyPlaceSearchTool:
             return f"Unable to search for transportation in {place} - API service unavailable. Please check local transport authority websites."
         
         try:
-            tavily_tool = TavilySearch(api_key=self.tavily_api_key, topic="general", include_answer="advanced")
-            result = tavily_tool.invoke({"query": f"What are the different modes of transportations available in {place}"})
+            result = self.tavily_tool.invoke({"query": f"What are the different modes of transportations available in {place}"})
             if isinstance(result, dict) and result.get("answer"):
                 return result["answer"]
             return str(result)
         except Exception as e:
             return f"Unable to search for transportation in {place} - service error: {str(e)}"
-    
\ No newline at end of file
+    
+def _weighted_rating(place: dict, prior_votes: int = 50, prior_rating: float = 4.0) -> float:
+    """Rating shrunk towards a prior, so 4.9 from 8 reviews does not outrank 4.6 from 20,000"""
+    rating, votes = place.get("rating") or 0.0, place.get("reviews") or 0
+    return (votes * rating + prior_votes * prior_rating) / (votes + prior_votes) if rating else 0.0
+
+def build_destination_brief(results: dict, top_n: int) -> dict:
+    """Rank each category's places, drop duplicates across categories and keep the top N per category.
+
+    `results` maps category -> list of structured places (in PLACE_QUERIES order of priority);
+    a place found by several searches is listed once, under the first category that found it.
+    """
+    seen, brief = set(), {}
+    for category in PLACE_QUERIES:
+        places = results.get(category)
+        if not isinstance(places, list):
+            continue
+        ranked = sorted(places, key=_weighted_rating, reverse=True)
+        unique = []
+        for place in ranked:
+            key = place.get("place_id") or (place.get("name"), place.get("lat"), place.get("lon"))
+            if key in seen:
+                continue
+            seen.add(key)
+            unique.append(place)
+        brief[category] = unique[:top_n]
+    return brief
+
+def format_destination_brief(place: str, brief: dict, fallbacks: dict, max_fallback_chars: int = 600) -> str:
+    """Compact brief: one line per place with rating, price level and coordinates"""
+    lines = [f"## Destination brief: {place}", "Coordinates can be passed as-is to optimize_itinerary_by_location."]
+    for category in PLACE_QUERIES:
+        lines.append(f"\n### {category.title()}")
+        if category in fallbacks:
+            lines.append(f"(web search) {str(fallbacks[category])[:max_fallback_chars]}")
+            continue
+        places = brief.get(category) or []
+        if not places:
+            lines.append("No results found.")
+        for item in places:
+            details = []
+            if item.get("rating"):
+                details.append(f"★{item['rating']} ({item.get('reviews') or 0:,})")
+            if item.get("price_level") is not None:
+                details.append("$" * max(1, item["price_level"]))
+            address = item.get("address", "")
+            if address:
+                details.append(address if len(address) <= 60 else address[:57] + "...")
+            coords = f" ({item['lat']:.5f}, {item['lon']:.5f})" if item.get("lat") is not None else ""
+            lines.append(f"- {item['name']}{coords} · " + " · ".join(details) if details else f"- {item['name']}{coords}")
+    return "\n".join(lines)
@@ -0,0 +1,393 @@
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Optional, Tuple
+
+from langchain_core.messages import AIMessage, HumanMessage
+
+from configuration.config import (
+    PLAN_JOBS_MAX_QUEUED,
+    PLAN_JOBS_SQLITE_PATH,
+    PLAN_JOB_LEASE_SECONDS,
+    PLAN_JOB_MAX_ATTEMPTS,
+    PLAN_JOB_POLL_SECONDS,
+    PLAN_JOB_TTL_SECONDS,
+    PLAN_JOB_WORKERS,
+)
+from utils.admission import AdmissionRejected
+from utils.logger import get_logger
+from utils.metrics import PLAN_JOBS, PLAN_JOB_QUEUE_SECONDS, QUERY_SECONDS
+from utils.tracing import tracer
+
+logger = get_logger(__name__)
+
+# Columns returned by GET /plans/{id}; owner, lease and request hash stay internal
+PUBLIC_FIELDS = ("job_id", "status", "session_id", "question", "answer", "partial", "progress", "error",
+                 "attempts", "created_at", "started_at", "finished_at")
+
+
+class IdempotencyConflict(Exception):
+    """An Idempotency-Key was reused with a different request"""
+
+
+def request_hash(question: str, session_id: Optional[str]) -> str:
+    return hashlib.sha256(json.dumps([question, session_id]).encode()).hexdigest()
+
+
+class PlanJobStore:
+    """Plan jobs in SQLite, shared by every worker process on the host.
+
+    A job is "queued" until a worker claims it; the claim is a lease (`owner`, `lease_until`)
+    that the worker renews while the agent runs. A lease that runs out (the worker died or
+    was restarted) makes the job claimable again, so unfinished jobs are picked up after a
+    restart without any startup scan. Finished jobs ("succeeded", "failed") are kept for
+    `ttl_seconds`.
+    """
+
+    def __init__(self, path: str = PLAN_JOBS_SQLITE_PATH, ttl_seconds: float = PLAN_JOB_TTL_SECONDS):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._writes = 0
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS plan_jobs (
+                    job_id TEXT PRIMARY KEY,
+                    idempotency_key TEXT UNIQUE,
+                    request_hash TEXT NOT NULL,
+                    session_id TEXT NOT NULL,
+                    question TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    answer TEXT,
+                    partial TEXT NOT NULL DEFAULT '',
+                    progress TEXT NOT NULL DEFAULT '{}',
+                    error TEXT,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    base_messages INTEGER,
+                    owner TEXT,
+                    lease_until REAL,
+                    created_at REAL NOT NULL,
+                    started_at REAL,
+                    finished_at REAL
+                );
+                CREATE INDEX IF NOT EXISTS plan_jobs_status ON plan_jobs (status, created_at);
+                """
+            )
+
+    def _row(self, row) -> Optional[dict]:
+        if row is None:
+            return None
+        job = dict(row)
+        job["progress"] = json.loads(job["progress"])
+        return job
+
+    def get(self, job_id: str) -> Optional[dict]:
+        with self._lock:
+            return self._row(self._conn.execute("SELECT * FROM plan_jobs WHERE job_id = ?", (job_id,)).fetchone())
+
+    def find(self, idempotency_key: str, digest: str) -> Optional[dict]:
+        """Job created earlier with this key; IdempotencyConflict if it was for a different request"""
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM plan_jobs WHERE idempotency_key = ?", (idempotency_key,)).fetchone()
+        if row is not None and row["request_hash"] != digest:
+            raise IdempotencyConflict("Idempotency-Key was already used for a different request")
+        return self._row(row)
+
+    def create(self, question: str, session_id: Optional[str], idempotency_key: Optional[str] = None) -> Tuple[dict, bool]:
+        """(job, created); a concurrent request with the same key gets the job the first one created"""
+        digest = request_hash(question, session_id)
+        job_id = str(uuid.uuid4())
+        now = time.time()
+        try:
+            with self._lock, self._conn:
+                self._conn.execute(
+                    "INSERT INTO plan_jobs (job_id, idempotency_key, request_hash, session_id, question, status, created_at) "
+                    "VALUES (?, ?, ?, ?, ?, 'queued', ?)",
+                    (job_id, idempotency_key, digest, session_id or str(uuid.uuid4()), question, now),
+                )
+                self._writes += 1
+                # Prune periodically rather than on every submission
+                if self._writes % 64 == 0:
+                    self._conn.execute(
+                        "DELETE FROM plan_jobs WHERE status IN ('succeeded', 'failed') AND finished_at < ?",
+                        (now - self.ttl_seconds,),
+                    )
+        except sqlite3.IntegrityError:
+            existing = self.find(idempotency_key, digest) if idempotency_key else None
+            if existing is None:
+                raise
+            return existing, False
+        return self.get(job_id), True
+
+    def claim(self, lease_seconds: float) -> Optional[dict]:
+        """Leases the oldest claimable job: queued, or running on an expired lease. None if there is none.
+
+        Jobs of a session another job is running on wait, so turns of one conversation never interleave.
+        """
+        now = time.time()
+        owner = uuid.uuid4().hex
+        with self._lock, self._conn:
+            # Take the write lock up front: workers of every process claim from this table
+            self._conn.execute("BEGIN IMMEDIATE")
+            self._conn.execute(
+                "UPDATE plan_jobs SET status = 'running', owner = ?, lease_until = ?, attempts = attempts + 1, "
+                "started_at = COALESCE(started_at, ?) WHERE job_id = ("
+                "  SELECT job_id FROM plan_jobs WHERE (status = 'queued' OR (status = 'running' AND lease_until < ?))"
+                "  AND session_id NOT IN (SELECT session_id FROM plan_jobs WHERE status = 'running' AND lease_until >= ?)"
+                "  ORDER BY created_at LIMIT 1)",
+                (owner, now + lease_seconds, now, now, now),
+            )
+            row = self._conn.execute("SELECT * FROM plan_jobs WHERE owner = ?", (owner,)).fetchone()
+        return self._row(row)
+
+    def set_base_messages(self, job_id: str, owner: str, count: int):
+        """Session history length before the job's first run (later attempts check what it already added)"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE plan_jobs SET base_messages = ? WHERE job_id = ? AND owner = ? AND base_messages IS NULL",
+                (count, job_id, owner),
+            )
+
+    def heartbeat(self, job_id: str, owner: str, lease_seconds: float, partial: str, progress: dict) -> bool:
+        """Renews the lease and saves the output so far; False once the job is no longer this worker's"""
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "UPDATE plan_jobs SET lease_until = ?, partial = ?, progress = ? "
+                "WHERE job_id = ? AND owner = ? AND status = 'running'",
+                (time.time() + lease_seconds, partial, json.dumps(progress), job_id, owner),
+            )
+            return cursor.rowcount == 1
+
+    def finish(self, job_id: str, owner: str, status: str, answer: Optional[str] = None, error: Optional[str] = None,
+               progress: Optional[dict] = None):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE plan_jobs SET status = ?, answer = ?, partial = COALESCE(?, partial), error = ?, "
+                "progress = COALESCE(?, progress), finished_at = ?, owner = NULL, lease_until = NULL "
+                "WHERE job_id = ? AND owner = ?",
+                (status, answer, answer, error, json.dumps(progress) if progress is not None else None, time.time(),
+                 job_id, owner),
+            )
+
+    def release(self, job_id: str, owner: str, error: Optional[str] = None):
+        """Back to the queue (worker shutting down, or a failed attempt with attempts left)"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE plan_jobs SET status = 'queued', error = ?, owner = NULL, lease_until = NULL "
+                "WHERE job_id = ? AND owner = ?",
+                (error, job_id, owner),
+            )
+
+    def counts(self) -> dict:
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM plan_jobs GROUP BY status").fetchall()
+        return {"queued": 0, "running": 0, "succeeded": 0, "failed": 0, **{status: count for status, count in rows}}
+
+
+def public_job(job: dict) -> dict:
+    return {field: job[field] for field in PUBLIC_FIELDS}
+
+
+class PlanJobRunner:
+    """Runs plan jobs in the background, decoupled from the requests that submit and poll them.
+
+    Each worker process runs `workers` asyncio tasks that claim jobs from the shared store,
+    stream the agent's answer into it (so GET /plans/{id} shows partial output) and renew
+    the job's lease while it runs. A job interrupted by a shutdown or crash is claimed
+    again and continues from the session's last checkpoint, so finished LLM and tool
+    steps are not paid for twice; if the run had already ended, its answer is taken from
+    the session history. Failed attempts are retried up to `max_attempts` times.
+    """
+
+    def __init__(self, store: PlanJobStore, workers: int = PLAN_JOB_WORKERS, max_queued: int = PLAN_JOBS_MAX_QUEUED,
+                 lease_seconds: float = PLAN_JOB_LEASE_SECONDS, max_attempts: int = PLAN_JOB_MAX_ATTEMPTS,
+                 poll_seconds: float = PLAN_JOB_POLL_SECONDS, flush_seconds: float = 1.0):
+        self.store = store
+        self.workers = max(1, workers)
+        self.max_queued = max_queued
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max(1, max_attempts)
+        self.poll_seconds = poll_seconds
+        self.flush_seconds = min(flush_seconds, lease_seconds / 3)
+        self.graph = None
+        self.running = 0
+        # Moving average of job run time, for Retry-After estimates
+        self.average_run_seconds = 30.0
+        self._tasks = []
+        self._wakeup = None
+
+    def start(self, graph):
+        """Start the worker tasks on the running event loop"""
+        self.graph = graph
+        self._wakeup = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._worker(), name=f"plan-job-worker-{index}") for index in range(self.workers)]
+        logger.info("Plan job workers started", extra={"workers": self.workers, "path": self.store.path})
+
+    async def stop(self):
+        """Cancel the workers; the jobs they were running go back to the queue"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def find(self, idempotency_key: Optional[str], question: str, session_id: Optional[str]) -> Optional[dict]:
+        """Job an earlier request with this Idempotency-Key created, if any"""
+        if not idempotency_key:
+            return None
+        return await asyncio.to_thread(self.store.find, idempotency_key, request_hash(question, session_id))
+
+    async def submit(self, question: str, session_id: Optional[str], idempotency_key: Optional[str] = None) -> Tuple[dict, bool]:
+        """(job, created); raises AdmissionRejected when too many jobs are already waiting"""
+        counts = await asyncio.to_thread(self.store.counts)
+        if counts["queued"] >= self.max_queued:
+            PLAN_JOBS.labels("rejected").inc()
+            # Rough time for this process's workers to take the next job
+            raise AdmissionRejected("plan_queue_full", retry_after=self.average_run_seconds / self.workers)
+        job, created = await asyncio.to_thread(self.store.create, question, session_id, idempotency_key)
+        PLAN_JOBS.labels("submitted" if created else "deduplicated").inc()
+        if created and self._wakeup is not None:
+            self._wakeup.set()
+        return job, created
+
+    async def get(self, job_id: str) -> Optional[dict]:
+        return await asyncio.to_thread(self.store.get, job_id)
+
+    async def _worker(self):
+        while True:
+            # Cleared before looking, so a submission made meanwhile is not missed
+            self._wakeup.clear()
+            try:
+                job = await asyncio.to_thread(self.store.claim, self.lease_seconds)
+            except sqlite3.Error:
+                logger.exception("Plan job claim failed")
+                job = None
+            if job is None:
+                # Jobs submitted to other worker processes or with expired leases are found by polling
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.poll_seconds)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            self.running += 1
+            try:
+                await self._run(job)
+            finally:
+                self.running -= 1
+
+    async def _plan(self, job: dict, output: dict) -> str:
+        """Run (or continue) the agent for a job; returns the answer"""
+        history, interrupted = await self.graph.aget_run_state(job["session_id"])
+        if job["base_messages"] is None:
+            await asyncio.to_thread(self.store.set_base_messages, job["job_id"], job["owner"], len(history))
+        elif len(history) > job["base_messages"]:
+            added = history[job["base_messages"]:]
+            last = added[-1]
+            if not interrupted and isinstance(last, AIMessage) and not last.tool_calls and last.content:
+                # The previous attempt finished the run but not the job
+                PLAN_JOBS.labels("recovered").inc()
+                return last.content
+            if interrupted and isinstance(added[0], HumanMessage) and added[0].content == job["question"]:
+                PLAN_JOBS.labels("resumed").inc()
+                logger.info("Resuming plan job from checkpoint", extra={"job_id": job["job_id"], "attempt": job["attempts"]})
+                return await self._stream(None, job, output)
+        return await self._stream({"messages": [HumanMessage(content=job["question"])]}, job, output)
+
+    async def _stream(self, messages, job: dict, output: dict) -> str:
+        answer = ""
+        async for event in self.graph.astream_with_config(messages, job["session_id"]):
+            kind = event["type"]
+            if kind == "token":
+                output["partial"] += event["content"]
+            elif kind == "tool_start":
+                # Text streamed before a round of tool calls is not part of the answer
+                output["partial"] = ""
+                output["progress"]["tools_started"] += 1
+            elif kind == "tool_end":
+                output["progress"]["tools_finished"] += 1
+            elif kind == "done":
+                answer = event["answer"]
+            output["dirty"] = True
+        return answer
+
+    async def _keep_lease(self, job: dict, output: dict, run: asyncio.Task):
+        """Renews the lease and saves partial output; cancels the run if another worker took the job over"""
+        renewed = time.monotonic()
+        while True:
+            await asyncio.sleep(self.flush_seconds)
+            if not output["dirty"] and time.monotonic() - renewed < self.lease_seconds / 3:
+                continue
+            output["dirty"] = False
+            owned = await asyncio.to_thread(
+                self.store.heartbeat, job["job_id"], job["owner"], self.lease_seconds, output["partial"], output["progress"],
+            )
+            renewed = time.monotonic()
+            if not owned:
+                output["lost"] = True
+                run.cancel()
+                return
+
+    async def _run(self, job: dict):
+        job_id, owner = job["job_id"], job["owner"]
+        extra = {"job_id": job_id, "session_id": job["session_id"], "attempt": job["attempts"]}
+        if job["attempts"] > self.max_attempts:
+            # Its lease ran out on every attempt (e.g. the run keeps killing its worker)
+            PLAN_JOBS.labels("failed").inc()
+            await asyncio.to_thread(self.store.finish, job_id, owner, "failed", error="Gave up after repeated interruptions")
+            logger.error("Plan job abandoned", extra=extra)
+            return
+        if job["attempts"] == 1:
+            PLAN_JOB_QUEUE_SECONDS.observe(max(0.0, job["started_at"] - job["created_at"]))
+        start = time.perf_counter()
+        output = {"partial": "", "progress": {"tools_started": 0, "tools_finished": 0}, "dirty": False, "lost": False}
+        logger.info("Plan job started", extra=extra)
+        with tracer.start_as_current_span("agent.plan_job", attributes={"session_id": job["session_id"], "job_id": job_id}):
+            run = asyncio.create_task(self._plan(job, output))
+            keeper = asyncio.create_task(self._keep_lease(job, output, run))
+            try:
+                answer = await run
+            except asyncio.CancelledError:
+                if output["lost"]:
+                    PLAN_JOBS.labels("lost").inc()
+                    logger.warning("Plan job lease lost to another worker", extra=extra)
+                    return
+                # Shutting down: the next worker continues from the session's checkpoint
+                await asyncio.to_thread(self.store.release, job_id, owner)
+                logger.info("Plan job returned to the queue", extra=extra)
+                raise
+            except Exception as e:
+                QUERY_SECONDS.labels("plan_job", "error").observe(time.perf_counter() - start)
+                if job["attempts"] < self.max_attempts:
+                    PLAN_JOBS.labels("retried").inc()
+                    await asyncio.to_thread(self.store.release, job_id, owner, str(e))
+                    logger.exception("Plan job attempt failed, requeued", extra=extra)
+                else:
+                    PLAN_JOBS.labels("failed").inc()
+                    await asyncio.to_thread(self.store.finish, job_id, owner, "failed", error=str(e), progress=output["progress"])
+                    logger.exception("Plan job failed", extra=extra)
+                return
+            finally:
+                keeper.cancel()
+        await asyncio.to_thread(self.store.finish, job_id, owner, "succeeded", answer=answer, progress=output["progress"])
+        elapsed = time.perf_counter() - start
+        self.average_run_seconds += 0.1 * (elapsed - self.average_run_seconds)
+        PLAN_JOBS.labels("succeeded").inc()
+        QUERY_SECONDS.labels("plan_job", "ok").observe(elapsed)
+        logger.info("Plan job finished", extra={**extra, "duration_ms": round(elapsed * 1000), "answer_chars": len(answer)})
+
+    def stats(self) -> dict:
+        return {"workers": self.workers, "running_here": self.running, "max_queued": self.max_queued, **self.store.counts()}
+
+
+# Started and stopped by the app (main.py); the store is shared with the other worker processes
+plan_jobs = PlanJobRunner(PlanJobStore())
@@ -0,0 +1,218 @@
+import bisect
+import contextvars
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple
+
+from configuration.config import (
+    PROVIDER_BREAKER_FAILURES,
+    PROVIDER_BREAKER_RESET_SECONDS,
+    PROVIDER_HEDGE_DEFAULT_MS,
+    PROVIDER_HEDGE_MAX_MS,
+    PROVIDER_HEDGE_MIN_MS,
+    PROVIDER_POOL_SIZE,
+)
+from utils.tracing import tracer
+
+# Upper bounds (ms) of the exposed latency histogram buckets; the last bucket is open-ended
+LATENCY_BUCKETS_MS = (50, 100, 250, 500, 1000, 2500, 5000, 10000)
+# Calls faster than this are cache hits, not upstream round trips, and are kept out of the p95 window
+CACHE_HIT_FLOOR_MS = 2.0
+
+
+class ProviderUnavailable(Exception):
+    """Every provider failed, returned nothing usable, or had its circuit open"""
+
+
+class CircuitBreaker:
+    """Closed -> open after `failure_threshold` consecutive failures; after `reset_seconds`
+    one trial call is let through (half-open) and its outcome closes or re-opens the circuit."""
+
+    def __init__(self, failure_threshold: int = PROVIDER_BREAKER_FAILURES, reset_seconds: float = PROVIDER_BREAKER_RESET_SECONDS):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at = None
+        self.trial_running = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        return "half_open" if time.monotonic() - self.opened_at >= self.reset_seconds else "open"
+
+    def allow(self) -> bool:
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half_open" and not self.trial_running:
+                self.trial_running = True
+                return True
+            return False
+
+    def release_trial(self):
+        """A call that was cancelled before it finished: frees the half-open trial without closing or re-opening"""
+        with self._lock:
+            self.trial_running = False
+
+    def record(self, success: bool):
+        with self._lock:
+            self.trial_running = False
+            if success:
+                self.failures = 0
+                self.opened_at = None
+                return
+            self.failures += 1
+            if self.opened_at is not None or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+
+
+class ProviderStats:
+    """Per-provider outcome counters, a latency histogram and a rolling window for percentiles"""
+
+    def __init__(self, window: int = 200):
+        self.counters = {"calls": 0, "successes": 0, "errors": 0, "empty": 0, "hedged_for": 0, "hedge_wins": 0, "fallback_wins": 0}
+        self.buckets = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.error_buckets = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.recent = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, outcome: str, elapsed_ms: float):
+        bucket = bisect.bisect_left(LATENCY_BUCKETS_MS, elapsed_ms)
+        with self._lock:
+            self.counters["calls"] += 1
+            self.counters[outcome] += 1
+            (self.buckets if outcome == "successes" else self.error_buckets)[bucket] += 1
+            if outcome == "successes" and elapsed_ms >= CACHE_HIT_FLOOR_MS:
+                self.recent.append(elapsed_ms)
+
+    def count(self, counter: str):
+        with self._lock:
+            self.counters[counter] += 1
+
+    def percentile(self, fraction: float) -> Optional[float]:
+        with self._lock:
+            samples = sorted(self.recent)
+        if not samples:
+            return None
+        return samples[min(len(samples) - 1, int(len(samples) * fraction))]
+
+    def snapshot(self) -> dict:
+        labels = [f"le_{bound}ms" for bound in LATENCY_BUCKETS_MS] + ["gt_{}ms".format(LATENCY_BUCKETS_MS[-1])]
+        with self._lock:
+            data = dict(self.counters)
+            data["latency_histogram"] = dict(zip(labels, self.buckets))
+            data["error_latency_histogram"] = dict(zip(labels, self.error_buckets))
+            data["samples"] = len(self.recent)
+        p50, p95 = self.percentile(0.5), self.percentile(0.95)
+        data["p50_ms"] = round(p50, 1) if p50 is not None else None
+        data["p95_ms"] = round(p95, 1) if p95 is not None else None
+        return data
+
+
+class ProviderRouter:
+    """Routes a request across interchangeable providers, in priority order.
+
+    - Providers whose circuit is open are skipped (routed around) until their reset timeout.
+    - Errors and results rejected by the validator (e.g. empty) both count as failures.
+    - Hedging: if the first provider has not answered within its recent p95 latency
+      (clamped to [hedge_min_ms, hedge_max_ms]), the next provider is started too and
+      whichever valid result arrives first wins; a failure starts the next one at once.
+    """
+
+    def __init__(self, providers: Sequence[str], hedge_min_ms: float = PROVIDER_HEDGE_MIN_MS,
+                 hedge_max_ms: float = PROVIDER_HEDGE_MAX_MS, hedge_default_ms: float = PROVIDER_HEDGE_DEFAULT_MS,
+                 min_samples: int = 20, pool_size: int = PROVIDER_POOL_SIZE):
+        self.providers = list(providers)
+        self.hedge_min_ms = hedge_min_ms
+        self.hedge_max_ms = hedge_max_ms
+        self.hedge_default_ms = hedge_default_ms
+        self.min_samples = min_samples
+        self.breakers = {name: CircuitBreaker() for name in self.providers}
+        self.stats_by_provider = {name: ProviderStats() for name in self.providers}
+        self._executor = ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix="provider")
+
+    def hedge_delay(self, provider: str) -> float:
+        """Seconds to wait for `provider` before starting the next one"""
+        stats = self.stats_by_provider[provider]
+        p95 = stats.percentile(0.95) if len(stats.recent) >= self.min_samples else None
+        delay_ms = self.hedge_default_ms if p95 is None else min(max(p95, self.hedge_min_ms), self.hedge_max_ms)
+        return delay_ms / 1000
+
+    def _route(self, available: Sequence[str]) -> list:
+        """Providers allowed to take this request, healthiest first (ties keep priority order)"""
+        health = {"closed": 0, "half_open": 1, "open": 2}
+        candidates = [name for name in self.providers if name in available and self.breakers[name].state != "open"]
+        return sorted(candidates, key=lambda name: health[self.breakers[name].state])
+
+    def _attempt(self, name: str, fn: Callable[[], Any], is_valid: Callable[[Any], bool]) -> Tuple[bool, Any]:
+        """Runs in the pool; never raises. Records latency and the breaker outcome even for a losing hedge."""
+        start = time.perf_counter()
+        with tracer.start_as_current_span(f"provider {name}", attributes={"provider.name": name}) as span:
+            try:
+                result = fn()
+                outcome = "successes" if is_valid(result) else "empty"
+            except Exception as e:
+                result, outcome = e, "errors"
+                span.record_exception(e)
+            span.set_attribute("provider.outcome", outcome)
+        self.stats_by_provider[name].record(outcome, (time.perf_counter() - start) * 1000)
+        self.breakers[name].record(outcome == "successes")
+        return outcome == "successes", result
+
+    def call(self, calls: Dict[str, Callable[[], Any]], validators: Optional[Dict[str, Callable[[Any], bool]]] = None) -> Tuple[str, Any]:
+        """Run the request; returns (provider name, result) from the first provider with a valid result"""
+        validators = validators or {}
+        queue = self._route(calls)
+        if not queue:
+            raise ProviderUnavailable(f"all providers unavailable (circuits open): {', '.join(calls)}")
+
+        running = {}
+        last_error = None
+
+        def launch() -> Optional[str]:
+            # The breaker is consulted only when a provider is actually started, so a half-open
+            # trial slot is never claimed by a provider that ends up not being called
+            while queue:
+                name = queue.pop(0)
+                if self.breakers[name].allow():
+                    fn, is_valid = calls[name], validators.get(name, bool)
+                    running[self._executor.submit(contextvars.copy_context().run, self._attempt, name, fn, is_valid)] = name
+                    return name
+            return None
+
+        primary = launch()
+        if primary is None:
+            raise ProviderUnavailable(f"all providers unavailable (circuits open): {', '.join(calls)}")
+        while running:
+            timeout = self.hedge_delay(primary) if queue and len(running) == 1 and primary in running.values() else None
+            done, _ = wait(running, timeout=timeout, return_when=FIRST_COMPLETED)
+            if not done:
+                self.stats_by_provider[primary].count("hedged_for")
+                launch()
+                continue
+            for future in done:
+                name = running.pop(future)
+                ok, result = future.result()
+                if ok:
+                    if name != primary:
+                        self.stats_by_provider[name].count("hedge_wins" if primary in running.values() else "fallback_wins")
+                    return name, result
+                last_error = result
+            if not running and queue:
+                launch()
+        raise ProviderUnavailable(f"no provider returned a usable result: {last_error}")
+
+    def stats(self) -> dict:
+        return {
+            name: {"circuit": self.breakers[name].state, "hedge_delay_ms": round(self.hedge_delay(name) * 1000), **self.stats_by_provider[name].snapshot()}
+            for name in self.providers
+        }
+
+
+# Google Places first, Tavily web search as the hedge/fallback; shared by every place search tool
+places_router = ProviderRouter(["google_places", "tavily"])
@@ -0,0 +1,116 @@
+import asyncio
+import functools
+import threading
+from typing import Any, Awaitable, Callable
+
+from utils.cache import make_cache_key
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Coalesces concurrent identical calls into a single in-flight execution.
+
+    The first caller for a key (the leader) runs the function; callers arriving
+    while it is running wait and receive the same result or exception. Nothing is
+    remembered after the call completes; caching is the job of utils.cache.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._futures = {}
+        self._lock = threading.Lock()
+        self._counters = {"calls": 0, "executions": 0, "shared": 0}
+
+    def _count(self, leader: bool):
+        self._counters["calls"] += 1
+        self._counters["executions" if leader else "shared"] += 1
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Any:
+        """Run fn once for all threads that ask for `key` at the same time"""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            self._count(leader)
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    async def ado(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Asyncio variant of do(): concurrent tasks on the same loop share one awaited call"""
+        loop_key = (id(asyncio.get_running_loop()), key)
+        with self._lock:
+            future = self._futures.get(loop_key)
+            leader = future is None
+            if leader:
+                future = self._futures[loop_key] = asyncio.get_running_loop().create_future()
+            self._count(leader)
+
+        if not leader:
+            # shield: a cancelled follower must not cancel the shared call
+            return await asyncio.shield(future)
+
+        try:
+            result = await fn()
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception()  # Mark retrieved so an unawaited future doesn't log a warning
+            raise
+        finally:
+            with self._lock:
+                del self._futures[loop_key]
+
+    def stats(self) -> dict:
+        with self._lock:
+            counters = dict(self._counters)
+        counters["dedup_ratio"] = round(counters["shared"] / counters["calls"], 4) if counters["calls"] else 0.0
+        return counters
+
+
+# Shared by all tools so identical upstream requests from concurrent sessions are coalesced
+single_flight = SingleFlight()
+
+
+def coalesce(namespace: str):
+    """Decorator: concurrent calls with the same (normalized) arguments share one execution.
+
+    Works for plain functions (threaded callers) and coroutine functions (asyncio callers).
+    Apply it below @tool so the tool still sees the original signature and docstring.
+    """
+
+    def decorator(fn):
+        if asyncio.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                return await single_flight.ado(make_cache_key(namespace, *args, **kwargs), lambda: fn(*args, **kwargs))
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            return single_flight.do(make_cache_key(namespace, *args, **kwargs), lambda: fn(*args, **kwargs))
+        return wrapper
+
+    return decorator
@@ -0,0 +1,105 @@
+import threading
+from typing import Optional
+
+from opentelemetry import trace
+from opentelemetry.sdk.resources import Resource
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import BatchSpanProcessor, SpanExporter, SpanExportResult
+from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
+
+from configuration.config import (
+    TRACING_EXPORTER,
+    TRACING_JSONL_PATH,
+    TRACING_OTLP_ENDPOINT,
+    TRACING_SAMPLE_RATIO,
+    TRACING_SERVICE_NAME,
+)
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Until setup_tracing() installs a provider this returns non-recording spans, which cost almost nothing
+tracer = trace.get_tracer("ai_travel_planner")
+
+
+class JSONLSpanExporter(SpanExporter):
+    """Appends every finished span as one JSON object per line (OTLP-like field names)"""
+
+    def __init__(self, path: str = TRACING_JSONL_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = open(path, "a", encoding="utf-8")
+
+    def export(self, spans) -> SpanExportResult:
+        lines = "".join(span.to_json(indent=None) + "\n" for span in spans)
+        with self._lock:
+            self._file.write(lines)
+            self._file.flush()
+        return SpanExportResult.SUCCESS
+
+    def shutdown(self):
+        with self._lock:
+            self._file.close()
+
+
+def _load_exporter(kind: str) -> Optional[SpanExporter]:
+    if kind == "jsonl":
+        return JSONLSpanExporter()
+    if kind == "otlp":
+        try:
+            from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+        except ImportError:
+            raise ImportError("TRACING_EXPORTER=otlp requires `pip install opentelemetry-exporter-otlp-proto-http`")
+        return OTLPSpanExporter(endpoint=TRACING_OTLP_ENDPOINT)
+    if kind in ("", "none"):
+        return None
+    raise ValueError(f"Unknown tracing exporter: {kind}")
+
+
+def setup_tracing(kind: str = TRACING_EXPORTER, exporter: Optional[SpanExporter] = None) -> Optional[TracerProvider]:
+    """Install the global tracer provider; spans are exported in batches off the request path.
+
+    Returns None (tracing stays a no-op) when the exporter is "none".
+    """
+    exporter = exporter or _load_exporter(kind)
+    if exporter is None:
+        return None
+    provider = TracerProvider(
+        resource=Resource.create({"service.name": TRACING_SERVICE_NAME}),
+        sampler=ParentBased(TraceIdRatioBased(TRACING_SAMPLE_RATIO)),
+    )
+    provider.add_span_processor(BatchSpanProcessor(exporter))
+    trace.set_tracer_provider(provider)
+    logger.info("Tracing enabled", extra={"exporter": type(exporter).__name__, "sample_ratio": TRACING_SAMPLE_RATIO})
+    return provider
+
+
+def shutdown_tracing():
+    """Flush pending spans (no-op when tracing is disabled)"""
+    provider = trace.get_tracer_provider()
+    if isinstance(provider, TracerProvider):
+        provider.shutdown()
+
+
+def record_cache_lookup(namespace: str, hit: bool):
+    """Cache outcome as an event on the current span (a tool or provider call)"""
+    span = trace.get_current_span()
+    if span.is_recording():
+        span.add_event("cache_lookup", {"cache.namespace": namespace, "cache.hit": hit})
+
+
+def record_llm_response(span, response):
+    """Token usage and requested tool calls of a chat model response"""
+    if not span.is_recording():
+        return
+    usage = getattr(response, "usage_metadata", None) or {}
+    span.set_attribute("gen_ai.usage.input_tokens", usage.get("input_tokens", 0))
+    span.set_attribute("gen_ai.usage.output_tokens", usage.get("output_tokens", 0))
+    cached = (usage.get("input_token_details") or {}).get("cache_read")
+    if cached is not None:
+        span.set_attribute("gen_ai.usage.cache_read_input_tokens", cached)
+    span.set_attribute("gen_ai.response.tool_calls", len(getattr(response, "tool_calls", None) or []))
+
+
+def model_name(llm) -> str:
+    return str(getattr(llm, "model_name", None) or getattr(llm, "model", None) or type(llm).__name__)
@@ -1,40 +1,138 @@
-import requests
+from collections import Counter
+from datetime import date, datetime, timedelta, timezone
+from typing import List, Optional
+
+from configuration.config import TOOL_CACHE_TTLS
+from utils.cache import tool_cache
+from utils.http_client import http_session
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+def _is_valid_response(data) -> bool:
+    """Error payloads are returned to the caller but never cached"""
+    return isinstance(data, dict) and "error" not in data
 
 class WeatherForecastTool:
-    def __init__(self, api_key: str):
+    def __init__(self, api_key: str, http=None):
         if not api_key:
             raise ValueError("OpenWeatherMap API key is missing. Please provide a valid API key.")
         
         self.api_key = api_key
+        self.http = http or http_session  # Shared keep-alive pool with retries
         self.base_url = "https://api.openweathermap.org/data/2.5"
+        self.geo_url = "https://api.openweathermap.org/geo/1.0"
+
+    def geocode(self, place: str) -> Optional[dict]:
+        """Resolve a place name to {"name", "lat", "lon", "country"}; cached for a long time"""
+        return tool_cache.get_or_set(
+            "weather:geocode", (place,), TOOL_CACHE_TTLS["geocode"],
+            lambda: self._fetch_geocode(place),
+        )
+
+    def _location_params(self, place: str) -> dict:
+        """lat/lon query params when the place resolves, else the plain name query"""
+        location = self.geocode(place)
+        if location:
+            return {"lat": location["lat"], "lon": location["lon"]}
+        return {"q": place}
+
+    def _location_key(self, params: dict) -> tuple:
+        # Different spellings of the same place ("Goa", "Goa, India") share one cached result
+        if "lat" in params:
+            return (round(params["lat"], 2), round(params["lon"], 2))
+        return (params["q"],)
 
     def get_current_weather(self, place: str):
         """Get current weather of a place"""
+        params = self._location_params(place)
+        return tool_cache.get_or_set(
+            "weather:current", self._location_key(params), TOOL_CACHE_TTLS["weather_current"],
+            lambda: self._fetch_current_weather(place, params),
+            should_cache=_is_valid_response,
+        )
+
+    def get_forecast_weather(self, place: str):
+        """Get the full 5-day / 3-hour forecast series of a place"""
+        params = self._location_params(place)
+        return tool_cache.get_or_set(
+            "weather:forecast", self._location_key(params), TOOL_CACHE_TTLS["weather_forecast"],
+            lambda: self._fetch_forecast_weather(place, params),
+            should_cache=_is_valid_response,
+        )
+
+    def _fetch_geocode(self, place: str) -> Optional[dict]:
+        try:
+            response = self.http.get(f"{self.geo_url}/direct", params={"q": place, "limit": 1, "appid": self.api_key})
+            results = response.json() if response.status_code == 200 else []
+            if not results:
+                return None
+            match = results[0]
+            return {"name": match.get("name", place), "lat": match["lat"], "lon": match["lon"], "country": match.get("country", "")}
+        except Exception as e:
+            logger.warning("Failed to geocode place", extra={"place": place, "error": str(e)})
+            return None
+
+    def _fetch_current_weather(self, place: str, location: dict):
         try:
             url = f"{self.base_url}/weather"
             params = {
-                "q": place,
+                **location,
                 "appid": self.api_key,
                 "units": "metric"
             }
-            response = requests.get(url, params=params)
+            response = self.http.get(url, params=params)
             return response.json() if response.status_code == 200 else {"error": f"API error: {response.status_code}"}
         except Exception as e:
-            print(f"[ERROR] Failed to get current weather for '{place}': {e}")
+            logger.warning("Failed to get current weather", extra={"place": place, "error": str(e)})
             return {"error": str(e)}
 
-    def get_forecast_weather(self, place: str):
-        """Get weather forecast of a place"""
+    def _fetch_forecast_weather(self, place: str, location: dict):
         try:
             url = f"{self.base_url}/forecast"
             params = {
-                "q": place,
+                **location,
                 "appid": self.api_key,
-                "cnt": 10,
                 "units": "metric"
             }
-            response = requests.get(url, params=params)
+            response = self.http.get(url, params=params)
             return response.json() if response.status_code == 200 else {"error": f"API error: {response.status_code}"}
         except Exception as e:
-            print(f"[ERROR] Failed to get forecast weather for '{place}': {e}")
+            logger.warning("Failed to get forecast weather", extra={"place": place, "error": str(e)})
             return {"error": str(e)}
+
+
+def _slot_precipitation(slot: dict) -> float:
+    return slot.get("rain", {}).get("3h", 0.0) + slot.get("snow", {}).get("3h", 0.0)
+
+
+def daily_forecast(forecast: dict, start: Optional[date] = None, end: Optional[date] = None) -> List[dict]:
+    """Aggregate the 3-hour forecast series into one summary per local calendar day.
+
+    Each day has min/max temperature, total precipitation (mm), the highest chance
+    of precipitation and the most common daytime condition. Days outside
+    [start, end] are left out.
+    """
+    offset = timedelta(seconds=forecast.get("city", {}).get("timezone", 0))
+    slots_by_day = {}
+    for slot in forecast.get("list", []):
+        local_day = (datetime.fromtimestamp(slot["dt"], tz=timezone.utc) + offset).date()
+        if (start and local_day < start) or (end and local_day > end):
+            continue
+        slots_by_day.setdefault(local_day, []).append(slot)
+
+    days = []
+    for day, slots in sorted(slots_by_day.items()):
+        daytime = [slot for slot in slots if slot.get("sys", {}).get("pod") == "d"] or slots
+        conditions = Counter(slot["weather"][0]["description"] for slot in daytime if slot.get("weather"))
+        days.append({
+            "date": day,
+            "min": min(slot["main"].get("temp_min", slot["main"]["temp"]) for slot in slots),
+            "max": max(slot["main"].get("temp_max", slot["main"]["temp"]) for slot in slots),
+            "precip_mm": round(sum(_slot_precipitation(slot) for slot in slots), 1),
+            "precip_chance": max(slot.get("pop", 0.0) for slot in slots),
+            "condition": conditions.most_common(1)[0][0] if conditions else "n/a",
+            "slots": len(slots),
+        })
+    return days
+